@@ -1,17 +1,26 @@
 """
 Flask API Server für Menüplansimulator
 """
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response, stream_with_context
 from flask_cors import CORS
 from whitenoise import WhiteNoise
 from dataclasses import asdict
+from itertools import chain
 import json
 import os
 import sys
 
 # Importiere Simulator
 try:
-    from backend.simulator import load_recipes_from_file, run_simulation, Recipe
+    from backend.simulator import load_recipes_from_file, run_simulation, run_simulation_stream, run_simulation_batch, run_replan, run_precheck, Recipe, optimization_modes, replan_window
+    from backend.recipe_similarity import load_similarity_engine
+    from backend.recipe_index import RecipeFilterIndex
+    from backend.simulation_cache import SimulationCache, catalog_version
+    from backend.simulation_jobs import SimulationJobManager
+    from backend.simulation_metrics import PROCESS_METRICS
+    from backend.bkt_sweep import run_feasibility_sweep
+    from backend.pareto import run_pareto
+    from backend.plan_output import OUTPUT_FORMATS, DEFAULT_OUTPUT_FORMAT, shape_output, expand_output, slot_options
     from backend.procurement import resolve_procurement
     from backend.recipe_selection_db import get_selected_recipe_ids
     from backend.pdf_export import create_menu_plan_pdf
@@ -23,7 +32,15 @@ try:
     from backend.init_default_selection import init_default_selection
 except ImportError:
     # Fallback für lokale Ausführung
-    from simulator import load_recipes_from_file, run_simulation, Recipe
+    from simulator import load_recipes_from_file, run_simulation, run_simulation_stream, run_simulation_batch, run_replan, run_precheck, Recipe, optimization_modes, replan_window
+    from recipe_similarity import load_similarity_engine
+    from recipe_index import RecipeFilterIndex
+    from simulation_cache import SimulationCache, catalog_version
+    from simulation_jobs import SimulationJobManager
+    from simulation_metrics import PROCESS_METRICS
+    from bkt_sweep import run_feasibility_sweep
+    from pareto import run_pareto
+    from plan_output import OUTPUT_FORMATS, DEFAULT_OUTPUT_FORMAT, shape_output, expand_output, slot_options
     from procurement import resolve_procurement
     from recipe_selection_db import get_selected_recipe_ids
     from pdf_export import create_menu_plan_pdf
@@ -81,12 +98,7 @@ def version():
 def get_meal_categories():
     """Gibt verfügbare Mahlzeiten-Kategorien aus den Rezepten zurück"""
     try:
-        categories = {}
-        for recipe in recipes:
-            comp = recipe.menu_component
-            if comp not in categories:
-                categories[comp] = 0
-            categories[comp] += 1
+        categories = filter_index.component_counts()
         
         result = [
             {'name': name, 'count': count}
@@ -104,18 +116,45 @@ recipes_file_original = os.path.join(os.path.dirname(__file__), '..', 'data', 'r
 
 # Versuche 300 Rezepte zu laden, sonst Fallback
 if os.path.exists(recipes_file_300):
-    recipes = load_recipes_from_file(recipes_file_300)
+    recipes_file = recipes_file_300
+    recipes = load_recipes_from_file(recipes_file)
     print(f"✅ Loaded {len(recipes)} recipes from 300-recipe database")
 elif os.path.exists(recipes_file_200):
-    recipes = load_recipes_from_file(recipes_file_200)
+    recipes_file = recipes_file_200
+    recipes = load_recipes_from_file(recipes_file)
     print(f"✅ Loaded {len(recipes)} recipes from 200-recipe database")
 elif os.path.exists(recipes_file_extended):
-    recipes = load_recipes_from_file(recipes_file_extended)
+    recipes_file = recipes_file_extended
+    recipes = load_recipes_from_file(recipes_file)
     print(f"✅ Loaded {len(recipes)} recipes from extended database")
 else:
-    recipes = load_recipes_from_file(recipes_file_original)
+    recipes_file = recipes_file_original
+    recipes = load_recipes_from_file(recipes_file)
     print(f"✅ Loaded {len(recipes)} recipes from original database")
 
+# Ähnlichkeitsmatrix einmal pro Katalog (persistiert neben der Rezeptdatei)
+similarity_engine = load_similarity_engine(recipes, recipes_file)
+
+# Bitmasken- und Komponenten-Index; wird nur beim (Neu-)Laden des Katalogs gebaut
+filter_index = RecipeFilterIndex(recipes)
+
+# Ergebnis-Cache (In-Memory + SQLite, geteilt von allen Workern)
+simulation_cache = SimulationCache(catalog_version(recipes))
+
+
+def _run_simulation_job(config, seed, progress_callback):
+    """Simulation eines Hintergrund-Jobs (gleiche Daten wie /api/simulate)"""
+    config = dict(config)
+    output_format = config.pop('output_format', DEFAULT_OUTPUT_FORMAT)
+    result = run_simulation(config, recipes, similarity=similarity_engine, seed=seed,
+                            cache=simulation_cache, filter_index=filter_index,
+                            progress_callback=progress_callback)
+    return shape_output(result, output_format)
+
+
+# Hintergrund-Jobs (begrenzter Pool je Worker, Status in SQLite)
+simulation_jobs = SimulationJobManager(_run_simulation_job)
+
 
 @app.route('/')
 def index():
@@ -186,7 +225,13 @@ def get_recipes():
 
 @app.route('/api/simulate', methods=['POST'])
 def simulate():
-    """Führt Simulation aus"""
+    """Führt Simulation aus.
+    
+    Optional startet seed_plan (früheres Ergebnis, z.B. die Vorwoche) oder
+    seed_plan_id (gespeicherter Menüplan) die Planung von dessen noch
+    zulässigen Slots (Warm-Start). output_format: 'full' (Standard, Optionen
+    vollständig je Slot) oder 'slim' (Rezepte einmal im recipes-Dictionary).
+    """
     try:
         config = request.json
         
@@ -196,16 +241,145 @@ def simulate():
             if field not in config:
                 return jsonify({'error': f'Missing field: {field}'}), 400
         
+        # Optionaler Seed: gleiche Konfiguration + Seed liefert das gecachte Ergebnis
+        seed = config.pop('seed', None)
+        
+        output_format = config.pop('output_format', DEFAULT_OUTPUT_FORMAT)
+        if output_format not in OUTPUT_FORMATS:
+            return jsonify({'error': f'Unknown output format: {output_format}'}), 400
+        try:
+            optimization_modes(config.get('simulation_params', {}))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Optionaler Warm-Start: früheres Ergebnis (seed_plan) oder gespeicherter Plan (seed_plan_id)
+        seed_plan = config.pop('seed_plan', None)
+        seed_plan_id = config.pop('seed_plan_id', None)
+        if seed_plan_id is not None:
+            plan_data = plan_manager.load_menu_plan(str(seed_plan_id))
+            if not plan_data:
+                return jsonify({'success': False, 'error': 'Seed plan not found'}), 404
+            seed_plan = plan_data['plan']
+        
         # Verwende ALLE Rezepte (Auswahlsystem deaktiviert)
         filtered_recipes = recipes
         print(f"✅ Using all {len(filtered_recipes)} recipes")
         
         # Führe Simulation mit allen Rezepten aus
-        result = run_simulation(config, filtered_recipes)
+        result = run_simulation(config, filtered_recipes, similarity=similarity_engine,
+                                seed=seed, cache=simulation_cache, filter_index=filter_index,
+                                seed_plan=seed_plan)
+        
+        return jsonify({
+            'success': True,
+            'plan': shape_output(result, output_format)
+        })
+    
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/simulate/stream', methods=['POST'])
+def simulate_stream():
+    """Führt Simulation aus und streamt den Plan Tag für Tag.
+    
+    Standard ist NDJSON (ein JSON-Event pro Zeile); mit ?format=sse oder
+    Accept: text/event-stream als Server-Sent Events. Event-Typen: start,
+    day, day_update, done und error.
+    """
+    try:
+        config = request.json
+        
+        # Validierung
+        required_fields = ['start_date', 'end_date', 'menu_lines', 'bkt_target']
+        for field in required_fields:
+            if field not in config:
+                return jsonify({'error': f'Missing field: {field}'}), 400
+        
+        seed = config.pop('seed', None)
+        use_sse = request.args.get('format') == 'sse' or \
+            'text/event-stream' in request.headers.get('Accept', '')
+        
+        events = run_simulation_stream(config, recipes, similarity=similarity_engine, seed=seed,
+                                       cache=simulation_cache, filter_index=filter_index)
+        # Filterung und Machbarkeitsprüfung laufen vor dem ersten Event,
+        # Fehler daraus werden noch als normale JSON-Antwort gemeldet
+        first_event = next(events)
+    
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    
+    def encode(event):
+        payload = json.dumps(event, ensure_ascii=False)
+        if use_sse:
+            return f"event: {event['type']}\ndata: {payload}\n\n"
+        return payload + '\n'
+    
+    def generate():
+        try:
+            for event in chain([first_event], events):
+                yield encode(event)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield encode({'type': 'error', 'error': str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+        # Kein Puffern durch nginx, damit die Tage sofort beim Client ankommen
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/api/simulate/replan', methods=['POST'])
+def simulate_replan():
+    """Plant ein Zeitfenster eines bestehenden Plans neu.
+    
+    Body: Konfiguration wie bei /api/simulate plus plan (früheres Ergebnis,
+    slim oder full), window_start, window_end und optional pinned
+    ([{"date", "menu_line_id", "cost_form_id"}, ...]) für fixierte Slots.
+    """
+    try:
+        config = request.json
+        
+        # Validierung
+        required_fields = ['start_date', 'end_date', 'menu_lines', 'bkt_target',
+                           'plan', 'window_start', 'window_end']
+        for field in required_fields:
+            if field not in config:
+                return jsonify({'error': f'Missing field: {field}'}), 400
+        
+        seed = config.pop('seed', None)
+        output_format = config.pop('output_format', DEFAULT_OUTPUT_FORMAT)
+        if output_format not in OUTPUT_FORMATS:
+            return jsonify({'error': f'Unknown output format: {output_format}'}), 400
+        existing_plan = config.pop('plan')
+        window_start = config.pop('window_start')
+        window_end = config.pop('window_end')
+        try:
+            replan_window(config, window_start, window_end)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        pinned = config.pop('pinned', None)
+        
+        result = run_replan(config, recipes, existing_plan, window_start, window_end,
+                            pinned=pinned, similarity=similarity_engine, seed=seed,
+                            filter_index=filter_index)
         
         return jsonify({
             'success': True,
-            'plan': result
+            'plan': shape_output(result, output_format)
         })
     
     except Exception as e:
@@ -217,6 +391,251 @@ def simulate():
         }), 500
 
 
+@app.route('/api/simulate/batch', methods=['POST'])
+def simulate_batch():
+    """Führt mehrere Simulationen in einem Aufruf aus (z.B. alle Küchen eines Trägers).
+    
+    Body: {"configs": [config, ...]}; jede Konfiguration wie bei /api/simulate
+    (optional mit Seed), output_format gilt für alle Pläne. Konfigurationen
+    mit gleichen Hard Constraints teilen sich Filterung und Kandidaten-Pools
+    und laufen parallel.
+    """
+    try:
+        data = request.json or {}
+        configs = data.get('configs')
+        if not isinstance(configs, list) or not configs:
+            return jsonify({'error': 'Missing field: configs'}), 400
+        output_format = data.get('output_format', DEFAULT_OUTPUT_FORMAT)
+        if output_format not in OUTPUT_FORMATS:
+            return jsonify({'error': f'Unknown output format: {output_format}'}), 400
+        
+        # Validierung
+        required_fields = ['start_date', 'end_date', 'menu_lines', 'bkt_target']
+        for position, config in enumerate(configs):
+            for field in required_fields:
+                if field not in config:
+                    return jsonify({'error': f'Missing field in config {position}: {field}'}), 400
+        
+        seeds = [config.pop('seed', None) for config in configs]
+        batch = run_simulation_batch(configs, recipes, similarity=similarity_engine, seeds=seeds,
+                                     cache=simulation_cache, filter_index=filter_index)
+        for item in batch['results']:
+            if item.get('success'):
+                item['plan'] = shape_output(item['plan'], output_format)
+        
+        return jsonify({
+            'success': True,
+            'results': batch['results'],
+            'statistics': batch['statistics']
+        })
+    
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/simulate/precheck', methods=['POST'])
+def simulate_precheck():
+    """Prüft eine Konfiguration auf Machbarkeit (BKT, Wiederholungsabstand,
+    Häufigkeitslimits), ohne einen Plan zu erzeugen"""
+    try:
+        config = request.json
+        
+        # Validierung
+        required_fields = ['start_date', 'end_date', 'menu_lines', 'bkt_target']
+        for field in required_fields:
+            if field not in config:
+                return jsonify({'error': f'Missing field: {field}'}), 400
+        config.pop('seed', None)
+        
+        report = run_precheck(config, recipes, similarity=similarity_engine,
+                              filter_index=filter_index)
+        
+        return jsonify({
+            'success': True,
+            'feasibility': report
+        })
+    
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/simulate/feasibility-sweep', methods=['POST'])
+def simulate_feasibility_sweep():
+    """BKT-Machbarkeitsraster für eine Konfiguration.
+    
+    Body: Konfiguration wie bei /api/simulate (ohne bkt_target) plus sweep:
+    {"bkt_target": {"min", "max", "step"} oder Liste, "bkt_tolerance": ...,
+    "excluded_allergen_sets": [[...], ...], "samples": Anzahl Greedy-Simulationen}
+    """
+    try:
+        config = request.json
+        
+        # Validierung
+        required_fields = ['start_date', 'end_date', 'menu_lines', 'sweep']
+        for field in required_fields:
+            if field not in config:
+                return jsonify({'error': f'Missing field: {field}'}), 400
+        
+        sweep = config.pop('sweep')
+        if 'bkt_target' not in sweep:
+            return jsonify({'error': 'Missing field: sweep.bkt_target'}), 400
+        seed = config.pop('seed', None)
+        
+        result = run_feasibility_sweep(
+            config, recipes, sweep['bkt_target'],
+            sweep.get('bkt_tolerance', config.get('bkt_tolerance', 0.15)),
+            allergen_sets=sweep.get('excluded_allergen_sets'),
+            samples=sweep.get('samples', 0),
+            similarity=similarity_engine, filter_index=filter_index, seed=seed
+        )
+        
+        return jsonify({
+            'success': True,
+            'sweep': result
+        })
+    
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/simulate/pareto', methods=['POST'])
+def simulate_pareto():
+    """Pareto-Front über Kosten, CO2 und Beliebtheit in einem Aufruf.
+    
+    Body: Konfiguration wie bei /api/simulate plus optional
+    pareto: {"epsilon_levels": Anzahl Epsilon-Constraint-Läufe (Standard 3)};
+    output_format gilt für alle Pläne der Front.
+    """
+    try:
+        config = request.json
+        
+        # Validierung
+        required_fields = ['start_date', 'end_date', 'menu_lines', 'bkt_target']
+        for field in required_fields:
+            if field not in config:
+                return jsonify({'error': f'Missing field: {field}'}), 400
+        
+        seed = config.pop('seed', None)
+        options = config.pop('pareto', None) or {}
+        output_format = config.pop('output_format', DEFAULT_OUTPUT_FORMAT)
+        if output_format not in OUTPUT_FORMATS:
+            return jsonify({'error': f'Unknown output format: {output_format}'}), 400
+        
+        result = run_pareto(config, recipes, epsilon_levels=options.get('epsilon_levels', 3),
+                            similarity=similarity_engine, filter_index=filter_index, seed=seed)
+        for entry in result['front']:
+            entry['plan'] = shape_output(entry['plan'], output_format)
+        
+        return jsonify({
+            'success': True,
+            'pareto': result
+        })
+    
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/simulate/jobs', methods=['POST'])
+def create_simulation_job():
+    """Startet eine Simulation im Hintergrund und gibt die Job-ID zurück"""
+    try:
+        config = request.json
+        
+        # Validierung
+        required_fields = ['start_date', 'end_date', 'menu_lines', 'bkt_target']
+        for field in required_fields:
+            if field not in config:
+                return jsonify({'error': f'Missing field: {field}'}), 400
+        
+        seed = config.pop('seed', None)
+        # output_format bleibt in der Job-Konfiguration (siehe _run_simulation_job)
+        if config.get('output_format', DEFAULT_OUTPUT_FORMAT) not in OUTPUT_FORMATS:
+            return jsonify({'error': f"Unknown output format: {config['output_format']}"}), 400
+        try:
+            optimization_modes(config.get('simulation_params', {}))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        try:
+            job_id = simulation_jobs.submit(config, seed)
+        except ValueError as e:
+            # Warteschlange voll
+            return jsonify({'success': False, 'error': str(e)}), 503
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f'/api/simulate/jobs/{job_id}'
+        }), 202
+    
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/simulate/jobs/<job_id>', methods=['GET'])
+def get_simulation_job(job_id):
+    """Gibt Status, Phase und Fortschritt eines Jobs zurück (mit Plan, wenn abgeschlossen)"""
+    try:
+        job = simulation_jobs.get(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        return jsonify({'success': True, 'job': job})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/simulate/jobs/<job_id>', methods=['DELETE'])
+def cancel_simulation_job(job_id):
+    """Bricht einen wartenden oder laufenden Job ab"""
+    try:
+        job = simulation_jobs.cancel(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        return jsonify({'success': True, 'job': job})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/simulate/cache', methods=['GET'])
+def get_simulation_cache_stats():
+    """Gibt Treffer-/Fehlzähler des Simulations-Caches zurück"""
+    return jsonify({'success': True, 'cache': simulation_cache.stats()})
+
+
+@app.route('/api/simulate/performance', methods=['GET'])
+def get_simulation_performance():
+    """Aufsummierte Phasenzeiten und Zähler aller Simulationen dieses Worker-Prozesses
+    (mit ?reset=1 werden sie danach zurückgesetzt)"""
+    performance = PROCESS_METRICS.snapshot()
+    if request.args.get('reset') == '1':
+        PROCESS_METRICS.reset()
+    return jsonify({'success': True, 'performance': performance})
+
+
 @app.route('/api/config/example', methods=['GET'])
 def get_example_config():
     """Gibt Beispiel-Konfiguration zurück"""
@@ -294,7 +713,8 @@ def get_recipe_details(recipe_id):
 def get_recipes_by_component(component):
     """Gibt alle Rezepte für eine bestimmte Mahlzeit zurück"""
     try:
-        filtered = [r for r in recipes if r.menu_component == component]
+        # Komponenten-Index (Aliase wie in der Simulation aufgelöst)
+        filtered = filter_index.recipes_for_component(component)
         return jsonify({
             'success': True,
             'count': len(filtered),
@@ -348,7 +768,7 @@ def export_pdf():
             return jsonify({'error': 'Missing plan or config'}), 400
         
         # Erstelle PDF
-        pdf_buffer = create_menu_plan_pdf(data['plan'], data['config'])
+        pdf_buffer = create_menu_plan_pdf(expand_output(data['plan']), data['config'])
         
         # Sende PDF
         from flask import send_file
@@ -395,7 +815,7 @@ def export_customer_pdf():
         output_path = f'/tmp/{filename}'
         
         # PDF generieren mit Orientierung
-        generate_customer_pdf(plan_data, output_path, orientation=orientation)
+        generate_customer_pdf(expand_output(plan_data), output_path, orientation=orientation)
         
         # PDF zurücksenden
         from flask import send_file
@@ -431,7 +851,7 @@ def export_excel():
             return jsonify({'error': 'Ungültige Plan-Daten'}), 400
         
         # Excel-Datei generieren
-        excel_buffer = create_excel_export(plan_data)
+        excel_buffer = create_excel_export(expand_output(plan_data))
         
         # Dateiname generieren
         from datetime import datetime
@@ -523,10 +943,13 @@ def update_selection():
                 if len(menu_line['recipes']) > 0:
                     recipe_slot = menu_line['recipes'][0]  # Erstes Rezept
                     
+                    # Optionen im slim- oder vollen Format
+                    options = slot_options(plan, recipe_slot)
+                    
                     # Validiere den neuen Index
-                    if new_index < 0 or new_index >= len(recipe_slot['options']):
+                    if new_index < 0 or new_index >= len(options):
                         return jsonify({
-                            'error': f'Invalid index: {new_index}. Must be between 0 and {len(recipe_slot["options"])-1}'
+                            'error': f'Invalid index: {new_index}. Must be between 0 and {len(options)-1}'
                         }), 400
                     
                     # Aktualisiere den selected_index
@@ -535,8 +958,8 @@ def update_selection():
                     recipe_slot['is_user_modified'] = True
                     
                     # Aktualisiere die Tageskosten
-                    old_cost = recipe_slot['options'][old_index]['cost_per_serving']
-                    new_cost = recipe_slot['options'][new_index]['cost_per_serving']
+                    old_cost = options[old_index]['cost_per_serving']
+                    new_cost = options[new_index]['cost_per_serving']
                     day['total_cost'] = day['total_cost'] - old_cost + new_cost
                     
                     updated = True
@@ -597,12 +1020,11 @@ def get_procurement_from_plans():
         
         # Lade Rezeptdatenbank für Zutaten
         # Konvertiere Recipe-Objekte zu Dictionaries
-        from dataclasses import asdict
         recipes_db = {}
         for r in recipes:
-            if hasattr(r, '__dict__'):
+            if hasattr(r, 'to_dict'):
                 # Recipe Objekt
-                recipes_db[r.id] = asdict(r)
+                recipes_db[r.id] = r.to_dict()
             else:
                 # Bereits Dictionary
                 recipes_db[r['id']] = r
@@ -880,7 +1302,8 @@ def save_menu_plan():
     try:
         data = request.json
         metadata = MenuPlanMetadata(**data['metadata'])
-        plan_id = plan_manager.save_menu_plan(data['plan'], metadata)
+        # Gespeichert wird das volle Format (Tagesliste ohne recipes-Dictionary)
+        plan_id = plan_manager.save_menu_plan(expand_output(data['plan']), metadata)
         return jsonify({'success': True, 'plan_id': plan_id})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
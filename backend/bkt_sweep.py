@@ -0,0 +1,274 @@
+"""
+BKT-Machbarkeits-Sweep
+Beantwortet "welcher BKT ist für diese Kostformen und Allergene mindestens
+erreichbar?" ohne wiederholte Simulationen: Je Allergen-Ausschluss wird
+einmal eine Tabelle mit Rezeptkosten je Portion und Slot erstellt (Einheit
+von BKT und Tageskosten im Plan), danach wird das ganze Raster aus BKT-Ziel
+und Toleranz vektorisiert ausgewertet. Machbar ist ein Ziel, wenn die
+günstigste Rotation unter dem Wiederholungsabstand im Durchschnitt
+höchstens bkt_max kostet. Optional laufen an ausgewählten Frontier-Punkten
+schnelle Greedy-Simulationen mit BKT-Reparatur (ohne Optimierung) parallel.
+"""
+import math
+import os
+import time
+from dataclasses import replace
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+try:
+    from backend.simulator import MenuPlanSimulator, SimulatorConfig, RecipeSimilarityEngine
+    from backend.recipe_index import RecipeFilterIndex
+    from backend.fork_pool import run_forked, fork_available, check_cancelled
+except ImportError:
+    # Fallback für lokale Ausführung
+    from simulator import MenuPlanSimulator, SimulatorConfig, RecipeSimilarityEngine
+    from recipe_index import RecipeFilterIndex
+    from fork_pool import run_forked, fork_available, check_cancelled
+
+# Obergrenze für Rasterpunkte (Ziele x Toleranzen x Allergen-Ausschlüsse)
+MAX_SWEEP_POINTS = 100000
+# Obergrenze für Greedy-Simulationen je Sweep
+MAX_SWEEP_SAMPLES = 32
+
+
+def sweep_values(spec, name: str) -> np.ndarray:
+    """Rasterwerte aus einer Liste oder {'min', 'max', 'step'} (inklusive max)"""
+    if isinstance(spec, dict):
+        try:
+            low, high, step = float(spec['min']), float(spec['max']), float(spec['step'])
+        except KeyError as e:
+            raise ValueError(f"Sweep range {name} needs min, max and step (missing {e})")
+        if step <= 0 or high < low:
+            raise ValueError(f"Invalid sweep range for {name}: {spec}")
+        count = int(np.floor((high - low) / step + 1e-9)) + 1
+        return np.round(low + step * np.arange(count), 6)
+    if isinstance(spec, (int, float)):
+        return np.array([float(spec)])
+    values = np.array(sorted(set(float(v) for v in spec)), dtype=np.float64)
+    if len(values) == 0:
+        raise ValueError(f"Sweep range {name} is empty")
+    return values
+
+
+def cost_table(simulator: MenuPlanSimulator) -> List[Dict]:
+    """Rezeptkosten je Portion und Slot (nach Hard-Constraint-Filterung).
+
+    min_cost/max_cost: günstigstes/teuerstes Rezept (wie _check_bkt_feasibility).
+    rotation_cost: durchschnittliche Kosten der günstigsten Rotation, wenn
+    innerhalb des Wiederholungsabstands kein Rezept doppelt vorkommt; Slots
+    derselben Komponente teilen sich die Rezepte.
+    """
+    config = simulator.config
+    simulator.eligible_recipes = simulator._filter_recipes()
+    variety_params = config.simulation_params.get('variety', {})
+    total_days = (config.end_date_obj - config.start_date_obj).days + 1
+    window = min(max(1, math.ceil(variety_params.get('minRepetition', 7)),
+                     config.repetition_interval), total_days)
+    slots = [(menu_line, cost_form, simulator.eligible_candidates.get((menu_line['id'], cost_form['id'])))
+             for menu_line in config.menu_lines for cost_form in menu_line['cost_forms']]
+    # Slots mit denselben Kandidaten (gleiche Komponente) brauchen gemeinsam verschiedene Rezepte
+    shared = {}
+    for _, _, candidates in slots:
+        if candidates is not None:
+            shared[id(candidates)] = shared.get(id(candidates), 0) + 1
+    table = []
+    for menu_line, cost_form, candidates in slots:
+        costs = None
+        if candidates is not None:
+            costs = np.sort(simulator.filter_index.portion_costs[candidates.rows])
+        table.append({
+            'menu_line_id': menu_line['id'],
+            'cost_form_id': cost_form['id'],
+            'component': cost_form.get('component', 'NO_COMPONENT'),
+            'candidates': 0 if costs is None else len(costs),
+            'min_cost': None if costs is None else float(costs[0]),
+            'max_cost': None if costs is None else float(costs[-1]),
+            'rotation_cost': None if costs is None
+            else float(costs[:shared[id(candidates)] * window].mean()),
+        })
+    return table
+
+
+def _run_sample(state: Dict, position: int) -> Dict:
+    """Greedy-Simulation mit BKT-Reparatur (ohne Optimierung) an einem Rasterpunkt"""
+    config, eligibility = state['samples'][position]
+    simulator = MenuPlanSimulator(config, state['recipes'], similarity=state['similarity'],
+                                  seed=state['seed'], filter_index=state['filter_index'],
+                                  progress_callback=check_cancelled, eligibility=eligibility)
+    sample = {
+        'bkt_target': config.bkt_target,
+        'bkt_tolerance': config.bkt_tolerance,
+        'excluded_allergens': list(config.excluded_allergens),
+    }
+    try:
+        simulator._prepare()
+        plan = simulator._greedy_construct_plan()
+        simulator._repair_daily_bkt(plan)
+    except ValueError as e:
+        sample['error'] = str(e)
+        return sample
+
+    daily_costs = list(simulator._daily_costs(plan).values())
+    average = sum(daily_costs) / len(daily_costs) if daily_costs else 0.0
+    sample.update({
+        'total_days': len(daily_costs),
+        'avg_bkt': round(average, 2),
+        'min_bkt': round(min(daily_costs), 2) if daily_costs else 0.0,
+        'max_bkt': round(max(daily_costs), 2) if daily_costs else 0.0,
+        'days_within_window': sum(1 for cost in daily_costs if simulator._within_bkt(cost)),
+        'within_budget': average <= config.bkt_max,
+    })
+    return sample
+
+
+def run_feasibility_sweep(config_dict: Dict, recipes: List, bkt_targets, tolerances,
+                          allergen_sets: List[List[str]] = None, samples: int = 0,
+                          similarity: RecipeSimilarityEngine = None,
+                          filter_index: RecipeFilterIndex = None, seed: int = None,
+                          workers: int = None) -> Dict:
+    """Machbarkeitsraster über BKT-Ziel x Toleranz x Allergen-Ausschluss.
+
+    config_dict liefert Menülinien, Kostformen und die übrigen Hard
+    Constraints; bkt_target/bkt_tolerance/excluded_allergens werden durch das
+    Raster ersetzt. Kosten sind Kosten je Portion wie im Plan. Machbar heißt:
+    Summe der Rotationskosten der Slots (siehe cost_table) <= bkt_target *
+    (1 + bkt_tolerance); min_daily_cost ist die schwächere Schranke von
+    _check_bkt_feasibility. Die Frontier enthält je Allergen-Ausschluss und
+    Toleranz das kleinste machbare Ziel (exakt und auf dem Raster). Mit
+    samples > 0 laufen Greedy-Simulationen mit BKT-Reparatur an bis zu
+    samples Frontier-Punkten parallel; within_budget der Stichproben bestätigt
+    die Frontier.
+    """
+    start_time = time.perf_counter()
+    targets = sweep_values(bkt_targets, 'bkt_target')
+    tolerance_values = sweep_values(tolerances, 'bkt_tolerance')
+    base = dict(config_dict)
+    if allergen_sets is None:
+        allergen_sets = [base.get('excluded_allergens', [])]
+    allergen_sets = [sorted(set(allergens)) for allergens in allergen_sets]
+    if not allergen_sets:
+        raise ValueError("Sweep needs at least one allergen set")
+    grid_points = len(targets) * len(tolerance_values) * len(allergen_sets)
+    if grid_points > MAX_SWEEP_POINTS:
+        raise ValueError(f"Sweep grid too large: {grid_points} points (max {MAX_SWEEP_POINTS})")
+    samples = max(0, min(int(samples or 0), MAX_SWEEP_SAMPLES))
+
+    base.setdefault('dietary_forms', [])
+    base['bkt_target'] = float(targets[0])
+    base['bkt_tolerance'] = float(tolerance_values[0])
+    base['excluded_allergens'] = []
+    config = SimulatorConfig(**base)
+
+    similarity = similarity or RecipeSimilarityEngine(recipes)
+    if filter_index is None or not filter_index.covers(recipes):
+        filter_index = RecipeFilterIndex(recipes)
+
+    # Kostentabellen einmal je Allergen-Ausschluss
+    tables, eligibilities = [], []
+    for allergens in allergen_sets:
+        eligibility = {}
+        simulator = MenuPlanSimulator(replace(config, excluded_allergens=allergens), recipes,
+                                      similarity=similarity, filter_index=filter_index,
+                                      eligibility=eligibility)
+        tables.append(cost_table(simulator))
+        eligibilities.append(eligibility)
+
+    # Raster vektorisiert: rotation_daily[a] <= target[t] * (1 + tolerance[l])
+    def column(name, missing):
+        return np.array([[missing if slot[name] is None else slot[name] for slot in table]
+                         for table in tables], dtype=np.float64).reshape(len(tables), -1)
+    min_daily = column('min_cost', np.inf).sum(axis=1)
+    max_daily = column('max_cost', np.nan).sum(axis=1)
+    rotation_daily = column('rotation_cost', np.inf).sum(axis=1)
+    bkt_max = targets[:, None] * (1.0 + tolerance_values[None, :])
+    feasible = rotation_daily[:, None, None] <= bkt_max[None, :, :] + 1e-9
+    # Kleinstes machbares Ziel je (Allergen-Ausschluss, Toleranz): exakt und auf dem Raster
+    exact_frontier = rotation_daily[:, None] / (1.0 + tolerance_values[None, :])
+    any_feasible = feasible.any(axis=1)
+    first_feasible = feasible.argmax(axis=1)
+
+    results = []
+    frontier_points = []
+    for a, allergens in enumerate(allergen_sets):
+        frontier = []
+        for l, tolerance in enumerate(tolerance_values.tolist()):
+            grid_target = float(targets[first_feasible[a, l]]) if any_feasible[a, l] else None
+            frontier.append({
+                'bkt_tolerance': tolerance,
+                'min_bkt_target': round(float(exact_frontier[a, l]), 4)
+                if np.isfinite(exact_frontier[a, l]) else None,
+                'min_grid_target': grid_target,
+            })
+            if grid_target is not None:
+                frontier_points.append((a, grid_target, tolerance))
+        results.append({
+            'excluded_allergens': allergens,
+            'min_daily_cost': round(float(min_daily[a]), 4) if np.isfinite(min_daily[a]) else None,
+            'max_daily_cost': round(float(max_daily[a]), 4) if np.isfinite(max_daily[a]) else None,
+            'rotation_daily_cost': round(float(rotation_daily[a]), 4)
+            if np.isfinite(rotation_daily[a]) else None,
+            'missing_components': [slot['component'] for slot in tables[a] if not slot['candidates']],
+            'components': tables[a],
+            'feasible': feasible[a].tolist(),
+            'frontier': frontier,
+        })
+
+    sample_results = []
+    if samples and frontier_points:
+        sample_results = _run_samples(config, recipes, similarity, filter_index, seed, workers,
+                                      allergen_sets, eligibilities, frontier_points, samples)
+        # Frontier-Punkte mit Stichprobe: bestätigt, wenn der Plan im Budget liegt
+        confirmed = {(tuple(sample['excluded_allergens']), sample['bkt_target'], sample['bkt_tolerance']):
+                     bool(sample.get('within_budget')) for sample in sample_results}
+        for result in results:
+            for point in result['frontier']:
+                point['confirmed'] = confirmed.get((tuple(result['excluded_allergens']),
+                                                    point['min_grid_target'], point['bkt_tolerance']))
+
+    duration = time.perf_counter() - start_time
+    print(f"  ✓ BKT sweep: {grid_points} grid points, {int(feasible.sum())} feasible, "
+          f"{len(sample_results)} samples, {duration:.2f}s")
+    return {
+        'bkt_targets': targets.tolist(),
+        'bkt_tolerances': tolerance_values.tolist(),
+        'allergen_sets': results,
+        'samples': sample_results,
+        'statistics': {
+            'grid_points': grid_points,
+            'feasible_points': int(feasible.sum()),
+            'samples': len(sample_results),
+            'samples_within_budget': sum(1 for sample in sample_results if sample.get('within_budget')),
+            'duration_ms': round(duration * 1000, 1),
+        }
+    }
+
+
+def _run_samples(config: SimulatorConfig, recipes: List, similarity, filter_index, seed,
+                 workers, allergen_sets: List[List[str]], eligibilities: List[Dict],
+                 frontier_points: List[Tuple], samples: int) -> List[Dict]:
+    """Greedy-Simulationen an gleichmäßig über die Frontier verteilten Punkten"""
+    picks = np.unique(np.linspace(0, len(frontier_points) - 1, samples).round().astype(int))
+    sample_configs = []
+    for pick in picks.tolist():
+        a, target, tolerance = frontier_points[pick]
+        sample_config = replace(config, bkt_target=target, bkt_tolerance=tolerance,
+                                excluded_allergens=allergen_sets[a])
+        sample_configs.append((sample_config, eligibilities[a]))
+        # Kandidaten-Pools vor dem Fork erzeugen, damit alle Stichproben sie teilen
+        simulator = MenuPlanSimulator(sample_config, recipes, similarity=similarity,
+                                      filter_index=filter_index, eligibility=eligibilities[a])
+        simulator.eligible_recipes = simulator._filter_recipes()
+        for key in simulator.eligible_recipes:
+            simulator._candidate_pool(key)
+
+    workers = max(1, min(len(sample_configs), workers or os.cpu_count() or 1))
+    if not fork_available():
+        workers = 1
+
+    state = {
+        'samples': sample_configs, 'recipes': recipes, 'similarity': similarity,
+        'filter_index': filter_index, 'seed': seed,
+    }
+    return run_forked(_run_sample, state, range(len(sample_configs)), workers)
@@ -0,0 +1,124 @@
+"""
+Fork-Pool für parallele Simulationsläufe
+Multi-Start, Batch, Zerlegung, BKT-Sweep und Pareto-Modus verteilen Läufe
+auf Worker-Prozesse. Der Zustand eines Aufrufs (Simulator, Filter-Index,
+Kandidaten-Pools) wird per Fork geerbt statt gepickelt: er geht als
+initargs an die Worker genau dieses Pools, nicht über eine Modul-Variable
+des Elternprozesses.
+
+Geforkt wird nur aus einem Prozess mit einem einzigen Thread (z.B. ein
+sync-Worker von gunicorn beim Bearbeiten einer Anfrage). Laufen weitere
+Threads (Job-Pool aus simulation_jobs, gthread-Worker), könnten sie beim
+Fork Sperren halten (stdout, logging, SQLite-Cache), die im Kind nie mehr
+freigegeben werden. Dann laufen die Läufe nacheinander im aufrufenden
+Thread; das Ergebnis ist dasselbe, nur ohne Parallelität.
+
+Abbruch: poll() des Aufrufers (z.B. der Fortschritts-Callback eines Jobs)
+wird während des Wartens regelmäßig aufgerufen. Löst poll() eine Ausnahme
+aus, wird ein Abbruch-Event an die Worker gesetzt; Simulatoren im Worker
+prüfen es über check_cancelled als Fortschritts-Callback und beenden sich.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_EXCEPTION, wait
+from typing import Callable, Iterable, List
+
+# Abstand (Sekunden), in dem poll() während des Wartens aufgerufen wird
+POLL_INTERVAL = 0.25
+
+# Zustand des Aufrufs und Abbruch-Event im Worker-Prozess (gesetzt vom Pool-Initializer)
+_worker_state = None
+_cancel_event = None
+
+# poll() des äußersten Aufrufs, solange Läufe im aufrufenden Thread laufen
+_local = threading.local()
+
+
+class WorkerCancelled(Exception):
+    """Wird im Worker ausgelöst, wenn der Aufrufer den Lauf abgebrochen hat"""
+
+
+def fork_available() -> bool:
+    """Ob Worker-Prozesse jetzt per Fork gestartet werden können: Fork wird
+    unterstützt und der Prozess hat nur einen Thread"""
+    return 'fork' in multiprocessing.get_all_start_methods() and threading.active_count() == 1
+
+
+def check_cancelled(*_):
+    """Fortschritts-Callback für Simulatoren in Worker-Läufen: bricht ab, sobald
+    der Aufrufer abgebrochen hat (Abbruch-Event bzw. poll() im selben Thread)"""
+    if _cancel_event is not None and _cancel_event.is_set():
+        raise WorkerCancelled()
+    poll = getattr(_local, 'poll', None)
+    if poll is not None:
+        # poll() kann selbst wieder Fortschritt melden
+        _local.poll = None
+        try:
+            poll()
+        except Exception as e:
+            # Als WorkerCancelled durch die Läufe; run_forked reicht e weiter
+            raise WorkerCancelled() from e
+        finally:
+            _local.poll = poll
+
+
+def _init_worker(state, cancel_event):
+    global _worker_state, _cancel_event
+    _worker_state = state
+    _cancel_event = cancel_event
+    _local.poll = None
+
+
+def _call(function: Callable, item):
+    return function(_worker_state, item)
+
+
+def run_forked(function: Callable, state, items: Iterable, workers: int,
+               poll: Callable = None) -> List:
+    """Führt function(state, item) für alle items aus (Ergebnisse in derselben Reihenfolge).
+
+    function muss eine Modul-Funktion sein (wird per Referenz gepickelt),
+    ebenso müssen items und Ergebnisse pickelbar sein; state wird nur
+    vererbt. Mit workers > 1 laufen die items in einem Fork-Pool, sonst (oder
+    wenn fork_available() False liefert) nacheinander im aufrufenden Thread.
+    poll() wird während des Wartens
+    aufgerufen; eine Ausnahme daraus bricht alle Läufe ab und wird weitergereicht.
+    """
+    items = list(items)
+    workers = max(1, min(workers, len(items)))
+    if workers == 1 or not fork_available():
+        outer = getattr(_local, 'poll', None)
+        if outer is None:
+            _local.poll = poll
+        try:
+            return [function(state, item) for item in items]
+        except WorkerCancelled as e:
+            if outer is None and e.__cause__ is not None:
+                raise e.__cause__
+            raise
+        finally:
+            _local.poll = outer
+
+    context = multiprocessing.get_context('fork')
+    cancel_event = context.Event()
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=context,
+        initializer=_init_worker, initargs=(state, cancel_event)
+    ) as executor:
+        futures = [executor.submit(_call, function, item) for item in items]
+        try:
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_EXCEPTION)
+                failed = [future for future in done if future.exception() is not None]
+                if failed:
+                    raise failed[0].exception()
+                if pending and poll is not None:
+                    poll()
+        except BaseException:
+            # Laufende Worker beenden sich beim nächsten Fortschritt
+            cancel_event.set()
+            for future in futures:
+                future.cancel()
+            raise
+        return [future.result() for future in futures]
@@ -0,0 +1,208 @@
+"""
+Mehrziel-Modus (Pareto-Front)
+Erzeugt in einem Aufruf eine kleine Pareto-Front von Plänen über Kosten,
+CO2 und Beliebtheit, statt die Gewichte mit wiederholten Simulationen von
+Hand zu variieren. Filterung, Kandidaten-Pools und deren normierte Ziele
+werden einmal berechnet und von allen Läufen geteilt:
+- lexikographisch: je Ziel ein Lauf, das Ziel vorrangig, die übrigen nur
+  als Tie-Breaker
+- Epsilon-Constraint: Kosten vorrangig, CO2 je Portion höchstens epsilon
+  (Stufen aus den CO2-Quantilen der zulässigen Kandidaten)
+Die Läufe sind Greedy-Simulationen mit BKT-Reparatur, aber ohne Local
+Search (deren Zielfunktion kennt die Ziele nicht), und laufen parallel.
+"""
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+try:
+    from backend.simulator import (MenuPlanSimulator, SimulatorConfig, RecipeSimilarityEngine,
+                                   CandidatePool, EligibleCandidates, PLAN_OBJECTIVES)
+    from backend.recipe_index import RecipeFilterIndex
+    from backend.fork_pool import run_forked, fork_available, check_cancelled
+except ImportError:
+    # Fallback für lokale Ausführung
+    from simulator import (MenuPlanSimulator, SimulatorConfig, RecipeSimilarityEngine,
+                           CandidatePool, EligibleCandidates, PLAN_OBJECTIVES)
+    from recipe_index import RecipeFilterIndex
+    from fork_pool import run_forked, fork_available, check_cancelled
+
+# Gewicht der nachrangigen Ziele in lexikographischen und Epsilon-Läufen
+LEXICOGRAPHIC_TIE_WEIGHT = 0.05
+# Epsilon-Stufen: gleichmäßig zwischen diesen CO2-Quantilen, höchstens so viele
+EPSILON_QUANTILES = (0.25, 0.75)
+MAX_EPSILON_LEVELS = 12
+# So viele CO2-ärmste Kandidaten bleiben je Slot mindestens erhalten
+MIN_EPSILON_CANDIDATES = 20
+
+
+def plan_objectives(plan: Dict) -> Dict:
+    """Zielwerte eines Plans: mittlere Tageskosten und Tages-CO2 (kg),
+    mittlere Beliebtheit der ausgewählten Rezepte"""
+    daily_costs = defaultdict(float)
+    daily_co2 = defaultdict(float)
+    popularity = 0.0
+    for key, meal_slot in plan.items():
+        daily_costs[key[0]] += meal_slot.cost
+        daily_co2[key[0]] += meal_slot.selected.co2_per_portion * meal_slot.portions
+        popularity += meal_slot.selected.popularity
+    days = len(daily_costs) or 1
+    return {
+        'cost': round(sum(daily_costs.values()) / days, 4),
+        'co2': round(sum(daily_co2.values()) / days, 4),
+        'popularity': round(popularity / len(plan), 4) if plan else 0.0,
+    }
+
+
+def dominates(a: Dict, b: Dict) -> bool:
+    """Ob Zielwerte a die Zielwerte b dominieren (Kosten und CO2 minimal,
+    Beliebtheit maximal)"""
+    not_worse = a['cost'] <= b['cost'] and a['co2'] <= b['co2'] and \
+        a['popularity'] >= b['popularity']
+    better = a['cost'] < b['cost'] or a['co2'] < b['co2'] or a['popularity'] > b['popularity']
+    return not_worse and better
+
+
+def pareto_front(objectives: List[Dict]) -> List[int]:
+    """Positionen der nicht dominierten Zielwerte (gleiche Werte nur einmal)"""
+    front = []
+    for i, a in enumerate(objectives):
+        if a is None or any(b is not None and dominates(b, a) for b in objectives):
+            continue
+        if any(objectives[j] == a for j in front):
+            continue
+        front.append(i)
+    return front
+
+
+def _run_point(state: Dict, position: int) -> Dict:
+    """Greedy-Simulation mit BKT-Reparatur für einen Lauf der Front"""
+    run = state['runs'][position]
+    simulator = MenuPlanSimulator(state['config'], state['recipes'], similarity=state['similarity'],
+                                  seed=state['seed'], filter_index=state['filter_index'],
+                                  eligibility=state['eligibility'],
+                                  progress_callback=check_cancelled)
+    simulator.objective_weights = run['weights']
+    try:
+        simulator._prepare()
+        # Epsilon-Constraint: vorberechnete Teilmengen der zulässigen Kandidaten
+        for key, candidates in state['capped'].get(run['co2_cap'], {}).items():
+            simulator.eligible_recipes[key] = candidates.recipes
+            simulator.eligible_candidates[key] = candidates
+        simulator.current_plan = simulator._greedy_construct_plan()
+        result = simulator._finalize()
+    except ValueError as e:
+        return {'error': str(e)}
+    return {'objectives': plan_objectives(simulator.current_plan), 'plan': result}
+
+
+def run_pareto(config_dict: Dict, recipes: List, epsilon_levels: int = 3,
+               similarity: RecipeSimilarityEngine = None,
+               filter_index: RecipeFilterIndex = None, seed: int = None,
+               workers: int = None) -> Dict:
+    """Pareto-Front über Kosten, CO2 und Beliebtheit in einem Aufruf.
+
+    config_dict wie bei run_simulation. Es laufen drei lexikographische
+    Läufe und bis zu epsilon_levels Epsilon-Constraint-Läufe (Stufen, die
+    keinen Kandidaten ausschließen, entfallen). Liefert die nicht
+    dominierten Pläne (front, nach Kosten sortiert) und die Zielwerte aller
+    Läufe (runs).
+    """
+    start_time = time.perf_counter()
+    config = SimulatorConfig(**config_dict)
+    epsilon_levels = max(0, min(int(epsilon_levels or 0), MAX_EPSILON_LEVELS))
+    similarity = similarity or RecipeSimilarityEngine(recipes)
+    if filter_index is None or not filter_index.covers(recipes):
+        filter_index = RecipeFilterIndex(recipes)
+
+    # Filterung, Pools und normierte Ziele einmal für alle Läufe
+    eligibility = {}
+    simulator = MenuPlanSimulator(config, recipes, similarity=similarity,
+                                  filter_index=filter_index, eligibility=eligibility)
+    simulator.eligible_recipes = simulator._filter_recipes()
+    if not simulator.eligible_recipes:
+        raise ValueError("No eligible recipes for this configuration")
+    pools = {}
+    for key in simulator.eligible_recipes:
+        pools[key] = simulator._candidate_pool(key)
+        pools[key].objective_terms()
+
+    runs = [
+        {'mode': 'lexicographic', 'primary': objective, 'co2_cap': None,
+         'weights': {o: 1.0 if o == objective else LEXICOGRAPHIC_TIE_WEIGHT
+                     for o in PLAN_OBJECTIVES}}
+        for objective in PLAN_OBJECTIVES
+    ]
+    capped = {}
+    if epsilon_levels:
+        co2 = np.concatenate([pool.co2 for pool in {id(p): p for p in pools.values()}.values()])
+        caps = np.unique(np.round(np.quantile(co2, np.linspace(*EPSILON_QUANTILES, epsilon_levels)), 4))
+        for cap in caps.tolist():
+            subsets = _capped_candidates(simulator, pools, cap)
+            if subsets is None:
+                continue
+            capped[cap] = subsets
+            runs.append({'mode': 'epsilon', 'primary': 'cost', 'co2_cap': cap,
+                         'weights': {o: 1.0 if o == 'cost' else LEXICOGRAPHIC_TIE_WEIGHT
+                                     for o in PLAN_OBJECTIVES}})
+
+    # Geteilter Zustand wird per Fork an die Worker vererbt (siehe run_forked)
+    workers = max(1, min(len(runs), workers or os.cpu_count() or 1))
+    if not fork_available():
+        workers = 1
+    state = {
+        'config': config, 'recipes': recipes, 'similarity': similarity,
+        'filter_index': filter_index, 'eligibility': eligibility, 'seed': seed,
+        'runs': runs, 'capped': capped,
+    }
+    results = run_forked(_run_point, state, range(len(runs)), workers)
+
+    summaries = []
+    for run, result in zip(runs, results):
+        summary = {key: run[key] for key in ('mode', 'primary', 'co2_cap')}
+        summary.update({key: result[key] for key in ('objectives', 'error') if key in result})
+        summaries.append(summary)
+    front = pareto_front([summary.get('objectives') for summary in summaries])
+    for position, summary in enumerate(summaries):
+        summary['pareto'] = position in front
+    front = sorted(front, key=lambda position: summaries[position]['objectives']['cost'])
+
+    duration = time.perf_counter() - start_time
+    print(f"  ✓ Pareto: {len(runs)} runs, {len(front)} plans on the front, {duration:.2f}s")
+    return {
+        'front': [dict(summaries[position], plan=results[position]['plan']) for position in front],
+        'runs': summaries,
+        'statistics': {
+            'runs': len(runs),
+            'front_size': len(front),
+            'workers': workers,
+            'duration_ms': round(duration * 1000, 1),
+        }
+    }
+
+
+def _capped_candidates(simulator: MenuPlanSimulator, pools: Dict, cap: float) -> Dict:
+    """Zulässige Kandidaten je Slot mit CO2 je Portion <= cap (mindestens die
+    MIN_EPSILON_CANDIDATES CO2-ärmsten); None, wenn die Stufe nichts ausschließt"""
+    subsets = {}
+    shared = {}
+    for key, candidates in simulator.eligible_candidates.items():
+        if id(candidates) not in shared:
+            pool = pools[key]
+            keep = np.flatnonzero(pool.co2 <= cap + 1e-9)
+            if len(keep) < min(MIN_EPSILON_CANDIDATES, len(pool)):
+                keep = np.sort(np.argsort(pool.co2, kind='stable')[:MIN_EPSILON_CANDIDATES])
+            subset = None
+            if len(keep) < len(pool):
+                subset = EligibleCandidates(candidates.rows[keep],
+                                            [candidates.recipes[i] for i in keep.tolist()])
+                subset.pool = CandidatePool(subset.recipes, simulator.similarity,
+                                            simulator.filter_index.season_months)
+                subset.pool.objective_terms()
+            shared[id(candidates)] = subset
+        if shared[id(candidates)] is not None:
+            subsets[key] = shared[id(candidates)]
+    return subsets or None
@@ -0,0 +1,81 @@
+"""
+Ausgabeformate des Menüplans
+'full' (Standard): bisheriges Format mit vollständigen Optionen in jedem
+Slot (bestehende Clients, Exporte und gespeicherte Pläne).
+'slim' (auf Anfrage): Slots verweisen über recipe_ids auf ein gemeinsames
+recipes-Dictionary (Rezept-ID als String -> Details wie die Optionen im
+vollen Format), jedes Rezept wird also nur einmal serialisiert.
+"""
+from typing import Dict, List
+
+OUTPUT_FORMATS = ('slim', 'full')
+DEFAULT_OUTPUT_FORMAT = 'full'
+
+
+def is_slim(plan: Dict) -> bool:
+    """Ob der Plan im slim-Format vorliegt"""
+    return isinstance(plan, dict) and plan.get('format') == 'slim'
+
+
+def slim_output(plan: Dict) -> Dict:
+    """Plan im vollen Format -> slim-Format (Tage, Statistiken etc. bleiben erhalten)"""
+    if is_slim(plan):
+        return plan
+    recipes = {}
+    days = []
+    for day in plan.get('days', []):
+        menu_lines = []
+        for ml_data in day.get('menu_lines', []):
+            slots = []
+            for meal_data in ml_data.get('recipes', []):
+                recipe_ids = []
+                for option in meal_data.get('options', []):
+                    recipes.setdefault(str(option['recipe_id']), option)
+                    recipe_ids.append(option['recipe_id'])
+                slot = {key: value for key, value in meal_data.items() if key != 'options'}
+                slot['recipe_ids'] = recipe_ids
+                slots.append(slot)
+            menu_lines.append(dict(ml_data, recipes=slots))
+        days.append(dict(day, menu_lines=menu_lines))
+    return dict(plan, format='slim', days=days, recipes=recipes)
+
+
+def expand_output(plan: Dict) -> Dict:
+    """Plan im slim-Format -> volles Format (Optionen aus dem recipes-Dictionary)"""
+    if not is_slim(plan):
+        return plan
+    days = []
+    for day in plan.get('days', []):
+        menu_lines = []
+        for ml_data in day.get('menu_lines', []):
+            slots = []
+            for meal_data in ml_data.get('recipes', []):
+                slot = {key: value for key, value in meal_data.items() if key != 'recipe_ids'}
+                slot['options'] = slot_options(plan, meal_data)
+                slots.append(slot)
+            menu_lines.append(dict(ml_data, recipes=slots))
+        days.append(dict(day, menu_lines=menu_lines))
+    expanded = {key: value for key, value in plan.items() if key not in ('format', 'recipes')}
+    expanded['days'] = days
+    return expanded
+
+
+def slot_options(plan: Dict, meal_data: Dict) -> List[Dict]:
+    """Optionen eines Slots (Rezept-Details) in beiden Formaten"""
+    if 'recipe_ids' not in meal_data:
+        return meal_data['options']
+    recipes = plan['recipes']
+    try:
+        return [recipes[str(recipe_id)] for recipe_id in meal_data['recipe_ids']]
+    except KeyError as e:
+        raise ValueError(f"Recipe {e.args[0]} missing in plan recipes")
+
+
+def shape_output(plan: Dict, output_format: str = None) -> Dict:
+    """Bringt ein Ergebnis (volles Format) in das angeforderte Ausgabeformat"""
+    output_format = output_format or DEFAULT_OUTPUT_FORMAT
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unknown output format: {output_format} (available: {', '.join(OUTPUT_FORMATS)})"
+        )
+    return slim_output(plan) if output_format == 'slim' else expand_output(plan)
@@ -0,0 +1,206 @@
+"""
+Filter-Index für Rezepte
+Kodiert Allergene, Abneigungen, Ernährungsformen und Qualitätsmerkmale
+einmal pro Katalog als Bitmasken und gruppiert die Rezepte je Menükomponente
+nach identischer Signatur. Die Hard-Constraint-Filterung prüft damit nur noch
+wenige Masken pro Gruppe statt jedes einzelne Rezept. Zusätzlich führt der
+Index je Menükomponente (inkl. Alias-Auflösung) die Zeilen aller Rezepte
+und die Saisonalität als Matrix Rezept x Monat.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Alias-Mapping für Menükomponenten
+# Ermöglicht Fallback wenn konfigurierte Komponente nicht in Rezepten existiert
+COMPONENT_ALIASES = {
+    'Zwischengang': 'Zwischenmahlzeit',
+    'Snack': 'Zwischenmahlzeit',
+    'Vorspeise': 'Mittagessen',  # Fallback für Vorspeise
+}
+
+# Qualitätsmerkmale (Rohmilch, rohe Eier, ...) als Bits
+QUALITY_FLAGS = (
+    ('contains_raw_milk', 'excludeRawMilk'),
+    ('contains_raw_eggs', 'excludeRawEggs'),
+    ('contains_raw_sausage', 'excludeRawSausage'),
+    ('contains_raw_meat', 'excludeRawMeat'),
+)
+
+# Kategorien mit Häufigkeitslimit (maxMeat, maxSweet, maxFried): Kategorie -> Rezeptattribut
+CATEGORY_FLAGS = {'meat': 'contains_meat', 'sweet': 'is_sweet', 'fried': 'is_fried'}
+
+# Nur freigegebene, aktive Rezepte werden indiziert
+RELEASED_STATUS = "Freigegeben"
+
+
+def season_matrix(recipes: List) -> np.ndarray:
+    """Saisonalität als Matrix Rezept x Monat (bool, Spalte = Monat 1-12, Spalte 0 ungenutzt)"""
+    matrix = np.zeros((len(recipes), 13), dtype=bool)
+    cells = [(row, month) for row, recipe in enumerate(recipes)
+             for month in recipe.seasonality if 1 <= month <= 12]
+    if cells:
+        matrix[tuple(np.array(cells).T)] = True
+    return matrix
+
+
+class _BitEncoder:
+    """Vergibt je Wert ein Bit und kodiert Wertelisten als Maske"""
+
+    def __init__(self):
+        self.bits: Dict[str, int] = {}
+
+    def encode(self, values: Iterable[str]) -> int:
+        mask = 0
+        for value in values:
+            mask |= 1 << self.bits.setdefault(value, len(self.bits))
+        return mask
+
+    def lookup(self, values: Iterable[str]) -> int:
+        """Maske für Konfigurationswerte (im Katalog unbekannte Werte ignorieren)"""
+        mask = 0
+        for value in values:
+            bit = self.bits.get(value)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+
+class SignatureGroup:
+    """Rezepte einer Komponente mit identischen Filtermerkmalen"""
+
+    __slots__ = ('allergens', 'aversions', 'dietary_forms', 'quality', 'group', 'rows')
+
+    def __init__(self, allergens: int, aversions: int, dietary_forms: int,
+                 quality: int, group: str):
+        self.allergens = allergens
+        self.aversions = aversions
+        self.dietary_forms = dietary_forms
+        self.quality = quality
+        self.group = group
+        self.rows = []
+
+
+class RecipeFilterIndex:
+    """Bitmasken-Index über die Hard-Constraint-Merkmale eines Katalogs.
+
+    Je Menükomponente (recipe.menu_component) liegen die Rezepte in Gruppen
+    gleicher Signatur (Allergen-, Abneigungs-, Ernährungsform- und
+    Qualitätsmaske sowie Rezeptgruppe). Zeilennummern beziehen sich auf die
+    Reihenfolge des Katalogs, damit gefilterte Listen dieselbe Reihenfolge
+    haben wie ein linearer Durchlauf.
+
+    Der Index gilt für genau eine Katalog-Liste; bei geändertem Katalog
+    (covers() liefert False) muss er neu aufgebaut werden.
+    """
+
+    def __init__(self, recipes: List):
+        self.recipes = recipes
+        self.size = len(recipes)
+        # Kosten je Portion (Recipe.portion_cost), Einheit von BKT und Tageskosten
+        self.portion_costs = np.array([r.portion_cost for r in recipes], dtype=np.float64)
+        self.category_flags: Dict[str, np.ndarray] = {
+            category: np.array([bool(getattr(r, attribute)) for r in recipes], dtype=bool)
+            for category, attribute in CATEGORY_FLAGS.items()
+        }
+        # season_months[Zeile, Monat]: Rezept ist im Monat (1-12) saisonal; Spalte 0 ungenutzt
+        self.season_months = season_matrix(recipes)
+        self.allergen_bits = _BitEncoder()
+        self.aversion_bits = _BitEncoder()
+        self.dietary_form_bits = _BitEncoder()
+
+        # Komponente -> Signatur -> Gruppe
+        signatures: Dict[str, Dict[tuple, SignatureGroup]] = {}
+        # Komponente -> Zeilen aller Rezepte (unabhängig von Status/Freigabe)
+        component_rows: Dict[str, List[int]] = {}
+        for row, recipe in enumerate(recipes):
+            component_rows.setdefault(recipe.menu_component, []).append(row)
+            if recipe.status != RELEASED_STATUS or not recipe.is_enabled:
+                continue
+            quality = 0
+            for bit, (attribute, _) in enumerate(QUALITY_FLAGS):
+                if getattr(recipe, attribute):
+                    quality |= 1 << bit
+            signature = (
+                self.allergen_bits.encode(recipe.allergens),
+                self.aversion_bits.encode(recipe.aversions),
+                self.dietary_form_bits.encode(recipe.dietary_forms),
+                quality,
+                recipe.group,
+            )
+            groups = signatures.setdefault(recipe.menu_component, {})
+            group = groups.get(signature)
+            if group is None:
+                group = groups[signature] = SignatureGroup(*signature)
+            group.rows.append(row)
+
+        self.components: Dict[str, List[SignatureGroup]] = {}
+        for component, groups in signatures.items():
+            for group in groups.values():
+                group.rows = np.array(group.rows, dtype=np.int64)
+            self.components[component] = list(groups.values())
+        self.component_rows: Dict[str, np.ndarray] = {
+            component: np.array(rows, dtype=np.int64) for component, rows in component_rows.items()
+        }
+
+    def covers(self, recipes: List) -> bool:
+        """True, wenn der Index für genau diese (unveränderte) Katalog-Liste gebaut wurde"""
+        return self.recipes is recipes and self.size == len(recipes)
+
+    @staticmethod
+    def resolve_component(component: str) -> Tuple[str, ...]:
+        """Komponente und ggf. ihr Alias-Ziel (beide Rezeptkomponenten sind zulässig)"""
+        mapped = COMPONENT_ALIASES.get(component, component)
+        return (component,) if mapped == component else (component, mapped)
+
+    def rows_for_component(self, component: str) -> np.ndarray:
+        """Zeilen aller Rezepte einer Komponente inkl. Alias-Ziel (Katalog-Reihenfolge)"""
+        parts = [self.component_rows[c] for c in self.resolve_component(component)
+                 if c in self.component_rows]
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+    def recipes_for_component(self, component: str) -> List:
+        """Alle Rezepte einer Komponente inkl. Alias-Ziel"""
+        return [self.recipes[i] for i in self.rows_for_component(component).tolist()]
+
+    def component_counts(self) -> Dict[str, int]:
+        """Anzahl Rezepte je Menükomponente (ohne Alias-Auflösung)"""
+        return {component: len(rows) for component, rows in self.component_rows.items()}
+
+    def filter_rows(self, component: str, excluded_allergens: Iterable[str] = (),
+                    excluded_aversions: Iterable[str] = (), dietary_forms: Iterable[str] = (),
+                    quality_params: Dict = None, recipe_groups: Iterable[str] = None) -> np.ndarray:
+        """Zeilen aller Rezepte der Komponente (inkl. Alias-Ziel), die die Hard
+        Constraints erfüllen.
+
+        Semantik wie bisher in MenuPlanSimulator._filter_recipes: keine
+        ausgeschlossenen Allergene/Abneigungen, mindestens eine passende
+        Ernährungsform, keine ausgeschlossenen Qualitätsmerkmale (Standard:
+        alle ausgeschlossen) und optional nur die gewählten Rezeptgruppen.
+        """
+        quality_params = quality_params or {}
+        allergen_mask = self.allergen_bits.lookup(excluded_allergens)
+        aversion_mask = self.aversion_bits.lookup(excluded_aversions)
+        dietary_mask = self.dietary_form_bits.lookup(dietary_forms)
+        quality_mask = 0
+        for bit, (_, param) in enumerate(QUALITY_FLAGS):
+            if quality_params.get(param, True):
+                quality_mask |= 1 << bit
+        allowed_groups = set(recipe_groups) if recipe_groups else None
+
+        selected = []
+        for resolved in self.resolve_component(component):
+            for group in self.components.get(resolved, ()):
+                if group.allergens & allergen_mask or group.aversions & aversion_mask:
+                    continue
+                if not group.dietary_forms & dietary_mask or group.quality & quality_mask:
+                    continue
+                if allowed_groups is not None and group.group not in allowed_groups:
+                    continue
+                selected.append(group.rows)
+
+        if not selected:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(selected))
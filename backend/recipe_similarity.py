@@ -0,0 +1,207 @@
+"""
+Ähnlichkeits-Engine für Rezepte
+Kodiert Gruppe, Kategorie und Allergene einmal pro Katalog und stellt die
+paarweise Rezept-Ähnlichkeit als NumPy-Matrix bereit
+"""
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+
+# Bis zu dieser Katalog-Größe wird die Matrix vollständig berechnet und persistiert
+DENSE_MATRIX_LIMIT = 4000
+
+# Größe eines lazy berechneten Zeilenblocks und Speicherbudget des Block-Caches
+BLOCK_BYTES = 256 * 1024
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# Gewichte der Ähnlichkeit (Gruppe, Kategorie, Allergen-Jaccard)
+GROUP_WEIGHT = 0.5
+CATEGORY_WEIGHT = 0.3
+ALLERGEN_WEIGHT = 0.2
+
+
+def similarity_fingerprint(recipes: List) -> str:
+    """Content-Hash über alle Felder, die in die Ähnlichkeit eingehen"""
+    digest = hashlib.sha256()
+    for recipe in recipes:
+        digest.update(json.dumps(
+            [recipe.id, recipe.group, recipe.category, sorted(recipe.allergens)],
+            ensure_ascii=False
+        ).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def _encode(values: List[str]) -> np.ndarray:
+    """Kodiert Strings als Integer-Codes (gleicher String = gleicher Code)"""
+    codes = {}
+    return np.array([codes.setdefault(v, len(codes)) for v in values], dtype=np.int32)
+
+
+class RecipeSimilarityEngine:
+    """Paarweise Rezept-Ähnlichkeit auf Basis kodierter Rezeptmerkmale.
+
+    Ähnlichkeit (wie bisher in MenuPlanSimulator._calculate_similarity):
+    - 1.0 bei identischer Rezept-ID
+    - sonst 0.5 * gleiche Gruppe + 0.3 * gleiche Kategorie
+      + 0.2 * Jaccard-Index der Allergene
+
+    Kleine Kataloge werden als vollständige Matrix materialisiert, große
+    Kataloge blockweise bei Bedarf berechnet (LRU-Cache über Zeilenblöcke).
+    """
+
+    def __init__(self, recipes: List, matrix: np.ndarray = None, fingerprint: str = None):
+        self.size = len(recipes)
+        self.fingerprint = fingerprint or similarity_fingerprint(recipes)
+
+        # Rezept-ID -> Zeilenindex (bei doppelten IDs gilt das erste Vorkommen)
+        self.index: Dict[int, int] = {}
+        for i, recipe in enumerate(recipes):
+            self.index.setdefault(recipe.id, i)
+
+        self.recipe_ids = np.array([r.id for r in recipes], dtype=np.int64)
+        self.group_codes = _encode([r.group for r in recipes])
+        self.category_codes = _encode([r.category for r in recipes])
+
+        # Allergene als Bitmasken (ein Bit pro Allergen im Katalog)
+        allergen_bits = {}
+        self.allergen_masks = []
+        for recipe in recipes:
+            mask = 0
+            for allergen in recipe.allergens:
+                mask |= 1 << allergen_bits.setdefault(allergen, len(allergen_bits))
+            self.allergen_masks.append(mask)
+        self.allergen_counts = np.array(
+            [mask.bit_count() for mask in self.allergen_masks], dtype=np.float64
+        )
+        self._allergen_matrix = np.zeros((self.size, len(allergen_bits)), dtype=np.float64)
+        for i, mask in enumerate(self.allergen_masks):
+            for bit in range(len(allergen_bits)):
+                if mask >> bit & 1:
+                    self._allergen_matrix[i, bit] = 1.0
+
+        self.matrix = matrix
+        if self.matrix is None and self.size <= DENSE_MATRIX_LIMIT:
+            self.matrix = self._compute_rows(0, self.size)
+
+        self._block_rows = max(1, min(256, BLOCK_BYTES // max(1, self.size * 8)))
+        self._max_blocks = max(1, MAX_CACHE_BYTES // max(1, self._block_rows * self.size * 8))
+        self._blocks = OrderedDict()
+
+    @property
+    def is_dense(self) -> bool:
+        return self.matrix is not None
+
+    def _compute_rows(self, start: int, stop: int) -> np.ndarray:
+        """Berechnet die Ähnlichkeitszeilen start..stop-1 gegen den gesamten Katalog"""
+        same_group = self.group_codes[start:stop, None] == self.group_codes[None, :]
+        same_category = self.category_codes[start:stop, None] == self.category_codes[None, :]
+
+        intersection = self._allergen_matrix[start:stop] @ self._allergen_matrix.T
+        union = self.allergen_counts[start:stop, None] + self.allergen_counts[None, :] - intersection
+        jaccard = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+        rows = GROUP_WEIGHT * same_group + CATEGORY_WEIGHT * same_category
+        rows += ALLERGEN_WEIGHT * jaccard
+        np.minimum(rows, 1.0, out=rows)
+        rows[self.recipe_ids[start:stop, None] == self.recipe_ids[None, :]] = 1.0
+        return rows
+
+    def row(self, i: int) -> np.ndarray:
+        """Ähnlichkeit von Rezept i (Zeilenindex) zu allen Rezepten des Katalogs"""
+        if self.matrix is not None:
+            return self.matrix[i]
+
+        block = i // self._block_rows
+        rows = self._blocks.get(block)
+        if rows is None:
+            start = block * self._block_rows
+            rows = self._compute_rows(start, min(self.size, start + self._block_rows))
+            self._blocks[block] = rows
+            if len(self._blocks) > self._max_blocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(block)
+        return rows[i - block * self._block_rows]
+
+    def pair(self, i: int, j: int) -> float:
+        """Ähnlichkeit zweier Rezepte (Zeilenindizes)"""
+        if self.matrix is not None:
+            return float(self.matrix[i, j])
+        if self.recipe_ids[i] == self.recipe_ids[j]:
+            return 1.0
+
+        similarity = 0.0
+        if self.group_codes[i] == self.group_codes[j]:
+            similarity += GROUP_WEIGHT
+        if self.category_codes[i] == self.category_codes[j]:
+            similarity += CATEGORY_WEIGHT
+        union = (self.allergen_masks[i] | self.allergen_masks[j]).bit_count()
+        if union:
+            intersection = (self.allergen_masks[i] & self.allergen_masks[j]).bit_count()
+            similarity += ALLERGEN_WEIGHT * (intersection / union)
+        return min(1.0, similarity)
+
+    def save(self, path: str):
+        """Persistiert die vollständige Matrix atomar (nur bei dichter Matrix)"""
+        if self.matrix is None:
+            return
+        directory = os.path.dirname(path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npy.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.asarray(self.matrix))
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def similarity_cache_path(recipes_file: str, fingerprint: str) -> str:
+    """Pfad der persistierten Matrix neben der Rezeptdatei"""
+    stem, _ = os.path.splitext(recipes_file)
+    return f"{stem}.similarity-{fingerprint[:16]}.npy"
+
+
+def load_similarity_engine(recipes: List, recipes_file: str = None) -> RecipeSimilarityEngine:
+    """Lädt die Ähnlichkeitsmatrix aus dem Cache oder berechnet und speichert sie.
+
+    Die Datei liegt neben der Rezeptdatei und ist über den Content-Hash des
+    Katalogs versioniert. Sie wird per mmap geladen, sodass sich alle
+    Gunicorn-Worker die Seiten teilen.
+    """
+    fingerprint = similarity_fingerprint(recipes)
+    if not recipes_file or len(recipes) > DENSE_MATRIX_LIMIT:
+        return RecipeSimilarityEngine(recipes, fingerprint=fingerprint)
+
+    cache_path = similarity_cache_path(recipes_file, fingerprint)
+    if os.path.exists(cache_path):
+        try:
+            matrix = np.load(cache_path, mmap_mode='r')
+            if matrix.shape == (len(recipes), len(recipes)):
+                print(f"✅ Loaded similarity matrix from {os.path.basename(cache_path)}")
+                return RecipeSimilarityEngine(recipes, matrix=matrix, fingerprint=fingerprint)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Similarity cache unreadable, rebuilding: {e}")
+
+    engine = RecipeSimilarityEngine(recipes, fingerprint=fingerprint)
+    try:
+        engine.save(cache_path)
+        print(f"✅ Saved similarity matrix to {os.path.basename(cache_path)}")
+
+        # Veraltete Matrizen anderer Katalogversionen entfernen
+        directory = os.path.dirname(cache_path) or '.'
+        prefix = os.path.basename(os.path.splitext(recipes_file)[0]) + '.similarity-'
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith('.npy') and \
+                    os.path.join(directory, name) != cache_path:
+                os.remove(os.path.join(directory, name))
+    except OSError as e:
+        print(f"⚠️ Could not persist similarity matrix: {e}")
+    return engine
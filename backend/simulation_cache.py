@@ -0,0 +1,178 @@
+"""
+Ergebnis-Cache für Simulationen
+Zwei Stufen: In-Memory-LRU pro Prozess und SQLite-Datei, die sich alle
+Gunicorn-Worker teilen. Schlüssel ist ein kanonischer Hash aus Konfiguration,
+Seed, Katalogversion und Code-Version der Simulation (ein Deploy mit
+geändertem Algorithmus liefert keine alten Pläne mehr aus).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Dict, List, Optional
+
+# Datenbank-Pfad
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'simulation_cache.db')
+
+MAX_MEMORY_ENTRIES = 64
+MAX_DISK_ENTRIES = 1000
+
+# Module, deren Code die Simulationsergebnisse bestimmt (für code_version)
+ALGORITHM_MODULES = ('simulator.py', 'recipe_index.py', 'recipe_similarity.py', 'plan_output.py')
+
+
+def catalog_version(recipes: List) -> str:
+    """Content-Hash über den vollständigen Rezeptkatalog"""
+    digest = hashlib.sha256()
+    for recipe in recipes:
+        digest.update(json.dumps(recipe.to_dict(), sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def code_version() -> str:
+    """Content-Hash über den Code der Simulationsmodule (ALGORITHM_MODULES)"""
+    digest = hashlib.sha256()
+    for module in ALGORITHM_MODULES:
+        with open(os.path.join(os.path.dirname(__file__), module), 'rb') as f:
+            digest.update(f.read())
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+class SimulationCache:
+    """Cache für Simulationsergebnisse eines Rezeptkatalogs.
+
+    Ergebnisse werden als JSON-Text abgelegt, damit Treffer stets eine
+    unabhängige Kopie liefern. Fehler der SQLite-Stufe (z.B. schreibgeschütztes
+    Dateisystem) deaktivieren nur diese Stufe.
+    """
+
+    def __init__(self, catalog_version: str, db_path: str = DB_PATH,
+                 max_memory_entries: int = MAX_MEMORY_ENTRIES,
+                 max_disk_entries: int = MAX_DISK_ENTRIES, algorithm_version: str = None):
+        self.catalog_version = catalog_version
+        self.algorithm_version = algorithm_version or code_version()
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+        self.disk_enabled = db_path is not None
+        if self.disk_enabled:
+            self._init_database()
+
+    def _get_connection(self):
+        """Erstellt Datenbankverbindung"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _init_database(self):
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = self._get_connection()
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS simulation_cache (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"⚠️ Simulation cache database unavailable: {e}")
+            self.disk_enabled = False
+
+    def make_key(self, config, seed: int) -> str:
+        """Kanonischer Hash aus SimulatorConfig-Feldern, Seed, Katalog- und Code-Version"""
+        payload = json.dumps(
+            {'config': asdict(config), 'seed': seed, 'catalog': self.catalog_version,
+             'algorithm': self.algorithm_version},
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Liefert ein gecachtes Ergebnis oder None"""
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return json.loads(text)
+
+        if self.disk_enabled:
+            try:
+                conn = self._get_connection()
+                row = conn.execute(
+                    'SELECT result FROM simulation_cache WHERE key = ?', (key,)
+                ).fetchone()
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"⚠️ Simulation cache read failed: {e}")
+                row = None
+            if row is not None:
+                with self._lock:
+                    self._remember(key, row[0])
+                    self.counters['disk_hits'] += 1
+                return json.loads(row[0])
+
+        with self._lock:
+            self.counters['misses'] += 1
+        return None
+
+    def put(self, key: str, result: Dict):
+        """Speichert ein Ergebnis in beiden Stufen"""
+        text = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, text)
+            self.counters['stores'] += 1
+
+        if self.disk_enabled:
+            try:
+                conn = self._get_connection()
+                conn.execute(
+                    'INSERT OR REPLACE INTO simulation_cache (key, result) VALUES (?, ?)',
+                    (key, text)
+                )
+                # Älteste Einträge über dem Limit entfernen
+                conn.execute('''
+                    DELETE FROM simulation_cache WHERE key NOT IN (
+                        SELECT key FROM simulation_cache ORDER BY created_at DESC LIMIT ?
+                    )
+                ''', (self.max_disk_entries,))
+                conn.commit()
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"⚠️ Simulation cache write failed: {e}")
+
+    def _remember(self, key: str, text: str):
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """Trefferzähler dieses Prozesses und Größe der Cache-Stufen"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        stats['disk_entries'] = None
+        if self.disk_enabled:
+            try:
+                conn = self._get_connection()
+                stats['disk_entries'] = conn.execute('SELECT COUNT(*) FROM simulation_cache').fetchone()[0]
+                conn.close()
+            except sqlite3.Error:
+                pass
+        stats['catalog_version'] = self.catalog_version[:16]
+        stats['algorithm_version'] = self.algorithm_version[:16]
+        return stats
@@ -0,0 +1,232 @@
+"""
+Asynchrone Simulations-Jobs
+Jobs laufen in einem begrenzten Thread-Pool des Prozesses, der sie
+angenommen hat. Status, Fortschritt und Ergebnis liegen in SQLite, damit jeder
+Gunicorn-Worker Abfragen beantworten und Abbrüche entgegennehmen kann.
+Aus Job-Threads wird nie geforkt (siehe fork_pool): Multi-Start, Zerlegung
+und Batch eines Jobs laufen nacheinander im Job-Thread. Ein Abbruch greift
+über den Fortschritts-Callback beim nächsten Fortschritt.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+# Datenbank-Pfad
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'simulation_jobs.db')
+
+MAX_WORKERS = 2
+MAX_PENDING_JOBS = 16
+# Fortschritt höchstens so oft (Sekunden) in die Datenbank schreiben
+PROGRESS_WRITE_INTERVAL = 0.5
+# Abgeschlossene Jobs werden nach dieser Zeit (Sekunden) entfernt
+JOB_RETENTION_SECONDS = 24 * 3600
+
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+class SimulationCancelled(Exception):
+    """Wird im Fortschritts-Callback ausgelöst, um einen laufenden Job abzubrechen"""
+
+
+class SimulationJobManager:
+    """Nimmt Simulations-Jobs an, führt sie im Hintergrund aus und verwaltet ihren Status.
+
+    run_job(config, seed, progress_callback) führt die eigentliche Simulation
+    aus und liefert das Ergebnis-Dictionary. progress_callback(phase, progress)
+    schreibt den Fortschritt (gedrosselt) in die Datenbank und löst
+    SimulationCancelled aus, sobald ein Abbruch angefordert wurde.
+    """
+
+    def __init__(self, run_job: Callable[[Dict, Optional[int], Callable], Dict],
+                 db_path: str = DB_PATH, max_workers: int = MAX_WORKERS,
+                 max_pending: int = MAX_PENDING_JOBS):
+        self.run_job = run_job
+        self.db_path = db_path
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='simulation-job')
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._cancel_events = {}
+        self._init_database()
+
+    def _get_connection(self):
+        """Erstellt Datenbankverbindung"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _init_database(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = self._get_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS simulation_jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                phase TEXT,
+                progress INTEGER DEFAULT 0,
+                config TEXT NOT NULL,
+                seed INTEGER,
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER DEFAULT 0,
+                owner_pid INTEGER,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def _update(self, job_id: str, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        conn = self._get_connection()
+        conn.execute(f'UPDATE simulation_jobs SET {assignments} WHERE id = ?',
+                     (*fields.values(), job_id))
+        conn.commit()
+        conn.close()
+
+    def submit(self, config: Dict, seed: int = None) -> str:
+        """Legt einen Job an und reiht ihn in den Pool ein; liefert die Job-ID"""
+        with self._lock:
+            if len(self._futures) >= self.max_pending:
+                raise ValueError(f"Too many pending simulation jobs (max {self.max_pending})")
+
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            conn = self._get_connection()
+            conn.execute(
+                'DELETE FROM simulation_jobs WHERE status IN (?, ?, ?) AND updated_at < ?',
+                (*FINISHED_STATUSES, now - JOB_RETENTION_SECONDS)
+            )
+            conn.execute('''
+                INSERT INTO simulation_jobs
+                    (id, status, phase, progress, config, seed, owner_pid, created_at, updated_at)
+                VALUES (?, 'queued', 'queued', 0, ?, ?, ?, ?, ?)
+            ''', (job_id, json.dumps(config, ensure_ascii=False), seed, os.getpid(), now, now))
+            conn.commit()
+            conn.close()
+
+            self._cancel_events[job_id] = threading.Event()
+            self._futures[job_id] = self._executor.submit(self._run, job_id, config, seed)
+        return job_id
+
+    def _run(self, job_id: str, config: Dict, seed: Optional[int]):
+        cancel_event = self._cancel_events[job_id]
+        try:
+            if cancel_event.is_set():
+                raise SimulationCancelled()
+            self._update(job_id, status='running', phase='initializing')
+            result = self.run_job(config, seed, self._progress_callback(job_id, cancel_event))
+            self._update(job_id, status='completed', phase='completed', progress=100,
+                         result=json.dumps(result, ensure_ascii=False))
+        except SimulationCancelled:
+            self._update(job_id, status='cancelled')
+            print(f"⏹️  Simulation job {job_id} cancelled")
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self._update(job_id, status='failed', error=str(e))
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._cancel_events.pop(job_id, None)
+
+    def _progress_callback(self, job_id: str, cancel_event: threading.Event) -> Callable:
+        """Fortschritts-Callback für MenuPlanSimulator (gedrosselte Datenbank-Schreibzugriffe)"""
+        state = {'phase': None, 'written_at': 0.0}
+
+        def report(phase: str, progress: int):
+            if cancel_event.is_set():
+                raise SimulationCancelled()
+            now = time.monotonic()
+            if phase == state['phase'] and now - state['written_at'] < PROGRESS_WRITE_INTERVAL:
+                return
+            state['phase'], state['written_at'] = phase, now
+
+            # Fortschritt schreiben und Abbruchwunsch anderer Worker lesen
+            conn = self._get_connection()
+            conn.execute(
+                'UPDATE simulation_jobs SET phase = ?, progress = ?, updated_at = ? WHERE id = ?',
+                (phase, progress, time.time(), job_id)
+            )
+            row = conn.execute(
+                'SELECT cancel_requested FROM simulation_jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+            conn.commit()
+            conn.close()
+            if row is not None and row['cancel_requested']:
+                cancel_event.set()
+                raise SimulationCancelled()
+
+        return report
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Status, Phase und Fortschritt eines Jobs (mit Ergebnis, wenn abgeschlossen)"""
+        conn = self._get_connection()
+        row = conn.execute('SELECT * FROM simulation_jobs WHERE id = ?', (job_id,)).fetchone()
+        conn.close()
+        if row is None:
+            return None
+
+        status = row['status']
+        if status not in FINISHED_STATUSES and not _process_alive(row['owner_pid']):
+            # Der ausführende Worker-Prozess existiert nicht mehr
+            status = 'failed'
+            self._update(job_id, status=status, error='Worker process terminated')
+
+        job = {
+            'id': row['id'],
+            'status': status,
+            'phase': row['phase'],
+            'progress': row['progress'],
+            'cancel_requested': bool(row['cancel_requested']),
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+        }
+        if status == 'failed':
+            job['error'] = row['error'] or 'Worker process terminated'
+        if status == 'completed' and row['result'] is not None:
+            job['result'] = json.loads(row['result'])
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Fordert den Abbruch an; liefert den Job-Status oder None, wenn unbekannt"""
+        job = self.get(job_id)
+        if job is None or job['status'] in FINISHED_STATUSES:
+            return job
+
+        with self._lock:
+            cancel_event = self._cancel_events.get(job_id)
+            future = self._futures.get(job_id)
+        if cancel_event is not None:
+            cancel_event.set()
+        if future is not None and future.cancel():
+            # Noch nicht gestartet: direkt als abgebrochen markieren
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._cancel_events.pop(job_id, None)
+            self._update(job_id, status='cancelled', cancel_requested=1)
+        else:
+            # Läuft (ggf. in einem anderen Worker): wird beim nächsten Fortschritt abgebrochen
+            self._update(job_id, cancel_requested=1)
+        return self.get(job_id)
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,110 @@
+"""
+Laufzeit-Messung der Simulation
+Erfasst je Lauf die Wall-Time der Phasen (Filterung, Machbarkeit, Greedy,
+Local Search, Validierung, Formatierung) und Zähler (Kandidaten,
+Score-Auswertungen, akzeptierte/verworfene Züge, Cache-Treffer). Ein Lauf
+liefert die Daten als statistics.performance; zusätzlich werden sie je
+Prozess aufsummiert (z.B. je Gunicorn-Worker).
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict
+
+
+class SimulationMetrics:
+    """Phasenzeiten (ms) und Zähler eines Simulationslaufs"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = defaultdict(float)
+        self.counters = defaultdict(int)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Misst die Wall-Time eines Blocks; mehrfach gemessene Phasen werden summiert"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float):
+        self.phases[name] += seconds * 1000.0
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] += int(value)
+
+    def merge(self, performance: Dict):
+        """Übernimmt Phasen und Zähler eines anderen Laufs (z.B. Multi-Start-Worker)"""
+        for name, ms in performance.get('phases_ms', {}).items():
+            self.phases[name] += ms
+        for name, value in performance.get('counters', {}).items():
+            self.counters[name] += value
+
+    def to_dict(self) -> Dict:
+        return {
+            'total_ms': round((time.perf_counter() - self.started) * 1000.0, 2),
+            'phases_ms': {name: round(ms, 2) for name, ms in self.phases.items()},
+            'counters': dict(self.counters),
+        }
+
+
+class ProcessMetrics:
+    """Aufsummierte Performance-Daten aller Läufe dieses Prozesses (thread-sicher)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.runs = 0
+            self.total_ms = 0.0
+            self.max_total_ms = 0.0
+            self.phases = defaultdict(lambda: {'total_ms': 0.0, 'max_ms': 0.0, 'runs': 0})
+            self.counters = defaultdict(int)
+            self.since = time.time()
+
+    def record(self, performance: Dict):
+        """Übernimmt den performance-Block eines Laufs"""
+        if not performance:
+            return
+        with self._lock:
+            self.runs += 1
+            total_ms = performance.get('total_ms', 0.0)
+            self.total_ms += total_ms
+            self.max_total_ms = max(self.max_total_ms, total_ms)
+            for name, ms in performance.get('phases_ms', {}).items():
+                phase = self.phases[name]
+                phase['total_ms'] += ms
+                phase['max_ms'] = max(phase['max_ms'], ms)
+                phase['runs'] += 1
+            for name, value in performance.get('counters', {}).items():
+                self.counters[name] += value
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'since': self.since,
+                'runs': self.runs,
+                'total_ms': round(self.total_ms, 2),
+                'mean_total_ms': round(self.total_ms / self.runs, 2) if self.runs else 0.0,
+                'max_total_ms': round(self.max_total_ms, 2),
+                'phases_ms': {
+                    name: {
+                        'total': round(phase['total_ms'], 2),
+                        'mean': round(phase['total_ms'] / phase['runs'], 2),
+                        'max': round(phase['max_ms'], 2),
+                    }
+                    for name, phase in self.phases.items()
+                },
+                'counters': dict(self.counters),
+            }
+
+
+# Aggregat dieses Prozesses
+PROCESS_METRICS = ProcessMetrics()
@@ -3,72 +3,303 @@ Menüplansimulator - Kern-Algorithmus
 """
 import json
 import math
+import os
 import random
+import sys
+import time
+from array import array
+from bisect import bisect_left, insort
 from datetime import date, timedelta
+from itertools import combinations
 from typing import Dict, List, Set, Tuple
-from collections import defaultdict
-from dataclasses import dataclass, asdict
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from functools import lru_cache
 
-# Alias-Mapping für Menükomponenten
-# Ermöglicht Fallback wenn konfigurierte Komponente nicht in Rezepten existiert
-COMPONENT_ALIASES = {
-    'Zwischengang': 'Zwischenmahlzeit',
-    'Snack': 'Zwischenmahlzeit',
-    'Vorspeise': 'Mittagessen',  # Fallback für Vorspeise
-}
+import numpy as np
+
+try:
+    from backend.recipe_similarity import RecipeSimilarityEngine
+    from backend.recipe_index import (RecipeFilterIndex, COMPONENT_ALIASES, QUALITY_FLAGS,
+                                      CATEGORY_FLAGS, season_matrix)
+    from backend.simulation_metrics import SimulationMetrics, PROCESS_METRICS
+    from backend.plan_output import expand_output
+    from backend.fork_pool import run_forked, fork_available, check_cancelled, WorkerCancelled
+except ImportError:
+    # Fallback für lokale Ausführung
+    from recipe_similarity import RecipeSimilarityEngine
+    from recipe_index import (RecipeFilterIndex, COMPONENT_ALIASES, QUALITY_FLAGS,
+                              CATEGORY_FLAGS, season_matrix)
+    from simulation_metrics import SimulationMetrics, PROCESS_METRICS
+    from plan_output import expand_output
+    from fork_pool import run_forked, fork_available, check_cancelled, WorkerCancelled
+
+# Häufigkeitslimits je Kategorie (simulation_params.variety)
+FREQUENCY_LIMIT_PARAMS = {'meat': 'maxMeat', 'sweet': 'maxSweet', 'fried': 'maxFried'}
+
+# Constraint-Vorprüfung: Hall-Bedingung über alle Teilmengen bis zu so vielen
+# überlappenden Komponenten-Gruppen (darüber nur Einzelgruppen und Gesamtheit)
+PRECHECK_MAX_SUBSET_GROUPS = 10
+
+# Anzahl der zurückliegenden Tage, die in den Vielfalts-Score eingehen
+SIMILARITY_LOOKBACK_DAYS = 7
+
+# Iterationsbudget der Local Search (Züge werden inkrementell bewertet):
+# je verschiebbarem Slot so viele Züge, mindestens LOCAL_SEARCH_MIN_ITERATIONS,
+# höchstens LOCAL_SEARCH_ITERATIONS
+LOCAL_SEARCH_MOVES_PER_SLOT = 15
+LOCAL_SEARCH_MIN_ITERATIONS = 500
+LOCAL_SEARCH_ITERATIONS = 20000
+# Warm-Start: Budget anteilig zu den neu konstruierten Slots, mindestens so viele
+WARM_START_MIN_ITERATIONS = 2000
+
+# Anytime-Optimierung (zeitbudgetiert): Strategien und deren Parameter
+OPTIMIZATION_STRATEGIES = ('annealing', 'tabu')
+ANNEALING_FINAL_TEMPERATURE_RATIO = 1e-3
+TABU_TENURE = 15
+TABU_SAMPLE_SIZE = 20
+# Zeitbudget gilt für die gesamte Plan-Generierung: geschätzte Dauer je Slot
+# für Formatierung bzw. BKT-Reparatur und Formatierung (Sekunden); um diese
+# Reserve endet die Optimierung früher (höchstens um das halbe Budget)
+FORMAT_SECONDS_PER_SLOT = 2e-5
+FINALIZE_SECONDS_PER_SLOT = 6e-5
+
+# Multi-Start: Rauschen auf den Greedy-Scores für weitere Starts (Diversifikation)
+MULTI_START_GREEDY_NOISE = 0.02
+
+# Häufigkeitslimits ab diesem Wert gelten als unbegrenzt (Standard 999)
+UNLIMITED_FREQUENCY = 999
+
+# Anzahl prozessweit zwischengespeicherter Kalender (je Planungszeitraum)
+PLAN_CALENDAR_CACHE_SIZE = 64
+
+# Mehrziel-Modus: Ziele (je Pool auf [0, 1] normiert, 1 = am besten) und
+# Gewicht der Ziel-Summe im Greedy-Score (siehe MenuPlanSimulator.objective_weights)
+PLAN_OBJECTIVES = ('cost', 'co2', 'popularity')
+OBJECTIVE_SCORE_WEIGHT = 1.0
+
+
+def _shared_tuple(values, pool: Dict) -> tuple:
+    """Kanonisches, katalogweit geteiltes Tupel (Strings interniert)"""
+    if not values:
+        return ()
+    key = tuple(sys.intern(v) if isinstance(v, str) else v for v in values)
+    return pool.setdefault(key, key)
+
+
+def _shared_str(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+# Prozessweiter Pool der geteilten Tupel (Allergene, Kostformen, Saisonalität, ...)
+_SHARED_TUPLES: Dict[tuple, tuple] = {}
 
 
-@dataclass
 class Recipe:
-    id: int
-    name: str
-    cost: float
-    allergens: List[str]
-    dietary_forms: List[str]
-    category: str
-    group: str
-    menu_component: str
-    seasonality: List[int]
-    popularity: int
-    nutritional_values: Dict[str, float]
-    is_enabled: bool
-    status: str
-    calculation_basis: int
-    processing_time: float
-    ingredients: List[Dict]
-    # Optionale neue Felder
-    additives: List[str] = None
-    aversions: List[str] = None
-    description: str = ""
-    portion_size: str = "1 Portion"
-    
-    # NEU: Kategorien für Häufigkeitsbeschränkungen
-    contains_meat: bool = False
-    is_sweet: bool = False
-    is_fried: bool = False
-    is_whole_grain: bool = False
-    
-    # NEU: Qualitätsmerkmale
-    contains_raw_milk: bool = False
-    contains_raw_eggs: bool = False
-    contains_raw_sausage: bool = False
-    contains_raw_meat: bool = False
-    
-    # NEU: Menülinie & Garmethode (Version 1.1.5)
-    menu_line: str = ""
-    cooking_method: str = ""
-    
-    # NEU: Nachhaltigkeitsdaten (Version 1.1.5)
-    is_regional: bool = False
-    is_organic: bool = False
-    co2_per_portion: float = 0.0
-    
-    def __post_init__(self):
-        # Setze Defaults für optionale Felder
-        if self.additives is None:
-            self.additives = []
-        if self.aversions is None:
-            self.aversions = []
+    """Rezept mit kompakter Speicherdarstellung.
+
+    Verhält sich wie die frühere Dataclass (gleiche Felder, Reihenfolge und
+    Defaults, Recipe(**dict) funktioniert), speichert aber über __slots__ ohne
+    Instanz-Dictionary. Kategorien, Gruppen und Komponenten sind internierte
+    Strings, Listenfelder geteilte Tupel. Zutaten liegen bei Rezepten aus
+    load_recipes_from_file spaltenweise im RecipeCatalog und werden beim
+    Zugriff auf recipe.ingredients als Liste von Dictionaries geliefert.
+    """
+
+    FIELDS = (
+        'id', 'name', 'cost', 'allergens', 'dietary_forms', 'category', 'group',
+        'menu_component', 'seasonality', 'popularity', 'nutritional_values',
+        'is_enabled', 'status', 'calculation_basis', 'processing_time', 'ingredients',
+        'additives', 'aversions', 'description', 'portion_size',
+        'contains_meat', 'is_sweet', 'is_fried', 'is_whole_grain',
+        'contains_raw_milk', 'contains_raw_eggs', 'contains_raw_sausage', 'contains_raw_meat',
+        'menu_line', 'cooking_method', 'is_regional', 'is_organic', 'co2_per_portion',
+    )
+
+    __slots__ = tuple(f for f in FIELDS if f != 'ingredients') + (
+        '_ingredients', '_catalog', '_ingredient_start', '_ingredient_stop',
+    )
+
+    def __init__(self, id: int, name: str, cost: float, allergens: List[str],
+                 dietary_forms: List[str], category: str, group: str,
+                 menu_component: str, seasonality: List[int], popularity: int,
+                 nutritional_values: Dict[str, float], is_enabled: bool, status: str,
+                 calculation_basis: int, processing_time: float, ingredients: List[Dict],
+                 # Optionale neue Felder
+                 additives: List[str] = None, aversions: List[str] = None,
+                 description: str = "", portion_size: str = "1 Portion",
+                 # NEU: Kategorien für Häufigkeitsbeschränkungen
+                 contains_meat: bool = False, is_sweet: bool = False,
+                 is_fried: bool = False, is_whole_grain: bool = False,
+                 # NEU: Qualitätsmerkmale
+                 contains_raw_milk: bool = False, contains_raw_eggs: bool = False,
+                 contains_raw_sausage: bool = False, contains_raw_meat: bool = False,
+                 # NEU: Menülinie & Garmethode (Version 1.1.5)
+                 menu_line: str = "", cooking_method: str = "",
+                 # NEU: Nachhaltigkeitsdaten (Version 1.1.5)
+                 is_regional: bool = False, is_organic: bool = False,
+                 co2_per_portion: float = 0.0):
+        self.id = id
+        self.name = name
+        self.cost = cost
+        self.allergens = _shared_tuple(allergens, _SHARED_TUPLES)
+        self.dietary_forms = _shared_tuple(dietary_forms, _SHARED_TUPLES)
+        self.category = _shared_str(category)
+        self.group = _shared_str(group)
+        self.menu_component = _shared_str(menu_component)
+        self.seasonality = _shared_tuple(seasonality, _SHARED_TUPLES)
+        self.popularity = popularity
+        self.nutritional_values = nutritional_values
+        self.is_enabled = is_enabled
+        self.status = _shared_str(status)
+        self.calculation_basis = calculation_basis
+        self.processing_time = processing_time
+        self.ingredients = ingredients
+        self.additives = _shared_tuple(additives, _SHARED_TUPLES)
+        self.aversions = _shared_tuple(aversions, _SHARED_TUPLES)
+        self.description = description
+        self.portion_size = _shared_str(portion_size)
+        self.contains_meat = contains_meat
+        self.is_sweet = is_sweet
+        self.is_fried = is_fried
+        self.is_whole_grain = is_whole_grain
+        self.contains_raw_milk = contains_raw_milk
+        self.contains_raw_eggs = contains_raw_eggs
+        self.contains_raw_sausage = contains_raw_sausage
+        self.contains_raw_meat = contains_raw_meat
+        self.menu_line = _shared_str(menu_line)
+        self.cooking_method = _shared_str(cooking_method)
+        self.is_regional = is_regional
+        self.is_organic = is_organic
+        self.co2_per_portion = co2_per_portion
+
+    @property
+    def ingredients(self) -> List[Dict]:
+        """Zutaten als Liste von Dictionaries (bei Katalog-Rezepten frisch erzeugt)"""
+        if self._catalog is not None:
+            return self._catalog.ingredient_rows(self._ingredient_start, self._ingredient_stop)
+        return self._ingredients
+
+    @ingredients.setter
+    def ingredients(self, value: List[Dict]):
+        self._ingredients = value
+        self._catalog = None
+        self._ingredient_start = self._ingredient_stop = 0
+
+    @property
+    def portion_cost(self) -> float:
+        """Kosten je Portion (cost bezieht sich auf calculation_basis Portionen);
+        Einheit von BKT und Tageskosten im Plan"""
+        return self.cost / (self.calculation_basis if self.calculation_basis > 0 else 1)
+
+    def _attach(self, catalog: 'RecipeCatalog', start: int, stop: int):
+        """Verweist die Zutaten auf den Zeilenbereich start..stop-1 des Katalogs"""
+        self._ingredients = None
+        self._catalog = catalog
+        self._ingredient_start = start
+        self._ingredient_stop = stop
+
+    def to_dict(self) -> Dict:
+        """Alle Felder als Dictionary (entspricht dem früheren asdict)"""
+        result = {}
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            if isinstance(value, tuple):
+                value = list(value)
+            elif isinstance(value, dict):
+                value = dict(value)
+            elif isinstance(value, list):
+                value = [dict(v) if isinstance(v, dict) else v for v in value]
+            result[field] = value
+        return result
+
+    def __reduce__(self):
+        # Ohne Katalogverweis serialisieren (sonst würde der ganze Katalog mitgepickelt)
+        return (_recipe_from_dict, (self.to_dict(),))
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Recipe(id={self.id!r}, name={self.name!r}, menu_component={self.menu_component!r})"
+
+
+def _recipe_from_dict(data: Dict) -> Recipe:
+    return Recipe(**data)
+
+
+class RecipeCatalog(list):
+    """Rezeptkatalog mit spaltenweiser Zutatentabelle.
+
+    Verhält sich wie die bisherige Liste von Rezepten. Die Zutaten aller
+    Rezepte liegen einmal pro Katalog in Spalten (array bei einheitlich
+    int/float, sonst Liste mit internierten Strings); jedes Rezept kennt nur
+    seinen Zeilenbereich. Typen und Schlüsselreihenfolge der Zutaten bleiben
+    erhalten.
+    """
+
+    def __init__(self, recipe_dicts: List[Dict] = ()):
+        super().__init__()
+        self.ingredient_columns: Dict[str, object] = {}
+        # Pro Zeile das (geteilte) Schlüssel-Tupel, falls Zutaten unterschiedliche Felder haben
+        self._row_keys: List[tuple] = []
+        self._key_pool: Dict[tuple, tuple] = {}
+        self._ingredient_count = 0
+
+        columns: Dict[str, List] = {}
+        for data in recipe_dicts:
+            data = dict(data)
+            ingredients = data.pop('ingredients', None) or []
+            recipe = Recipe(ingredients=None, **data)
+            start = self._ingredient_count
+            for ingredient in ingredients:
+                keys = tuple(sys.intern(k) for k in ingredient)
+                keys = self._key_pool.setdefault(keys, keys)
+                self._row_keys.append(keys)
+                for key in keys:
+                    column = columns.get(key)
+                    if column is None:
+                        column = columns[key] = [None] * self._ingredient_count
+                    column.append(_shared_str(ingredient[key]))
+                for key, column in columns.items():
+                    if len(column) <= self._ingredient_count:
+                        column.append(None)
+                self._ingredient_count += 1
+            recipe._attach(self, start, self._ingredient_count)
+            self.append(recipe)
+
+        for key, values in columns.items():
+            self.ingredient_columns[key] = self._compact_column(values)
+        # Einheitliches Schema: Schlüssel-Tupel nur einmal halten
+        if len(self._key_pool) == 1:
+            self._row_keys = next(iter(self._key_pool))
+        del self._key_pool
+
+    @staticmethod
+    def _compact_column(values: List):
+        """Typisiertes array für reine int-/float-Spalten, sonst die Liste selbst"""
+        if values and all(type(v) is int for v in values):
+            try:
+                return array('q', values)
+            except OverflowError:
+                return values
+        if values and all(type(v) is float for v in values):
+            return array('d', values)
+        return values
+
+    def ingredient_rows(self, start: int, stop: int) -> List[Dict]:
+        """Materialisiert die Zutaten-Zeilen start..stop-1 als Dictionaries"""
+        columns = self.ingredient_columns
+        uniform = isinstance(self._row_keys, tuple)
+        rows = []
+        for i in range(start, stop):
+            keys = self._row_keys if uniform else self._row_keys[i]
+            rows.append({key: columns[key][i] for key in keys})
+        return rows
 
 
 @dataclass
@@ -94,9 +325,7 @@ class MealSlot:
         if not self.selected:
             return 0.0
         # Kosten basierend auf Portionen berechnen
-        base_cost = self.selected.cost
-        calculation_basis = self.selected.calculation_basis if self.selected.calculation_basis > 0 else 1
-        return (base_cost / calculation_basis) * self.portions
+        return self.selected.portion_cost * self.portions
     
     @property
     def id(self) -> int:
@@ -111,13 +340,463 @@ class MealSlot:
     def to_dict(self):
         """Konvertiert MealSlot zu Dictionary für JSON-Serialisierung."""
         return {
-            'options': [asdict(r) for r in self.options],
+            'options': [r.to_dict() for r in self.options],
             'selected_index': self.selected_index,
-            'selected': asdict(self.selected) if self.selected else None,
+            'selected': self.selected.to_dict() if self.selected else None,
             'portions': self.portions  # NEU: Portionen hinzufügen
         }
 
 
+class RecentRecipeWindow:
+    """Rollierendes Fenster der zuletzt ausgewählten Rezepte.
+    
+    Hält pro Datum die ausgewählten Rezepte der letzten N Tage und deren
+    aufsummierte Ähnlichkeitszeilen. Die Summe über das Fenster liefert für
+    jedes Rezept des Katalogs die Ähnlichkeit zu allen Slots der letzten Tage,
+    ohne den Plan zu durchsuchen.
+    """
+    
+    def __init__(self, similarity: RecipeSimilarityEngine,
+                 days: int = SIMILARITY_LOOKBACK_DAYS):
+        self.similarity = similarity
+        self.days = days
+        self.entries = deque()  # (Datum, [Rezepte], Ähnlichkeitssumme des Tages)
+        self.slot_count = 0
+        self.similarity_sums = np.zeros(similarity.size)
+    
+    def advance_to(self, current_date: date):
+        """Entfernt alle Tage, die nicht mehr im Fenster vor current_date liegen"""
+        removed = False
+        while self.entries and (current_date - self.entries[0][0]).days > self.days:
+            _, recipes, _ = self.entries.popleft()
+            self.slot_count -= len(recipes)
+            removed = True
+        if removed:
+            # Neu aufsummieren statt subtrahieren (keine Rundungsdrift)
+            self.similarity_sums = np.zeros(self.similarity.size)
+            for _, _, day_sums in self.entries:
+                self.similarity_sums += day_sums
+    
+    def push_day(self, day: date, recipes: List['Recipe']):
+        """Übernimmt die ausgewählten Rezepte eines abgeschlossenen Tages"""
+        day_sums = np.zeros(self.similarity.size)
+        for recipe in recipes:
+            day_sums += self.similarity.row(self.similarity.index[recipe.id])
+        self.entries.append((day, list(recipes), day_sums))
+        self.slot_count += len(recipes)
+        self.similarity_sums += day_sums
+    
+    def mean_similarity(self, recipe: 'Recipe') -> float:
+        """Mittlere Ähnlichkeit (siehe _calculate_similarity) zu allen Slots im Fenster"""
+        if self.slot_count <= 0:
+            return 0.0
+        return float(self.similarity_sums[self.similarity.index[recipe.id]]) / self.slot_count
+
+
+# Platzhalter für "kein Einsatz" im Einsatztag-Array (Ordinaltage)
+NO_USE_DISTANCE = 10 ** 9
+
+# Bits in GreedyState.blocked: Rezept liegt im Abstand minRepetition bzw.
+# repetition_interval zu einem Einsatz
+BLOCKED_MIN_REPETITION = 1
+BLOCKED_REPETITION_INTERVAL = 2
+
+
+class GreedyState:
+    """Zustand des Greedy-Konstruktors über die bereits geplanten Tage.
+    
+    Nutzungszähler, letzter Einsatztag (Ordinaltag) und Sperr-Bits je Rezept
+    sind über die Zeilen der Ähnlichkeitsmatrix indiziert. Ein Einsatz sperrt
+    das Rezept für die Länge des jeweiligen Wiederholungsabstands; Sperren
+    laufen über einen Ringpuffer (ein Eintrag je Tag) aus, sodass die
+    Wiederholungsprüfung je Slot eine einzige Maskenoperation ist,
+    unabhängig vom Planungshorizont. Beim Re-Planning werden Einsätze nach
+    dem aktuellen Tag (Tage nach dem Fenster, fixierte Slots) über
+    activations rechtzeitig vorher gesperrt.
+    """
+    
+    def __init__(self, similarity: RecipeSimilarityEngine, min_repetition: int = 7,
+                 repetition_interval: int = 7):
+        self.recent_window = RecentRecipeWindow(similarity)
+        self.usage_counts = np.zeros(similarity.size, dtype=np.int64)
+        self.last_used_day = np.full(similarity.size, -NO_USE_DISTANCE, dtype=np.int64)
+        # Abstand <= 0 sperrt nicht
+        self.windows = tuple(
+            (bit, math.ceil(length)) for bit, length in (
+                (BLOCKED_MIN_REPETITION, min_repetition),
+                (BLOCKED_REPETITION_INTERVAL, repetition_interval),
+            ) if length > 0
+        )
+        self.blocked = np.zeros(similarity.size, dtype=np.uint8)
+        self.block_counts = {bit: np.zeros(similarity.size, dtype=np.int32) for bit, _ in self.windows}
+        # Auslaufende Sperren (Zeile, Bit) je Tag; Sperren liegen höchstens
+        # zwei Abstände in der Zukunft (Re-Planning), daher diese Ringgröße
+        self.expiry_ring = [[] for _ in range(2 * max([0] + [n for _, n in self.windows]) + 1)]
+        # Tag -> [(Zeile, Bit, Ablauftag)]: künftig zu setzende Sperren
+        self.activations = defaultdict(list)
+        self.day = None
+        self.category_counts = {
+            'meat': 0,
+            'sweet': 0,
+            'fried': 0
+        }
+    
+    def advance_to(self, day: int):
+        """Lässt Sperren bis einschließlich day auslaufen bzw. wirksam werden"""
+        if self.day is not None:
+            for current in range(self.day + 1, day + 1):
+                self.day = current
+                bucket = self.expiry_ring[current % len(self.expiry_ring)]
+                for row, bit in bucket:
+                    counts = self.block_counts[bit]
+                    counts[row] -= 1
+                    if counts[row] == 0:
+                        self.blocked[row] &= 0xFF ^ bit
+                bucket.clear()
+                for row, bit, until in self.activations.pop(current, ()):
+                    self.block(row, bit, until)
+        self.day = day
+    
+    def block(self, row: int, bit: int, until: int):
+        """Sperrt die Zeile für das Bit bis ausschließlich Ordinaltag until"""
+        if until <= self.day:
+            return
+        self.block_counts[bit][row] += 1
+        self.blocked[row] |= bit
+        self.expiry_ring[until % len(self.expiry_ring)].append((row, bit))
+    
+    def count(self, recipe: 'Recipe', row: int):
+        """Zählt einen Einsatz für Vielfalt und Kategorie-Limits"""
+        self.usage_counts[row] += 1
+        if recipe.contains_meat:
+            self.category_counts['meat'] += 1
+        if recipe.is_sweet:
+            self.category_counts['sweet'] += 1
+        if recipe.is_fried:
+            self.category_counts['fried'] += 1
+    
+    def use(self, day: int, recipe: 'Recipe', row: int):
+        """Übernimmt das ausgewählte Rezept eines Slots am Ordinaltag day (= aktueller Tag)"""
+        self.count(recipe, row)
+        self.last_used_day[row] = day
+        for bit, length in self.windows:
+            self.block(row, bit, day + length)
+    
+    def block_upcoming(self, row: int, use_day: int, last_day: int):
+        """Re-Planning: Einsatz an einem späteren Tag use_day sperrt die Tage
+        davor im jeweiligen Abstand (bis höchstens last_day)"""
+        for bit, length in self.windows:
+            start = use_day - length + 1
+            if start <= self.day:
+                self.block(row, bit, use_day + length)
+            elif start <= last_day:
+                self.activations[start].append((row, bit, use_day + length))
+
+
+class CandidatePool:
+    """Struct-of-Arrays-Sicht auf die Kandidaten eines Slots (menu_line, cost_form).
+    
+    Statische Rezeptmerkmale liegen als NumPy-Arrays vor, damit alle
+    Kandidaten eines Slots in einem Durchgang bewertet werden können.
+    `rows` verweist auf die Zeilen der Ähnlichkeitsmatrix und indiziert
+    zugleich die Nutzungs-Arrays des Greedy-Konstruktors. season_months ist
+    die Matrix Rezept x Monat des Katalogs (RecipeFilterIndex.season_months,
+    gleiche Zeilen); ohne sie wird sie aus den Rezepten des Pools gebildet.
+    """
+    
+    def __init__(self, recipes: List['Recipe'], similarity: RecipeSimilarityEngine,
+                 season_months: np.ndarray = None):
+        self.recipes = recipes
+        self.rows = np.array([similarity.index[r.id] for r in recipes], dtype=np.int64)
+        # Kosten je Portion, wie MealSlot.cost und BKT
+        self.cost = np.array([r.portion_cost for r in recipes], dtype=np.float64)
+        self.popularity = np.array([r.popularity for r in recipes], dtype=np.float64)
+        self.calories = np.array(
+            [r.nutritional_values.get('calories', 600) for r in recipes], dtype=np.float64
+        )
+        self.co2 = np.array([r.co2_per_portion for r in recipes], dtype=np.float64)
+        self._objective_terms = None
+        # in_season[m, i]: Kandidat i ist im Monat m saisonal (zeilenweise je Monat)
+        season_months = season_matrix(recipes) if season_months is None else season_months[self.rows]
+        self.in_season = np.ascontiguousarray(season_months.T)
+        self.contains_meat = np.array([r.contains_meat for r in recipes], dtype=bool)
+        self.is_sweet = np.array([r.is_sweet for r in recipes], dtype=bool)
+        self.is_fried = np.array([r.is_fried for r in recipes], dtype=bool)
+        # Bit i gesetzt = Rezept gehört zur i-ten Kategorie in CATEGORY_FLAGS
+        self.category_bits = np.zeros(len(recipes), dtype=np.uint8)
+        for bit, flags in enumerate((self.contains_meat, self.is_sweet, self.is_fried)):
+            self.category_bits |= flags.astype(np.uint8) << bit
+    
+    def __len__(self):
+        return len(self.recipes)
+    
+    def objective_terms(self) -> Dict[str, np.ndarray]:
+        """Ziele des Mehrziel-Modus je Kandidat, auf [0, 1] normiert (1 = günstigste
+        Kosten, geringstes CO2, höchste Beliebtheit); einmal je Pool berechnet"""
+        if self._objective_terms is None:
+            def normalized(values: np.ndarray) -> np.ndarray:
+                span = values.max() - values.min() if len(values) else 0.0
+                return (values - values.min()) / span if span > 0 else np.zeros(len(values))
+            self._objective_terms = {
+                'cost': 1.0 - normalized(self.cost),
+                'co2': 1.0 - normalized(self.co2),
+                'popularity': normalized(self.popularity),
+            }
+        return self._objective_terms
+
+
+class EligibleCandidates:
+    """Gefilterte Kandidaten einer Menükomponente: Katalogzeilen, Rezepte und
+    (bei Bedarf erzeugt) der CandidatePool"""
+    
+    __slots__ = ('rows', 'recipes', 'pool')
+    
+    def __init__(self, rows: np.ndarray, recipes: List['Recipe']):
+        self.rows = rows
+        self.recipes = recipes
+        self.pool = None
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indizes der k besten Scores, absteigend; Gleichstand nach Position (stabil)"""
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        # Vorauswahl per argpartition, Grenzwert-Gleichstände nach Position auffüllen
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+        candidates = np.concatenate((above, ties))
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+class IncrementalPlanEvaluator:
+    """Inkrementelle Bewertung eines Plans für die Local Search.
+    
+    Liefert denselben Zielfunktionswert wie MenuPlanSimulator._evaluate_plan,
+    hält aber Tageskosten, Tages-Penalties und Rezept-Häufigkeiten vor.
+    Ein Zug (Slot ersetzen) wird in O(1) bewertet und direkt im Plan
+    angewendet bzw. rückgängig gemacht, ohne den Plan zu kopieren.
+    """
+    
+    def __init__(self, plan: Dict, bkt_target: float, bkt_max: float):
+        self.plan = plan
+        self.bkt_target = bkt_target
+        self.bkt_max = bkt_max
+        
+        self.day_keys = defaultdict(list)
+        self.recipe_counts = defaultdict(int)
+        for key, meal_slot in plan.items():
+            self.day_keys[key[0]].append(key)
+            self.recipe_counts[meal_slot.id] += 1
+        
+        self.daily_costs = {}
+        self.day_penalties = {}
+        self.total_penalty = 0.0
+        for day in self.day_keys:
+            self._refresh_day(day)
+        self.square_sum = sum(count ** 2 for count in self.recipe_counts.values())
+    
+    def _day_penalty(self, daily_cost: float) -> float:
+        # Penalisiere Überschreitung des Maximums stärker
+        if daily_cost > self.bkt_max:
+            return (daily_cost - self.bkt_max) * 3.0  # 3x Penalty
+        # Bevorzuge Kosten nahe am Ziel (aber unter Maximum)
+        return abs(daily_cost - self.bkt_target * 0.8)
+    
+    def _refresh_day(self, day: date):
+        daily_cost = sum(self.plan[key].cost for key in self.day_keys[day])
+        penalty = self._day_penalty(daily_cost)
+        self.total_penalty += penalty - self.day_penalties.get(day, 0.0)
+        self.daily_costs[day] = daily_cost
+        self.day_penalties[day] = penalty
+    
+    @property
+    def objective(self) -> float:
+        """Zielfunktion (niedriger = besser)"""
+        if not self.plan:
+            return 0.0
+        avg_bkt_dev = self.total_penalty / len(self.day_keys)
+        variety_penalty = self.square_sum / len(self.plan)
+        return avg_bkt_dev + 0.1 * variety_penalty
+    
+    def delta(self, key: Tuple, new_slot: 'MealSlot') -> float:
+        """Änderung der Zielfunktion, wenn new_slot den Slot key ersetzt"""
+        old_slot = self.plan[key]
+        day = key[0]
+        
+        new_daily_cost = self.daily_costs[day] - old_slot.cost + new_slot.cost
+        penalty_delta = self._day_penalty(new_daily_cost) - self.day_penalties[day]
+        
+        square_delta = 0
+        old_id, new_id = old_slot.id, new_slot.id
+        if old_id != new_id:
+            square_delta = (1 - 2 * self.recipe_counts[old_id]) + \
+                           (2 * self.recipe_counts.get(new_id, 0) + 1)
+        
+        return penalty_delta / len(self.day_keys) + 0.1 * square_delta / len(self.plan)
+    
+    def apply(self, key: Tuple, new_slot: 'MealSlot') -> 'MealSlot':
+        """Ersetzt den Slot im Plan und gibt den alten Slot zurück (für undo)"""
+        old_slot = self.plan[key]
+        old_id, new_id = old_slot.id, new_slot.id
+        if old_id != new_id:
+            self.square_sum += (1 - 2 * self.recipe_counts[old_id]) + \
+                               (2 * self.recipe_counts[new_id] + 1)
+            self.recipe_counts[old_id] -= 1
+            self.recipe_counts[new_id] += 1
+        self.plan[key] = new_slot
+        self._refresh_day(key[0])
+        return old_slot
+    
+    def undo(self, key: Tuple, old_slot: 'MealSlot'):
+        """Macht einen mit apply() ausgeführten Zug rückgängig"""
+        self.apply(key, old_slot)
+
+
+class PlanConstraintTracker:
+    """Prüft Züge gegen die harten Vielfalts-Constraints des Plans.
+    
+    Verfolgt die Häufigkeiten (Fleisch, Süß, Frittiert) und die Einsatztage
+    je Rezept (sortiert), sodass ein Zug in O(log n) darauf geprüft werden
+    kann, ob er maxMeat/maxSweet/maxFried oder minRepetition neu verletzt.
+    Bereits vorhandene Verletzungen (Greedy-Fallback) werden nicht verschärft.
+    """
+    
+    CATEGORY_FLAGS = CATEGORY_FLAGS
+    
+    def __init__(self, plan: Dict, limits: Dict[str, int], min_repetition: int,
+                 period: int = None):
+        self.limits = limits
+        self.min_repetition = min_repetition
+        # Rotationsplan: Abstände zusätzlich über die Zyklusgrenze (Länge in Tagen)
+        self.period = period
+        self.counts = {category: 0 for category in self.CATEGORY_FLAGS}
+        self.recipe_days = defaultdict(list)
+        for key, meal_slot in plan.items():
+            self._add(key[0].toordinal(), meal_slot.selected)
+    
+    def _add(self, day: int, recipe: 'Recipe'):
+        for category, flag in self.CATEGORY_FLAGS.items():
+            if getattr(recipe, flag):
+                self.counts[category] += 1
+        insort(self.recipe_days[recipe.id], day)
+    
+    def _remove(self, day: int, recipe: 'Recipe'):
+        for category, flag in self.CATEGORY_FLAGS.items():
+            if getattr(recipe, flag):
+                self.counts[category] -= 1
+        days = self.recipe_days[recipe.id]
+        del days[bisect_left(days, day)]
+    
+    def allows(self, key: Tuple, old_slot: 'MealSlot', new_slot: 'MealSlot') -> bool:
+        """True, wenn der Zug keine neue Constraint-Verletzung erzeugt"""
+        return self.allows_recipe(key, old_slot.selected, new_slot.selected)
+    
+    def allows_recipe(self, key: Tuple, old_recipe: 'Recipe', new_recipe: 'Recipe') -> bool:
+        """Wie allows, für die gewählten Rezepte (ohne MealSlots zu erzeugen)"""
+        if old_recipe.id == new_recipe.id:
+            return True
+        
+        for category, flag in self.CATEGORY_FLAGS.items():
+            delta = int(getattr(new_recipe, flag)) - int(getattr(old_recipe, flag))
+            if delta > 0 and self.counts[category] + delta > self.limits[category]:
+                return False
+        
+        days = self.recipe_days.get(new_recipe.id)
+        if days:
+            day = key[0].toordinal()
+            i = bisect_left(days, day)
+            if i < len(days) and days[i] - day < self.min_repetition:
+                return False
+            if i > 0 and day - days[i - 1] < self.min_repetition:
+                return False
+            if self.period and (days[0] + self.period - day < self.min_repetition or
+                                day - (days[-1] - self.period) < self.min_repetition):
+                return False
+        return True
+    
+    def apply(self, key: Tuple, old_slot: 'MealSlot', new_slot: 'MealSlot'):
+        """Übernimmt einen (erlaubten) Zug in die Zähler"""
+        day = key[0].toordinal()
+        self._remove(day, old_slot.selected)
+        self._add(day, new_slot.selected)
+
+
+# BKT-Reparatur: Änderungsgewichte (Option wechseln vor Rezept tauschen),
+# Kostenauflösung (Zellen je BKT-Fensterbreite), Lösungsversuche je Tag und
+# geprüfte Tausch-Kostenstufen je Slot
+BKT_REPAIR_SWITCH_WEIGHT = 1
+BKT_REPAIR_SWAP_WEIGHT = 2
+BKT_REPAIR_CELLS_PER_WINDOW = 100
+BKT_REPAIR_ATTEMPTS = 3
+BKT_REPAIR_SWAPS_PER_SLOT = 8
+# Änderungen eines Tages, der außerhalb des Fensters bleibt, werden nur
+# übernommen, wenn sie den Abstand zum Fenster um mindestens diesen Anteil verringern
+BKT_REPAIR_MIN_GAIN = 0.5
+
+
+def _solve_day_budget(slot_candidates: List[List[Tuple[int, int]]], lo: int, hi: int,
+                      preferred: int) -> List[int]:
+    """Exakte Auswahl je Slot, damit die Tageskosten im Fenster [lo, hi] liegen.
+    
+    slot_candidates enthält je Slot die Kandidaten als (Kosten in Zellen,
+    Änderungsgewicht); Kandidat 0 ist der unveränderte Slot. Die DP über alle
+    erreichbaren Tageskosten minimiert lexikographisch den Abstand zum
+    Fenster, das Änderungsgewicht und den Abstand zum bevorzugten Wert.
+    Liefert den gewählten Kandidaten-Index je Slot.
+    """
+    # Zellen je Slot relativ zum günstigsten Kandidaten: die DP umfasst nur die Kostenspannen
+    base = [min(cell for cell, _ in candidates) for candidates in slot_candidates]
+    slot_candidates = [[(cell - low, weight) for cell, weight in candidates]
+                       for candidates, low in zip(slot_candidates, base)]
+    size = sum(max(cell for cell, _ in candidates) for candidates in slot_candidates) + 1
+    unreachable = np.iinfo(np.int64).max // 2
+    weights = np.full(size, unreachable, dtype=np.int64)
+    weights[0] = 0
+    choices = []
+    for candidates in slot_candidates:
+        best = np.full(size, unreachable, dtype=np.int64)
+        choice = np.zeros(size, dtype=np.int32)
+        for c, (cell, weight) in enumerate(candidates):
+            shifted = weights[:size - cell] + weight
+            target = best[cell:]
+            better = shifted < target
+            target[better] = shifted[better]
+            choice[cell:][better] = c
+        weights = best
+        choices.append(choice)
+    
+    totals = np.arange(size) + sum(base)
+    distance = np.maximum(0, np.maximum(lo - totals, totals - hi))
+    # lexsort: letzter Schlüssel ist der primäre
+    order = np.lexsort((np.abs(totals - preferred), weights, distance, weights >= unreachable))
+    total = int(order[0])  # relativ zu sum(base)
+    
+    selection = []
+    for candidates, choice in zip(reversed(slot_candidates), reversed(choices)):
+        c = int(choice[total])
+        selection.append(c)
+        total -= candidates[c][0]
+    selection.reverse()
+    return selection
+
+
+def _repair_slot(slot: 'MealSlot', move: Tuple[int, 'Recipe']) -> 'MealSlot':
+    """MealSlot eines Reparatur-Zugs (ausgewählter Index, Ersatzrezept oder None)"""
+    index, recipe = move
+    if recipe is None:
+        if index == slot.selected_index:
+            return slot
+        return MealSlot(options=slot.options, selected_index=index, portions=slot.portions)
+    options = list(slot.options)
+    options[index] = recipe
+    return MealSlot(options=options, selected_index=index, portions=slot.portions)
+
+
 @dataclass
 class SimulatorConfig:
     start_date: str
@@ -167,35 +846,686 @@ class SimulatorConfig:
         return date.fromisoformat(self.end_date)
 
 
+class PlanCalendar:
+    """Kalender eines Planungszeitraums.
+    
+    Hält je Tag Datum, Ordinaltag, ISO-String, Wochentag (wie
+    strftime('%A')) und Monat, damit Greedy, Re-Planning und Formatierung
+    diese Werte nachschlagen statt sie je Tag und Slot neu zu berechnen.
+    Tage außerhalb des Zeitraums (z.B. ein über das Ende hinausreichender
+    Rotationszyklus) werden direkt berechnet. Kalender werden zwischen
+    Läufen geteilt (plan_calendar) und dürfen nicht verändert werden.
+    """
+    
+    def __init__(self, start: date, end: date):
+        self.dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        self.ordinals = [d.toordinal() for d in self.dates]
+        self.iso_dates = [d.isoformat() for d in self.dates]
+        # Wochentagsnamen nur einmal je Wochentag formatieren
+        names = {d.weekday(): d.strftime('%A') for d in self.dates[:7]}
+        self.weekdays = [names[d.weekday()] for d in self.dates]
+        self.months = [d.month for d in self.dates]
+        self.positions = {d: i for i, d in enumerate(self.dates)}
+    
+    def ordinal(self, day: date) -> int:
+        position = self.positions.get(day)
+        return day.toordinal() if position is None else self.ordinals[position]
+    
+    def iso(self, day: date) -> str:
+        position = self.positions.get(day)
+        return day.isoformat() if position is None else self.iso_dates[position]
+    
+    def weekday(self, day: date) -> str:
+        position = self.positions.get(day)
+        return day.strftime('%A') if position is None else self.weekdays[position]
+
+
+@lru_cache(maxsize=PLAN_CALENDAR_CACHE_SIZE)
+def plan_calendar(start: date, end: date) -> PlanCalendar:
+    """Kalender je Planungszeitraum (prozessweit zwischengespeichert)"""
+    return PlanCalendar(start, end)
+
+
 class MenuPlanSimulator:
-    def __init__(self, config: SimulatorConfig, recipes: List[Recipe]):
+    def __init__(self, config: SimulatorConfig, recipes: List[Recipe],
+                 similarity: RecipeSimilarityEngine = None, seed: int = None,
+                 filter_index: RecipeFilterIndex = None, progress_callback=None,
+                 eligibility: Dict = None):
         self.config = config
         self.all_recipes = recipes
         self.recipes = recipes  # Alias für Kompatibilität
+        # Phasenzeiten und Zähler (statistics.performance)
+        self.metrics = SimulationMetrics()
+        # Ähnlichkeitsmatrix und Filter-Index werden vom Aufrufer geteilt oder einmalig berechnet
+        with self.metrics.phase('setup'):
+            self.similarity = similarity or RecipeSimilarityEngine(recipes)
+            if filter_index is None or not filter_index.covers(recipes):
+                filter_index = RecipeFilterIndex(recipes)
+        self.filter_index = filter_index
+        # Eigener Zufallsgenerator je Simulator (reproduzierbar, prozesssicher)
+        self.rng = random.Random(seed)
+        self.greedy_noise = 0.0
+        # Mehrziel-Modus: Ziel -> Gewicht (PLAN_OBJECTIVES), zusätzlich im Greedy-Score
+        self.objective_weights = None
         self.eligible_recipes = None
+        self.eligible_candidates = None
+        # Komponente -> EligibleCandidates (teilbar zwischen Läufen mit gleichen Hard Constraints)
+        self.eligibility = {} if eligibility is None else eligibility
         self.current_plan = None
+        # Re-Planning: nur diese Slot-Schlüssel dürfen geändert werden (None = alle)
+        self.movable_keys = None
+        # Ergebnis der Constraint-Vorprüfung (siehe _check_constraint_feasibility)
+        self.constraint_feasibility = None
+        # Warm-Start: formatierte Tage eines Ausgangsplans und die daraus
+        # übernommenen Slots (siehe _seed_slots)
+        self.seed_days = None
+        self.seed_slots = None
+        # Zerlegung: Häufigkeitsbudget je Kategorie für die Greedy-Tage dieses
+        # Simulators (siehe _block_state und run_decomposed)
+        self.frequency_budgets = None
+        # Rotationsplan: Zykluslänge in Tagen, solange der Zyklus selbst
+        # optimiert wird (siehe generate_cycle_plan)
+        self.cycle_days = None
+        # Zeitbudget: Ende der gesamten Plan-Generierung (time.perf_counter),
+        # gesetzt von _optimization_deadline; begrenzt auch die BKT-Reparatur
+        self.deadline = None
+        # Kalender des Planungszeitraums (bei Bedarf, siehe calendar)
+        self._calendar = None
+        # Fortschritt (0-100) und Phase; progress_callback(phase, progress) wird
+        # bei jeder Änderung aufgerufen (z.B. für den Job-Status)
+        self.phase = 'initializing'
+        self.progress_callback = progress_callback
         self.progress = 0
+    
+    @property
+    def progress(self) -> int:
+        return self._progress
+    
+    @property
+    def calendar(self) -> PlanCalendar:
+        """Kalender des Planungszeitraums (siehe PlanCalendar)"""
+        if self._calendar is None:
+            self._calendar = plan_calendar(self.config.start_date_obj, self.config.end_date_obj)
+        return self._calendar
+    
+    @progress.setter
+    def progress(self, value: int):
+        self._progress = value
+        if self.progress_callback is not None:
+            self.progress_callback(self.phase, value)
+    
+    def _report_progress(self):
+        """Meldet den aktuellen Fortschritt erneut, z.B. während auf Worker-Prozesse
+        gewartet wird; ein Abbruch im progress_callback bricht auch die Worker ab"""
+        if self.progress_callback is not None:
+            self.progress_callback(self.phase, self._progress)
         
     def generate_plan(self) -> Dict:
         """Hauptmethode zur Generierung eines Menüplans"""
+        start_time = time.perf_counter()
+        self._prepare()
+        self.current_plan = self._construct_and_optimize(self._optimization_deadline(start_time))
+        return self._finalize()
+    
+    def generate_plan_stream(self):
+        """Generiert den Plan als Folge von Events (für NDJSON/SSE).
+        
+        - start: Zeitraum und Anzahl Tage (nach Filterung und Machbarkeitsprüfung)
+        - day: jeder Tag, sobald der Greedy-Konstruktor ihn fertiggestellt hat
+        - day_update: Tage, die Optimierung oder BKT-Reparatur danach geändert haben
+        - done: Statistiken des endgültigen Plans
+        """
+        start_time = time.perf_counter()
+        self._prepare()
+        yield {
+            'type': 'start',
+            'start_date': self.config.start_date,
+            'end_date': self.config.end_date,
+            'total_days': (self.config.end_date_obj - self.config.start_date_obj).days + 1
+        }
+        
+        print("🏗️  Phase 3: Constructing initial plan (Greedy, streaming)...")
+        self.phase = 'construction'
+        self.progress = 40
+        plan = {}
+        streamed = {}
+        for current_date in self._iter_greedy_days(plan):
+            day_data = self._format_day(current_date, plan)
+            streamed[day_data['date']] = day_data
+            yield {'type': 'day', 'day': day_data}
+        
+        self.current_plan = plan
+        self.current_plan = self._optimize(self._optimization_deadline(start_time))
+        result = self._finalize()
+        
+        for day_data in result['days']:
+            if day_data != streamed.get(day_data['date']):
+                yield {'type': 'day_update', 'day': day_data}
+        yield {'type': 'done', 'statistics': result['statistics']}
+    
+    def replan(self, existing_days: List[Dict], window_start: date, window_end: date,
+               pinned: List[Dict] = None) -> Dict:
+        """Plant nur das Zeitfenster [window_start, window_end] eines bestehenden Plans neu.
+        
+        existing_days sind die formatierten Tage eines früheren Ergebnisses für
+        denselben Zeitraum (config.start_date bis end_date). Vielfalts-,
+        Wiederholungs- und Kategorie-Zustand werden in einem Durchlauf aus den
+        übrigen Tagen aufgebaut; Greedy, Optimierung und BKT-Reparatur laufen
+        nur auf den Slots im Fenster. pinned fixiert Slots im Fenster
+        ({'date', optional 'menu_line_id' und 'cost_form_id'}; ohne IDs den
+        ganzen Tag bzw. die ganze Menülinie). Tage außerhalb des Fensters
+        werden unverändert übernommen.
+        """
+        start_time = time.perf_counter()
+        if not (self.config.start_date_obj <= window_start <= window_end <= self.config.end_date_obj):
+            raise ValueError(
+                f"Re-planning window {window_start.isoformat()} - {window_end.isoformat()} "
+                f"outside plan period {self.config.start_date} - {self.config.end_date}"
+            )
+        self._prepare()
+        
+        with self.metrics.phase('replan_state'):
+            plan, days_by_date = self._plan_from_output(existing_days)
+            window_dates = [window_start + timedelta(days=i)
+                            for i in range((window_end - window_start).days + 1)]
+            window_keys = [key for key in plan if window_start <= key[0] <= window_end]
+            pinned_slots = {key: plan[key] for key in self._pinned_keys(window_keys, pinned or [])}
+            self.movable_keys = set(window_keys) - set(pinned_slots)
+            reuse_days = {
+                iso: day_data for iso, day_data in days_by_date.items()
+                if not window_start.isoformat() <= iso <= window_end.isoformat()
+            }
+            calendar = self.calendar
+            missing = [iso for d, iso in zip(calendar.dates, calendar.iso_dates)
+                       if not window_start <= d <= window_end and iso not in reuse_days]
+            if missing:
+                raise ValueError(
+                    f"Existing plan has no data for {len(missing)} days (first: {missing[0]})"
+                )
+            
+            state = self._replan_state(plan, window_start, window_end, pinned_slots)
+            for key in window_keys:
+                del plan[key]
+        print(f"🔁 Re-planning {len(window_dates)} days "
+              f"({len(self.movable_keys)} slots, {len(pinned_slots)} pinned)...")
+        
+        print("🏗️  Phase 3: Constructing window (Greedy)...")
+        self.phase = 'construction'
+        self.progress = 40
+        for _ in self._iter_greedy_days(plan, state=state, dates=window_dates, pinned=pinned_slots):
+            pass
+        
+        self.current_plan = plan
+        self.current_plan = self._optimize(self._optimization_deadline(start_time))
+        return self._finalize(reuse_days)
+    
+    def generate_cycle_plan(self, cycle_weeks: int) -> Dict:
+        """Rotationsplan: löst einen Zyklus von cycle_weeks Wochen und
+        wiederholt ihn über den gesamten Zeitraum.
+        
+        Der Zyklus beginnt am start_date. Wiederholungsabstände gelten auch
+        über die Zyklusgrenze (das Ende des Zyklus sperrt gegen den Anfang
+        des nächsten Durchlaufs), Häufigkeitslimits werden gleichmäßig auf
+        die Durchläufe verteilt. Greedy, Optimierung und BKT-Reparatur laufen
+        nur auf dem Zyklus; danach werden beim Kacheln nur Slots ersetzt,
+        deren Rezept im jeweiligen Monat nicht saisonal ist (siehe
+        _season_substitute).
+        """
+        start_time = time.perf_counter()
+        self._prepare()
+        
+        variety_params = self.config.simulation_params.get('variety', {})
+        window = max(1, math.ceil(variety_params.get('minRepetition', 7)),
+                     self.config.repetition_interval)
+        cycle_days = 7 * int(cycle_weeks)
+        if cycle_days < window:
+            raise ValueError(
+                f"Cycle of {cycle_days} days is shorter than the repetition window ({window} days)"
+            )
+        dates = self._plan_dates()
+        cycle_dates = [dates[0] + timedelta(days=i) for i in range(cycle_days)]
+        cycles = math.ceil(len(dates) / cycle_days)
+        # Budget je Durchlauf, sodass die Kacheln zusammen das Limit einhalten
+        self.frequency_budgets = {
+            category: int(variety_params[param]) // cycles
+            for category, param in FREQUENCY_LIMIT_PARAMS.items()
+            if variety_params.get(param, UNLIMITED_FREQUENCY) < UNLIMITED_FREQUENCY
+        }
+        self.cycle_days = cycle_days
+        
+        print(f"🏗️  Phase 3: Constructing {cycle_days}-day cycle (Greedy)...")
+        self.phase = 'construction'
+        self.progress = 40
+        plan = {}
+        state = self._block_state(cycle_dates, {})
+        calendar = self.calendar
+        last = calendar.ordinal(cycle_dates[-1])
+        index = self.similarity.index
+        for current_date in self._iter_greedy_days(plan, state=state, dates=cycle_dates):
+            # Einsatz im nächsten Durchlauf sperrt die letzten Tage des Zyklus
+            for key in self.eligible_recipes:
+                row = index[plan[(current_date,) + key].selected.id]
+                state.block_upcoming(row, calendar.ordinal(current_date) + cycle_days, last)
+        
+        self.current_plan = plan
+        self.current_plan = self._optimize(self._optimization_deadline(start_time))
+        with self.metrics.phase('validation'):
+            changed_slots, repaired_days = self._repair_daily_bkt(self.current_plan)
+        self.metrics.count('repair_slots_changed', changed_slots)
+        self.cycle_days = None
+        self.frequency_budgets = None
+        
+        print(f"🔁 Tiling cycle over {len(dates)} days ({cycles} cycles)...")
+        with self.metrics.phase('tiling'):
+            self.current_plan = self._tile_cycle(self.current_plan, dates, cycle_days)
+            substitutions = self._season_substitute(self.current_plan)
+        misses = self.metrics.counters.get('seasonal_misses', 0)
+        self.metrics.count('seasonal_substitutions', substitutions)
+        print(f"  ✓ Seasonal substitutions: {substitutions} slots"
+              + (f", {misses} without in-season candidate" if misses else ""))
+        
+        # Der Zyklus ist bereits repariert; die Validierung ändert keine Slots mehr
+        # (die BKT-Reparatur würde saisonale Ersetzungen wieder tauschen)
+        self.movable_keys = set()
+        output = self._finalize()
+        output['statistics']['cycle'] = {
+            'cycle_days': cycle_days,
+            'cycles': cycles,
+            'seasonal_substitutions': substitutions,
+            'seasonal_misses': misses,
+        }
+        return output
+    
+    def _plan_dates(self) -> List[date]:
+        """Alle Tage des Planungszeitraums"""
+        return list(self.calendar.dates)
+    
+    def _plan_from_output(self, days: List[Dict],
+                          skip_unknown: bool = False) -> Tuple[Dict, Dict[str, Dict]]:
+        """Interner Plan (Slot-Schlüssel -> MealSlot) aus formatierten Tagen.
+        
+        Menülinien und Rezepte eines Tages sind wie in _format_day nach
+        config.menu_lines bzw. deren cost_forms geordnet. Liefert zusätzlich
+        die formatierten Tage je ISO-Datum. Mit skip_unknown werden Optionen,
+        die nicht (mehr) im Katalog sind, ausgelassen statt abgelehnt.
+        """
+        index = self.similarity.index
+        plan = {}
+        days_by_date = {}
+        for day_data in sorted(days, key=lambda d: d['date']):
+            current_date = date.fromisoformat(day_data['date'])
+            days_by_date[day_data['date']] = day_data
+            for menu_line, ml_data in zip(self.config.menu_lines, day_data.get('menu_lines', [])):
+                for cost_form, meal_data in zip(menu_line['cost_forms'], ml_data.get('recipes', [])):
+                    options = []
+                    for option in meal_data['options']:
+                        row = index.get(option['recipe_id'])
+                        if row is None and skip_unknown:
+                            continue
+                        if row is None:
+                            raise ValueError(
+                                f"Unknown recipe {option['recipe_id']} in existing plan "
+                                f"({day_data['date']})"
+                            )
+                        options.append(self.all_recipes[row])
+                    if not options:
+                        continue
+                    plan[(current_date, menu_line['id'], cost_form['id'])] = MealSlot(
+                        options=options, selected_index=meal_data.get('selected_index', 0)
+                    )
+        return plan, days_by_date
+    
+    def _pinned_keys(self, window_keys: List[Tuple], pinned: List[Dict]) -> List[Tuple]:
+        """Slot-Schlüssel im Fenster, die durch pinned fixiert sind"""
+        pinned_keys = []
+        for pin in pinned:
+            pin_date = date.fromisoformat(pin['date'])
+            for key in window_keys:
+                if key[0] == pin_date and pin.get('menu_line_id') in (None, key[1]) \
+                        and pin.get('cost_form_id') in (None, key[2]):
+                    pinned_keys.append(key)
+        return pinned_keys
+    
+    def _seed_slots(self, seed_days: List[Dict]) -> Dict:
+        """Slots des Ausgangsplans, die im Planungszeitraum weiter zulässig sind.
+        
+        Überschneidet sich der Ausgangsplan mit dem Zeitraum, gelten seine
+        Tage datumsgleich. Sonst ist er eine Vorlage (z.B. die Vorwoche), die
+        wochentagstreu wiederholt wird: Tag d übernimmt den Vorlagentag mit
+        gleichem Abstand modulo der auf ganze Wochen aufgerundeten Länge.
+        Übernommen werden nur Optionen, die die Hard-Constraint-Filterung
+        bestehen; ist die ausgewählte Option nicht mehr zulässig, wird der
+        Slot neu konstruiert.
+        """
+        seed_plan, _ = self._plan_from_output(seed_days, skip_unknown=True)
+        if not seed_plan:
+            return {}
+        seed_dates = sorted({key[0] for key in seed_plan})
+        plan_dates = self._plan_dates()
+        if seed_dates[0] <= plan_dates[-1] and plan_dates[0] <= seed_dates[-1]:
+            source_dates = {d: d for d in plan_dates}
+        else:
+            period = 7 * math.ceil(((seed_dates[-1] - seed_dates[0]).days + 1) / 7)
+            source_dates = {
+                d: seed_dates[0] + timedelta(days=(d - seed_dates[0]).days % period)
+                for d in plan_dates
+            }
+        
+        index = self.similarity.index
+        eligible_rows = {}
+        seeded = {}
+        for current_date in plan_dates:
+            for key in self.eligible_recipes:
+                meal_slot = seed_plan.get((source_dates[current_date],) + key)
+                if meal_slot is None:
+                    continue
+                if key not in eligible_rows:
+                    eligible_rows[key] = set(self.eligible_candidates[key].rows.tolist())
+                rows = eligible_rows[key]
+                selected = meal_slot.selected
+                if index[selected.id] not in rows:
+                    continue
+                options = [opt for opt in meal_slot.options if index[opt.id] in rows]
+                seeded[(current_date,) + key] = MealSlot(
+                    options=options, selected_index=options.index(selected)
+                )
+        return seeded
+    
+    def _seed_allowed(self, meal_slot: 'MealSlot', state: GreedyState,
+                      limits: Dict[str, int]) -> bool:
+        """Ob ein Slot des Ausgangsplans im aktuellen Greedy-Zustand die harten
+        Grenzen einhält (Mindestabstand, Kategorie-Limit + 2 wie im Greedy)"""
+        selected = meal_slot.selected
+        if state.blocked[self.similarity.index[selected.id]] & BLOCKED_MIN_REPETITION:
+            return False
+        return not any(
+            getattr(selected, flag) and state.category_counts[category] >= limits[category] + 2
+            for category, flag in CATEGORY_FLAGS.items()
+        )
+    
+    def _greedy_state(self) -> GreedyState:
+        """Leerer Greedy-Zustand mit den Wiederholungsabständen der Konfiguration"""
+        variety_params = self.config.simulation_params.get('variety', {})
+        return GreedyState(self.similarity, variety_params.get('minRepetition', 7),
+                           self.config.repetition_interval)
+    
+    def _replan_state(self, plan: Dict, window_start: date, window_end: date,
+                      pinned_slots: Dict) -> GreedyState:
+        """Greedy-Zustand für das Fenster in einem Durchlauf über die übrigen Tage"""
+        index = self.similarity.index
+        calendar = self.calendar
+        state = self._greedy_state()
+        first, last = calendar.ordinal(window_start), calendar.ordinal(window_end)
+        # Zustand steht am Tag vor dem Fenster; der Greedy rückt Tag für Tag vor
+        state.advance_to(first - 1)
+        recent_days = defaultdict(list)
+        upcoming = []
+        
+        for key, meal_slot in plan.items():
+            day = calendar.ordinal(key[0])
+            recipe = meal_slot.selected
+            row = index[recipe.id]
+            if day < first:
+                state.count(recipe, row)
+                state.last_used_day[row] = max(state.last_used_day[row], day)
+                if first - day <= SIMILARITY_LOOKBACK_DAYS:
+                    recent_days[key[0]].append(recipe)
+            elif day > last:
+                state.count(recipe, row)
+                upcoming.append((row, day))
+            elif key in pinned_slots:
+                # Fixierte Slots zählen erst an ihrem Tag (wie im Greedy), sperren aber vorher
+                upcoming.append((row, day))
+        
+        # Sperren aus dem jeweils letzten Einsatz vor dem Fenster und den späteren Einsätzen
+        for row in np.flatnonzero(state.last_used_day > -NO_USE_DISTANCE).tolist():
+            for bit, length in state.windows:
+                state.block(row, bit, int(state.last_used_day[row]) + length)
+        for row, day in upcoming:
+            state.block_upcoming(row, day, last)
+        
+        for day in sorted(recent_days):
+            state.recent_window.push_day(day, recent_days[day])
+        return state
+    
+    def _block_state(self, dates: List[date], context: Dict) -> GreedyState:
+        """Greedy-Zustand eines Blocks der Zerlegung (siehe run_decomposed).
+        
+        context enthält die bereits geplanten Blöcke; deren Einsätze sperren
+        wie beim Re-Planning Rezepte im Wiederholungsabstand. Die
+        Kategorie-Zähler werden so vorbelegt, dass das harte Limit (Limit + 2)
+        genau bei frequency_budgets greift.
+        """
+        if context:
+            state = self._replan_state(context, dates[0], dates[-1], {})
+        else:
+            state = self._greedy_state()
+        variety_params = self.config.simulation_params.get('variety', {})
+        for category, budget in (self.frequency_budgets or {}).items():
+            limit = variety_params.get(FREQUENCY_LIMIT_PARAMS[category], UNLIMITED_FREQUENCY)
+            state.category_counts[category] = limit + 2 - budget
+        return state
+    
+    def _reconcile_seams(self, plan: Dict, block_of: Dict[date, int]) -> int:
+        """Abgleich nach der Zerlegung: Slots, deren Rezept innerhalb von
+        minRepetition Tagen bereits in einem anderen Block eingesetzt ist,
+        werden tageweise mit dem Zustand des übrigen Plans neu konstruiert
+        (wie beim Re-Planning). Liefert die Anzahl der Konflikte."""
+        variety_params = self.config.simulation_params.get('variety', {})
+        min_repetition = math.ceil(variety_params.get('minRepetition', 7))
+        if min_repetition <= 0:
+            return 0
+        
+        uses = defaultdict(list)
+        day_keys = defaultdict(list)
+        for key, meal_slot in plan.items():
+            uses[meal_slot.id].append(key)
+            day_keys[key[0]].append(key)
+        conflicts = defaultdict(set)
+        for keys in uses.values():
+            keys.sort()
+            for earlier, later in zip(keys, keys[1:]):
+                if (later[0] - earlier[0]).days < min_repetition and \
+                        block_of[earlier[0]] != block_of[later[0]]:
+                    conflicts[later[0]].add(later)
+        
+        for day in sorted(conflicts):
+            pinned = {key: plan[key] for key in day_keys[day] if key not in conflicts[day]}
+            state = self._replan_state(plan, day, day, pinned)
+            for key in conflicts[day]:
+                del plan[key]
+            for _ in self._iter_greedy_days(plan, state=state, dates=[day], pinned=pinned):
+                pass
+        return sum(len(keys) for keys in conflicts.values())
+    
+    def _tile_cycle(self, cycle_plan: Dict, dates: List[date], cycle_days: int) -> Dict:
+        """Plan für dates aus dem Zyklus: Tag d übernimmt die Slots des
+        Zyklustags mit gleichem Abstand zum Start modulo cycle_days"""
+        start = dates[0]
+        cycle_keys = defaultdict(list)
+        for key in cycle_plan:
+            cycle_keys[(key[0] - start).days].append(key)
+        plan = {}
+        for current_date in dates:
+            for key in cycle_keys[(current_date - start).days % cycle_days]:
+                plan[(current_date,) + key[1:]] = cycle_plan[key]
+        return plan
+    
+    def _season_substitute(self, plan: Dict) -> int:
+        """Ersetzt Slots, deren ausgewähltes Rezept im Monat des Tages nicht
+        saisonal ist (Rezepte ohne Saisonangabe gelten ganzjährig).
+        
+        Kandidaten sind saisonale Rezepte derselben Komponente ohne
+        zusätzliche Kategorie (maxMeat etc. können nicht überschritten
+        werden) und ohne Einsatz innerhalb von minRepetition Tagen; bevorzugt
+        werden wie im Greedy Kandidaten außerhalb des Wiederholungsintervalls.
+        Bewertet wird mit _score_candidates gegen die übrigen Slots des Tages.
+        Slots ohne saisonalen Kandidaten bleiben (Zähler seasonal_misses).
+        Ändert den Plan in place; liefert die Anzahl der ersetzten Slots.
+        """
+        if not self.config.consider_seasonality:
+            return 0
+        outside = [key for key, meal_slot in plan.items()
+                   if meal_slot.selected.seasonality and
+                   key[0].month not in meal_slot.selected.seasonality]
+        if not outside:
+            return 0
+        
+        index = self.similarity.index
+        variety_params = self.config.simulation_params.get('variety', {})
+        min_repetition = variety_params.get('minRepetition', 7)
+        interval = self.config.repetition_interval
+        calendar = self.calendar
+        use_days = defaultdict(list)
+        day_costs = self._daily_costs(plan)
+        for key, meal_slot in plan.items():
+            use_days[index[meal_slot.id]].append(calendar.ordinal(key[0]))
+        for days in use_days.values():
+            days.sort()
+        usage_counts = np.zeros(self.similarity.size, dtype=np.int64)
+        for row, days in use_days.items():
+            usage_counts[row] = len(days)
+        # Ohne Ähnlichkeit zu den Vortagen (nur Vielfalt über die Nutzungszähler)
+        recent_window = RecentRecipeWindow(self.similarity)
+        options_count = self.config.recipe_options_count
+        
+        def distance(row: int, day: int) -> int:
+            days = use_days.get(row)
+            if not days:
+                return NO_USE_DISTANCE
+            i = bisect_left(days, day)
+            return min(days[i] - day if i < len(days) else NO_USE_DISTANCE,
+                       day - days[i - 1] if i > 0 else NO_USE_DISTANCE)
+        
+        substitutions = 0
+        for key in outside:
+            current_date = key[0]
+            day = calendar.ordinal(current_date)
+            old_slot = plan[key]
+            old_recipe = old_slot.selected
+            old_bits = sum(1 << bit for bit, flag in enumerate(CATEGORY_FLAGS.values())
+                           if getattr(old_recipe, flag))
+            pool = self._candidate_pool(key[1:])
+            candidates = np.flatnonzero(
+                pool.in_season[current_date.month] &
+                ((pool.category_bits & (0xFF ^ old_bits)) == 0)
+            )
+            spacing = np.array([distance(row, day) for row in pool.rows[candidates].tolist()],
+                               dtype=np.int64)
+            allowed = spacing >= min_repetition
+            if not allowed.any():
+                self.metrics.count('seasonal_misses')
+                continue
+            positions, spacing = candidates[allowed], spacing[allowed]
+            
+            scores = self._score_candidates(pool, positions, current_date, recent_window,
+                                            usage_counts, day_costs[current_date] - old_slot.cost)
+            ranked = _top_k(np.where(spacing >= interval, scores, -np.inf), options_count)
+            chosen = [i for i in ranked if spacing[i] >= interval]
+            if len(chosen) < options_count:
+                for i in _top_k(scores, options_count + len(chosen)):
+                    if i not in chosen and len(chosen) < options_count:
+                        chosen.append(i)
+            options = [pool.recipes[positions[i]] for i in chosen]
+            new_slot = MealSlot(options=options,
+                                selected_index=min(range(len(options)), key=lambda i: options[i].cost))
+            
+            # Nutzung und Tageskosten für die folgenden Ersetzungen nachführen
+            old_row, new_row = index[old_recipe.id], index[new_slot.selected.id]
+            days = use_days[old_row]
+            del days[bisect_left(days, day)]
+            insort(use_days[new_row], day)
+            usage_counts[old_row] -= 1
+            usage_counts[new_row] += 1
+            day_costs[current_date] += new_slot.cost - old_slot.cost
+            plan[key] = new_slot
+            substitutions += 1
+        return substitutions
+    
+    def _optimization_deadline(self, start_time: float, share: float = 1.0) -> float:
+        """Deadline (time.perf_counter) der Anytime-Optimierung oder None ohne Zeitbudget.
+        
+        Das Zeitbudget gilt für die gesamte Plan-Generierung (self.deadline):
+        die Optimierung endet um die geschätzte Dauer von BKT-Reparatur und
+        Formatierung früher, die Reparatur selbst bricht an ihrer Deadline ab
+        (siehe _repair_deadline).
+        """
+        time_budget_ms = self.config.simulation_params.get('optimization', {}).get('timeBudgetMs')
+        if time_budget_ms is None:
+            return None
+        budget = float(time_budget_ms) / 1000.0
+        self.deadline = start_time + budget
+        reserve = min(budget / 2, FINALIZE_SECONDS_PER_SLOT * self._slot_count())
+        return start_time + share * (budget - reserve)
+    
+    def _repair_deadline(self) -> float:
+        """Deadline der BKT-Reparatur (Reserve für die Formatierung) oder None ohne Zeitbudget"""
+        if self.deadline is None:
+            return None
+        return self.deadline - FORMAT_SECONDS_PER_SLOT * self._slot_count()
+    
+    def _slot_count(self) -> int:
+        """Anzahl der Slots im Planungszeitraum (Tage x Kostformen)"""
+        return len(self.calendar.dates) * sum(len(ml['cost_forms']) for ml in self.config.menu_lines)
+    
+    def _prepare(self):
+        """Phase 1 und 2: Rezepte filtern und BKT-Machbarkeit prüfen"""
+        # NEU: Anytime-Optimierung mit Zeitbudget (z.B. {'timeBudgetMs': 200})
+        strategy = self.config.simulation_params.get('optimization', {}).get('strategy', 'annealing')
+        if strategy not in OPTIMIZATION_STRATEGIES:
+            raise ValueError(
+                f"Unknown optimization strategy: {strategy} "
+                f"(available: {', '.join(OPTIMIZATION_STRATEGIES)})"
+            )
+        
         print("🔍 Phase 1: Filtering recipes...")
+        self.phase = 'filtering'
         self.progress = 10
-        self.eligible_recipes = self._filter_recipes()
+        with self.metrics.phase('filtering'):
+            self.eligible_recipes = self._filter_recipes()
+        self.metrics.count('candidate_slots', len(self.eligible_recipes))
+        self.metrics.count('candidates', sum(len(recs) for recs in self.eligible_recipes.values()))
         
         print("✅ Phase 2: Checking BKT feasibility...")
+        self.phase = 'feasibility'
         self.progress = 20
-        is_feasible, min_bkt, max_bkt = self._check_bkt_feasibility()
+        with self.metrics.phase('feasibility'):
+            is_feasible, min_bkt, max_bkt = self._check_bkt_feasibility()
+            self.constraint_feasibility = self._check_constraint_feasibility()
         if not is_feasible:
             raise ValueError(
                 f"BKT target {self.config.bkt_target:.2f}€ not achievable. "
                 f"Range: [{min_bkt:.2f}€, {max_bkt:.2f}€]"
             )
-        
+        for reason in self.constraint_feasibility['reasons']:
+            print(f"  ⚠️  Constraint not satisfiable: {reason['message']}")
+        # Mit simulation_params.feasibility.strict wird nicht mehr mit Fallbacks geplant
+        if self.constraint_feasibility['reasons'] and \
+                self.config.simulation_params.get('feasibility', {}).get('strict', False):
+            raise ValueError(
+                "Constraints not satisfiable: " +
+                "; ".join(reason['message'] for reason in self.constraint_feasibility['reasons'])
+            )
+        if self.seed_days is not None:
+            with self.metrics.phase('warm_start'):
+                self.seed_slots = self._seed_slots(self.seed_days)
+            self.metrics.count('warm_start_candidates', len(self.seed_slots))
+            print(f"♻️  Warm start: {len(self.seed_slots)} slots from seed plan")
+    
+    def _construct_and_optimize(self, deadline: float = None) -> Dict:
+        """Phase 3 und 4: Greedy-Konstruktion und Optimierung (bis zur Deadline)"""
         print("🏗️  Phase 3: Constructing initial plan (Greedy)...")
+        self.phase = 'construction'
         self.progress = 40
         self.current_plan = self._greedy_construct_plan()
+        return self._optimize(deadline)
+    
+    def _optimize(self, deadline: float = None) -> Dict:
+        """Phase 4: Optimierung des current_plan (Local Search bzw. bis zur Deadline)"""
+        strategy = self.config.simulation_params.get('optimization', {}).get('strategy', 'annealing')
         
         print("🎯 Phase 4: Optimizing plan (Local Search)...")
+        self.phase = 'optimization'
         self.progress = 70
         
         # NEU: Deaktiviere Local Search wenn Häufigkeitsbeschränkungen oder
@@ -208,17 +1538,39 @@ class MenuPlanSimulator:
         )
         has_repetition_constraint = variety_params.get('minRepetition', 21) < 21
         
-        if has_frequency_constraints or has_repetition_constraint:
-            if has_frequency_constraints:
-                print("  ⚠️  Local Search disabled (frequency constraints active)")
-            if has_repetition_constraint:
-                print("  ⚠️  Local Search disabled (repetition distance active)")
-        else:
-            self.current_plan = self._local_search_optimize(max_iterations=500)
-        
+        with self.metrics.phase('local_search'):
+            if deadline is not None:
+                return self._anytime_optimize(deadline, strategy)
+            if has_frequency_constraints or has_repetition_constraint:
+                if has_frequency_constraints:
+                    print("  ⚠️  Local Search disabled (frequency constraints active)")
+                if has_repetition_constraint:
+                    print("  ⚠️  Local Search disabled (repetition distance active)")
+                return self.current_plan
+            return self._local_search_optimize(max_iterations=self._local_search_iterations())
+    
+    def _local_search_iterations(self) -> int:
+        """Iterationsbudget der Local Search: LOCAL_SEARCH_MOVES_PER_SLOT je
+        verschiebbarem Slot (begrenzt); beim Warm-Start anteilig zu den neu
+        konstruierten Slots (der übernommene Teil ist bereits optimiert)"""
+        slots = len(self._movable(self.current_plan))
+        iterations = min(LOCAL_SEARCH_ITERATIONS,
+                         max(LOCAL_SEARCH_MIN_ITERATIONS, LOCAL_SEARCH_MOVES_PER_SLOT * slots))
+        if self.cycle_days or not self.seed_slots:
+            # Rotationsplan: current_plan enthält nur die Slots des Zyklus
+            return iterations
+        greedy_slots = self.metrics.counters.get('greedy_slots', 0)
+        total_slots = greedy_slots + self.metrics.counters.get('warm_start_slots', 0)
+        share = greedy_slots / total_slots if total_slots else 1.0
+        return max(min(WARM_START_MIN_ITERATIONS, iterations), int(iterations * share))
+    
+    def _finalize(self, reuse_days: Dict[str, Dict] = None) -> Dict:
+        """Phase 5: Plan validieren und formatieren (siehe _format_output zu reuse_days)"""
         print("🔍 Phase 5: Validating plan...")
+        self.phase = 'validation'
         self.progress = 90
-        is_valid, repaired_plan, violations = self._validate_and_repair()
+        with self.metrics.phase('validation'):
+            is_valid, repaired_plan, violations = self._validate_and_repair()
         
         if not is_valid:
             print(f"⚠️  Warning: {len(violations)} constraint violations found")
@@ -226,84 +1578,54 @@ class MenuPlanSimulator:
                 print(f"  - {v}")
         
         self.current_plan = repaired_plan
+        self.phase = 'completed'
         self.progress = 100
         
         print("✅ Plan generation completed!")
-        return self._format_output()
+        with self.metrics.phase('formatting'):
+            output = self._format_output(reuse_days)
+        if self.constraint_feasibility is not None:
+            output['statistics']['constraint_feasibility'] = self.constraint_feasibility
+        output['statistics']['performance'] = self.metrics.to_dict()
+        return output
     
     def _filter_recipes(self) -> Dict:
-        """Filtert Rezepte basierend auf Hard Constraints"""
+        """Filtert Rezepte basierend auf Hard Constraints (über den Bitmasken-Index)"""
         eligible = defaultdict(list)
         
-        # NEU: Qualitäts-Parameter holen
+        # NEU: Qualitäts-Parameter (Standard: Rohmilch, rohe Eier, ... ausschließen)
         quality_params = self.config.simulation_params.get('quality', {})
-        exclude_raw_milk = quality_params.get('excludeRawMilk', True)
-        exclude_raw_eggs = quality_params.get('excludeRawEggs', True)
-        exclude_raw_sausage = quality_params.get('excludeRawSausage', True)
-        exclude_raw_meat = quality_params.get('excludeRawMeat', True)
-        
-        for recipe in self.all_recipes:
-            # Status-Check
-            if recipe.status != "Freigegeben" or not recipe.is_enabled:
-                continue
-            
-            # Allergen-Check
-            if set(recipe.allergens) & set(self.config.excluded_allergens):
-                continue
-            
-            # Abneigungen-Check
-            if set(recipe.aversions) & set(self.config.excluded_aversions):
-                continue
-            
-            # Ernährungsformen-Check
-            if not (set(recipe.dietary_forms) & set(self.config.dietary_forms)):
-                continue
-            
-            # NEU: Qualitäts-Checks
-            if exclude_raw_milk and recipe.contains_raw_milk:
-                continue
-            if exclude_raw_eggs and recipe.contains_raw_eggs:
-                continue
-            if exclude_raw_sausage and recipe.contains_raw_sausage:
-                continue
-            if exclude_raw_meat and recipe.contains_raw_meat:
-                continue
-            
-            # NEU: Rezeptgruppen-Filter
-            if self.config.selected_recipe_groups and recipe.group not in self.config.selected_recipe_groups:
-                continue
-            
-            # NEU: Abneigungen-Filter (zusätzlich zu excluded_aversions)
-            if self.config.selected_aversions:
-                # Prüfe ob Rezept eine der ausgewählten Abneigungen enthält
-                # Abneigungen sind z.B. "Schweinefleisch", "Rindfleisch", etc.
-                # Diese müssen mit recipe.aversions abgeglichen werden
-                if set(recipe.aversions) & set(self.config.selected_aversions):
-                    continue
-            
-            # NEU: Nachhaltigkeitsfilter (Version 1.1.6)
-            sustainability_params = self.config.simulation_params.get('sustainability', {})
-            prefer_regional = sustainability_params.get('preferRegional', False)
-            prefer_bio = sustainability_params.get('preferBio', False)
-            
-            # Wenn "nur regional" oder "nur bio" aktiviert ist, filtere entsprechend
-            # (Hinweis: Dies ist eine harte Filterung. Für Präferenz statt Ausschluss
-            # wäre eine Scoring-Anpassung in _score_recipe besser)
-            
-            # Zuordnung zu Menülinien
-            for menu_line in self.config.menu_lines:
-                for cost_form in menu_line['cost_forms']:
-                    recipe_comp = recipe.menu_component
-                    cost_comp = cost_form.get('component', 'NO_COMPONENT')
-                    
-                    # NEU: Alias-Mapping anwenden
-                    # Wenn cost_comp ein Alias ist, verwende die gemappte Komponente
-                    mapped_cost_comp = COMPONENT_ALIASES.get(cost_comp, cost_comp)
-                    
-                    # Prüfe sowohl Original als auch gemappte Komponente
-                    if recipe_comp == cost_comp or recipe_comp == mapped_cost_comp:
-                        key = (menu_line['id'], cost_form['id'])
-                        eligible[key].append(recipe)
+        
+        # Abneigungen: excluded_aversions und zusätzlich gewählte Abneigungen
+        excluded_aversions = list(self.config.excluded_aversions) + list(self.config.selected_aversions)
+        
+        # Zuordnung zu Menülinien; gleiche Komponenten werden nur einmal gefiltert
+        # (Rezepte der Original- und der per Alias gemappten Komponente sind zulässig).
+        # self.eligibility kann von Läufen mit gleichen Hard Constraints geteilt werden.
+        self.eligible_candidates = {}
+        for menu_line in self.config.menu_lines:
+            for cost_form in menu_line['cost_forms']:
+                cost_comp = cost_form.get('component', 'NO_COMPONENT')
+                
+                candidates = self.eligibility.get(cost_comp)
+                if candidates is not None:
+                    self.metrics.count('eligibility_cache_hits')
+                else:
+                    rows = self.filter_index.filter_rows(
+                        cost_comp,
+                        excluded_allergens=self.config.excluded_allergens,
+                        excluded_aversions=excluded_aversions,
+                        dietary_forms=self.config.dietary_forms,
+                        quality_params=quality_params,
+                        recipe_groups=self.config.selected_recipe_groups,
+                    )
+                    candidates = self.eligibility[cost_comp] = EligibleCandidates(
+                        rows, [self.all_recipes[i] for i in rows.tolist()]
+                    )
+                if len(candidates.rows):
+                    key = (menu_line['id'], cost_form['id'])
+                    self.eligible_candidates[key] = candidates
+                    eligible[key] = candidates.recipes
         
         # Debug: Log eligible recipes summary
         print(f"DEBUG: Eligible recipes summary:")
@@ -344,9 +1666,9 @@ class MenuPlanSimulator:
         for menu_line in self.config.menu_lines:
             for cost_form in menu_line['cost_forms']:
                 key = (menu_line['id'], cost_form['id'])
-                recipes = self.eligible_recipes.get(key, [])
+                candidates = (self.eligible_candidates or {}).get(key)
                 
-                if not recipes:
+                if candidates is None:
                     # Debug: Show what we're looking for
                     print(f"\nDEBUG: No recipes found!")
                     print(f"  menu_line: {menu_line}")
@@ -354,14 +1676,15 @@ class MenuPlanSimulator:
                     print(f"  Looking for component: '{cost_form.get('component')}'")
                     print(f"  Key: {key}")
                     print(f"  All keys in eligible_recipes: {list(self.eligible_recipes.keys())}")
-                    print(f"  Available recipe components (first 10): {[r.menu_component for r in self.recipes[:10]]}")
+                    print(f"  Available recipe components: {sorted(self.filter_index.component_rows)}")
                     print(f"  Total recipes: {len(self.recipes)}")
                     raise ValueError(
                         f"No recipes for {menu_line['name']}/{cost_form['name']} (component: {cost_form.get('component', 'MISSING')})"
                     )
                 
-                min_daily += min(r.cost for r in recipes)
-                max_daily += max(r.cost for r in recipes)
+                costs = self.filter_index.portion_costs[candidates.rows]
+                min_daily += float(costs.min())
+                max_daily += float(costs.max())
         
         # BKT ist MAXIMUM PRO TAG
         # Wir prüfen ob es möglich ist, unter dem BKT zu bleiben
@@ -370,322 +1693,498 @@ class MenuPlanSimulator:
         
         return is_feasible, min_daily, max_daily
     
+    def _check_constraint_feasibility(self) -> Dict:
+        """Vorprüfung der Vielfalts-Constraints in Millisekunden, ohne Plan.
+        
+        - Wiederholungsabstand (minRepetition, repetition_interval): In r
+          aufeinanderfolgenden Tagen braucht jeder Slot ein eigenes Rezept.
+          Slots mit überlappenden Kandidaten (gleiche Komponente, Alias)
+          teilen sich die Rezepte, daher Hall-Bedingung über die Gruppen.
+        - maxMeat/maxSweet/maxFried: Jedes Rezept ohne die Kategorie ist bei
+          Abstand r höchstens ceil(Tage / r) mal einsetzbar; die übrigen
+          Slot-Tage brauchen Rezepte der Kategorie.
+        
+        Liefert {'feasible', 'reasons', 'warnings'}; Gründe enthalten Code,
+        Meldung und die betroffenen Komponenten.
+        """
+        variety_params = self.config.simulation_params.get('variety', {})
+        total_days = (self.config.end_date_obj - self.config.start_date_obj).days + 1
+        min_repetition = max(1, int(variety_params.get('minRepetition', 7)))
+        options_count = self.config.recipe_options_count
+        reasons, warnings = [], []
+        
+        # Slots mit identischen Kandidaten (gleiche Komponente) bilden eine Gruppe
+        groups = {}
+        for menu_line in self.config.menu_lines:
+            for cost_form in menu_line['cost_forms']:
+                component = cost_form.get('component', 'NO_COMPONENT')
+                candidates = (self.eligible_candidates or {}).get((menu_line['id'], cost_form['id']))
+                if candidates is None:
+                    reasons.append({
+                        'code': 'no_candidates',
+                        'components': [component],
+                        'message': f"No recipes for {menu_line['name']}/{cost_form['name']} "
+                                   f"(component: {component})"
+                    })
+                    continue
+                group = groups.setdefault(id(candidates), {
+                    'component': component, 'rows': candidates.rows, 'slots': 0
+                })
+                group['slots'] += 1
+                if len(candidates.rows) < options_count:
+                    warnings.append({
+                        'code': 'options_count',
+                        'components': [component],
+                        'message': f"{component}: only {len(candidates.rows)} recipes "
+                                   f"for {options_count} options per meal"
+                    })
+        
+        for cluster in _overlap_clusters(list(groups.values())):
+            for name, distance in (('minRepetition', min_repetition),
+                                   ('repetition_interval', self.config.repetition_interval)):
+                window = min(max(1, int(distance)), total_days)
+                for subset in _group_subsets(cluster):
+                    available = len(np.unique(np.concatenate([g['rows'] for g in subset])))
+                    required = window * sum(g['slots'] for g in subset)
+                    if available < required:
+                        components = [g['component'] for g in subset]
+                        reasons.append({
+                            'code': name,
+                            'components': components,
+                            'required': required,
+                            'available': available,
+                            'message': f"{name} {distance}: {', '.join(components)} need "
+                                       f"{required} distinct recipes within {window} days, "
+                                       f"only {available} eligible"
+                        })
+                        break
+        
+        max_uses = math.ceil(total_days / min_repetition)
+        for category, param in FREQUENCY_LIMIT_PARAMS.items():
+            limit = variety_params.get(param, 999)
+            if limit >= 999:
+                continue
+            flags = self.filter_index.category_flags[category]
+            required = 0
+            tight = []
+            for cluster in _overlap_clusters(list(groups.values())):
+                rows = np.unique(np.concatenate([g['rows'] for g in cluster]))
+                others = int((~flags[rows]).sum())
+                needed = max(0, sum(g['slots'] for g in cluster) * total_days - others * max_uses)
+                if needed:
+                    required += needed
+                    tight.append(f"{'/'.join(g['component'] for g in cluster)} "
+                                 f"({others} recipes without {category})")
+            if required > limit:
+                reasons.append({
+                    'code': param,
+                    'components': tight,
+                    'required': required,
+                    'available': limit,
+                    'message': f"{param} {limit}: at least {required} {category} dishes needed "
+                               f"over {total_days} days ({', '.join(tight)})"
+                })
+        
+        return {'feasible': not reasons, 'reasons': reasons, 'warnings': warnings}
+    
     def _greedy_construct_plan(self) -> Dict:
         """Konstruiert initialen Plan mit Greedy-Heuristik"""
         plan = {}
-        used_recipes = defaultdict(list)
+        for _ in self._iter_greedy_days(plan):
+            pass
+        return plan
+    
+    def _iter_greedy_days(self, plan: Dict, state: GreedyState = None, dates: List[date] = None,
+                          pinned: Dict = None):
+        """Greedy-Konstruktion als Generator: füllt plan Tag für Tag und liefert
+        jedes fertige Datum (für die gestreamte Ausgabe).
+        
+        Standard ist der gesamte Zeitraum mit leerem Zustand. Beim Re-Planning
+        werden nur die Tage in dates geplant, ausgehend vom Zustand der
+        übrigen Tage; Slots in pinned werden unverändert übernommen. Slots aus
+        seed_slots (Warm-Start) werden übernommen, sofern sie die harten
+        Grenzen einhalten, sonst neu konstruiert.
+        """
+        state = state or self._greedy_state()
+        recent_window = state.recent_window
+        usage_counts = state.usage_counts
+        category_counts = state.category_counts
+        pinned = pinned or {}
+        seeded = self.seed_slots or {}
+        calendar = self.calendar
         
-        # NEU: Häufigkeits-Zähler für Kategorien
-        category_counts = {
-            'meat': 0,
-            'sweet': 0,
-            'fried': 0
-        }
+        pools = {key: self._candidate_pool(key) for key in self.eligible_recipes}
         
         # NEU: Limits aus Parametern holen
         variety_params = self.config.simulation_params.get('variety', {})
-        max_meat = variety_params.get('maxMeat', 999)
-        max_sweet = variety_params.get('maxSweet', 999)
-        max_fried = variety_params.get('maxFried', 999)
-        min_repetition = variety_params.get('minRepetition', 7)
+        limits = {
+            category: variety_params.get(param, 999)
+            for category, param in FREQUENCY_LIMIT_PARAMS.items()
+        }
+        options_count = self.config.recipe_options_count
         
-        current_date = self.config.start_date_obj
-        total_days = (self.config.end_date_obj - current_date).days + 1
-        day_count = 0
+        if dates is None:
+            dates = self._plan_dates()
+        total_days = len(dates)
         
-        while current_date <= self.config.end_date_obj:
+        for day_count, current_date in enumerate(dates, start=1):
+            # Greedy-Zeit ohne die Verarbeitung der gelieferten Tage (Streaming)
+            day_started = time.perf_counter()
+            day = calendar.ordinal(current_date)
             daily_cost = 0.0
+            day_recipes = []
+            recent_window.advance_to(current_date)
+            state.advance_to(day)
             
             for menu_line in self.config.menu_lines:
                 for cost_form in menu_line['cost_forms']:
                     key = (menu_line['id'], cost_form['id'])
-                    candidates = self.eligible_recipes[key]
-                    
-                    # NEU: Filtere Rezepte die Häufigkeitslimits überschreiten würden
-                    available_candidates = []
-                    soft_constraint_candidates = []  # Kandidaten mit kleiner Überschreitung
-                    
-                    for recipe in candidates:
-                        # Prüfe Häufigkeitslimits (Hard Constraints)
-                        violates_hard = False
-                        violates_soft = False
-                        
-                        # Erlaubt eine kleine Überschreitung (+2) als Soft Constraint
-                        if recipe.contains_meat:
-                            if category_counts['meat'] >= max_meat + 2:
-                                violates_hard = True
-                            elif category_counts['meat'] >= max_meat:
-                                violates_soft = True
-                        
-                        if recipe.is_sweet:
-                            if category_counts['sweet'] >= max_sweet + 2:
-                                violates_hard = True
-                            elif category_counts['sweet'] >= max_sweet:
-                                violates_soft = True
-                        
-                        if recipe.is_fried:
-                            if category_counts['fried'] >= max_fried + 2:
-                                violates_hard = True
-                            elif category_counts['fried'] >= max_fried:
-                                violates_soft = True
-                        
-                        if violates_hard:
-                            continue
-                        
-                        # Prüfe Wiederholungsabstand
-                        if recipe.id in used_recipes:
-                            last_used_dates = used_recipes[recipe.id]
-                            if last_used_dates:
-                                days_since_last_use = (current_date - max(last_used_dates)).days
-                                if days_since_last_use < min_repetition:
-                                    continue
-                        
-                        if violates_soft:
-                            soft_constraint_candidates.append(recipe)
-                        else:
-                            available_candidates.append(recipe)
-                    
-                    # Fallback-Strategie:
-                    # 1. Bevorzuge Kandidaten ohne Constraint-Verletzung
-                    # 2. Falls keine: Verwende Kandidaten mit Soft-Constraint-Verletzung
-                    # 3. Falls keine: Verwende alle Kandidaten (letzter Ausweg)
-                    if not available_candidates:
-                        if soft_constraint_candidates:
-                            available_candidates = soft_constraint_candidates
-                        else:
-                            available_candidates = candidates
-                    
-                    # Score berechnen
-                    scored = [
-                        (self._calculate_score(r, current_date, plan, 
-                                              used_recipes, daily_cost), r)
-                        for r in available_candidates
-                    ]
-                    scored.sort(reverse=True, key=lambda x: x[0])
-                    
-                    # Die besten N verfügbaren Rezepte wählen (N = recipe_options_count)
-                    options = []
-                    for score, recipe in scored:
-                        if len(options) < self.config.recipe_options_count:
-                            if self._is_repetition_allowed(recipe, current_date, 
-                                                           used_recipes):
-                                options.append(recipe)
-                    
-                    # Fallback: Wenn weniger als N gefunden, fülle mit den besten auf
-                    if len(options) < self.config.recipe_options_count and len(scored) > 0:
-                        for score, recipe in scored:
-                            if recipe not in options and len(options) < self.config.recipe_options_count:
-                                options.append(recipe)
-                    
-                    # Mindestens 1 Rezept muss vorhanden sein
-                    if not options:
-                        options = [scored[0][1]]  # Absoluter Fallback
-                    
-                    # Wähle das günstigste Rezept als Standard aus
-                    cheaper_index = 0
-                    min_cost = options[0].cost
-                    for i, opt in enumerate(options):
-                        if opt.cost < min_cost:
-                            min_cost = opt.cost
-                            cheaper_index = i
-                    
-                    # MealSlot erstellen (standardmäßig ist das günstigere Rezept ausgewählt)
-                    meal_slot = MealSlot(options=options, selected_index=cheaper_index)
+                    plan_key = (current_date, menu_line['id'], cost_form['id'])
+                    meal_slot = pinned.get(plan_key)
+                    if meal_slot is None:
+                        seed_slot = seeded.get(plan_key)
+                        if seed_slot is not None and self._seed_allowed(seed_slot, state, limits):
+                            self.metrics.count('warm_start_slots')
+                            meal_slot = seed_slot
+                    if meal_slot is None:
+                        self.metrics.count('greedy_slots')
+                        meal_slot = self._greedy_slot(
+                            pools[key], state, current_date, daily_cost, limits, options_count
+                        )
                     
                     # Speichern
-                    plan_key = (current_date, menu_line['id'], cost_form['id'])
                     plan[plan_key] = meal_slot
-                    used_recipes[meal_slot.selected.id].append(current_date)
-                    daily_cost += meal_slot.cost
-                    
-                    # NEU: Aktualisiere Häufigkeits-Zähler
                     selected_recipe = meal_slot.selected
-                    if selected_recipe.contains_meat:
-                        category_counts['meat'] += 1
-                    if selected_recipe.is_sweet:
-                        category_counts['sweet'] += 1
-                    if selected_recipe.is_fried:
-                        category_counts['fried'] += 1
+                    state.use(day, selected_recipe, self.similarity.index[selected_recipe.id])
+                    day_recipes.append(selected_recipe)
+                    daily_cost += meal_slot.cost
             
-            current_date += timedelta(days=1)
-            day_count += 1
+            recent_window.push_day(current_date, day_recipes)
             
             # Progress Update
             self.progress = 40 + int((day_count / total_days) * 30)
+            
+            self.metrics.add_time('greedy', time.perf_counter() - day_started)
+            yield current_date
+    
+    def _greedy_slot(self, pool: CandidatePool, state: GreedyState, current_date: date,
+                     daily_cost: float, limits: Dict[str, int], options_count: int) -> MealSlot:
+        """Wählt die Optionen eines Slots (Greedy-Schritt)"""
+        category_counts = state.category_counts
+        
+        # NEU: Filtere Rezepte die Häufigkeitslimits überschreiten würden
+        # Erlaubt eine kleine Überschreitung (+2) als Soft Constraint
+        hard_bits = soft_bits = 0
+        for bit, category in enumerate(CATEGORY_FLAGS):
+            if category_counts[category] >= limits[category] + 2:
+                hard_bits |= 1 << bit
+            if category_counts[category] >= limits[category]:
+                soft_bits |= 1 << bit
+        
+        # Prüfe Wiederholungsabstand (Sperr-Bits des Greedy-Zustands)
+        blocked = state.blocked[pool.rows]
+        allowed = (blocked & BLOCKED_MIN_REPETITION) == 0
+        if hard_bits:
+            allowed &= (pool.category_bits & hard_bits) == 0
+        if soft_bits:
+            preferred = allowed & ((pool.category_bits & soft_bits) == 0)
+        else:
+            preferred = allowed
+        
+        # Fallback-Strategie:
+        # 1. Bevorzuge Kandidaten ohne Constraint-Verletzung
+        # 2. Falls keine: Verwende Kandidaten mit Soft-Constraint-Verletzung
+        # 3. Falls keine: Verwende alle Kandidaten (letzter Ausweg)
+        positions = np.flatnonzero(preferred)
+        if len(positions) == 0:
+            positions = np.flatnonzero(allowed)
+            if len(positions) == 0:
+                positions = np.arange(len(pool))
+        
+        # Score für alle verfügbaren Kandidaten in einem Durchgang
+        self.metrics.count('score_evaluations', len(positions))
+        scores = self._score_candidates(
+            pool, positions, current_date, state.recent_window,
+            state.usage_counts, daily_cost
+        )
+        if self.greedy_noise:
+            # Multi-Start: leichte Zufallsstörung für diversifizierte Starts
+            scores = scores + self.greedy_noise * np.array(
+                [self.rng.random() for _ in range(len(scores))]
+            )
         
-        return plan
+        # Die besten N verfügbaren Rezepte wählen (N = recipe_options_count),
+        # sofern das Wiederholungsintervall eingehalten wird
+        repetition_ok = (
+            blocked[positions] & BLOCKED_REPETITION_INTERVAL
+        ) == 0
+        ranked = _top_k(np.where(repetition_ok, scores, -np.inf),
+                        options_count)
+        chosen = [i for i in ranked if repetition_ok[i]]
+        
+        # Fallback: Wenn weniger als N gefunden, fülle mit den besten auf
+        if len(chosen) < options_count:
+            for i in _top_k(scores, options_count + len(chosen)):
+                if i not in chosen and len(chosen) < options_count:
+                    chosen.append(i)
+        
+        options = [pool.recipes[positions[i]] for i in chosen]
+        
+        # Mehrziel-Modus: die am besten bewertete Option ist ausgewählt
+        if self.objective_weights:
+            return MealSlot(options=options, selected_index=0)
+        
+        # Wähle das günstigste Rezept als Standard aus
+        cheaper_index = 0
+        min_cost = options[0].cost
+        for i, opt in enumerate(options):
+            if opt.cost < min_cost:
+                min_cost = opt.cost
+                cheaper_index = i
+        
+        # MealSlot erstellen (standardmäßig ist das günstigere Rezept ausgewählt)
+        return MealSlot(options=options, selected_index=cheaper_index)
     
-    def _calculate_score(self, recipe, date, plan, used_recipes, 
-                        current_daily_cost) -> float:
-        """Berechnet Score für ein Rezept"""
-        score = 0.0
+    def _candidate_pool(self, key: Tuple) -> CandidatePool:
+        """CandidatePool eines Slots; wird mit den gefilterten Kandidaten geteilt"""
+        candidates = (self.eligible_candidates or {}).get(key)
+        if candidates is None or candidates.recipes is not self.eligible_recipes[key]:
+            # eligible_recipes wurde von außen gesetzt
+            return CandidatePool(self.eligible_recipes[key], self.similarity,
+                                 self.filter_index.season_months)
+        if candidates.pool is None:
+            candidates.pool = CandidatePool(candidates.recipes, self.similarity,
+                                            self.filter_index.season_months)
+        else:
+            self.metrics.count('pool_cache_hits')
+        return candidates.pool
+    
+    def _score_candidates(self, pool, positions, date, recent_window, usage_counts,
+                          current_daily_cost) -> np.ndarray:
+        """Berechnet Scores für alle Kandidaten eines Slots (vektorisiert)"""
+        cost = pool.cost[positions]
+        rows = pool.rows[positions]
         
         # BKT-Konformität (35%)
         # BKT = MAXIMUM PRO TAG (nicht Ziel)
         # Bevorzuge günstigere Rezepte, aber vermeide Überschreitung
-        projected_cost = current_daily_cost + recipe.cost
-        
-        # Prüfe ob wir das Maximum überschreiten
-        if projected_cost > self.config.bkt_max:
-            bkt_score = 0.0  # Überschreitet Maximum
-        else:
-            # Je günstiger, desto besser (aber nicht zu billig)
-            # Optimal ist 70-90% des BKT-Targets
-            cost_ratio = projected_cost / self.config.bkt_target
-            if cost_ratio < 0.5:
-                bkt_score = 0.7  # Zu billig
-            elif cost_ratio <= 0.9:
-                bkt_score = 1.0  # Optimal
-            else:
-                bkt_score = 1.0 - (cost_ratio - 0.9) / 0.2  # Akzeptabel bis Maximum
-        score += 0.35 * max(0, bkt_score)
+        projected_cost = current_daily_cost + cost
+        
+        # Je günstiger, desto besser (aber nicht zu billig)
+        # Optimal ist 70-90% des BKT-Targets, 0 bei Überschreitung des Maximums
+        cost_ratio = projected_cost / self.config.bkt_target
+        bkt_score = np.where(
+            cost_ratio < 0.5, 0.7,
+            np.where(cost_ratio <= 0.9, 1.0, 1.0 - (cost_ratio - 0.9) / 0.2)
+        )
+        bkt_score[projected_cost > self.config.bkt_max] = 0.0
+        score = 0.35 * np.maximum(0, bkt_score)
         
         # Vielfalt (25%)
-        usage_count = len(used_recipes.get(recipe.id, []))
-        variety_score = 1.0 / (1.0 + usage_count)
-        
-        # Ähnlichkeit zu kürzlich verwendeten Rezepten
-        recent_similarity = 0.0
-        lookback_days = min(7, len([d for d in plan.keys() if d[0] < date]))
-        if lookback_days > 0:
-            recent_dates = [date - timedelta(days=i) for i in range(1, lookback_days + 1)]
-            similarity_count = 0
-            for recent_date in recent_dates:
-                for key, meal_slot in plan.items():
-                    if key[0] == recent_date:
-                        # Verwende das ausgewählte Rezept aus dem MealSlot
-                        used_recipe = meal_slot.selected if hasattr(meal_slot, 'selected') else meal_slot
-                        similarity = self._calculate_similarity(recipe, used_recipe)
-                        recent_similarity += similarity
-                        similarity_count += 1
-            if similarity_count > 0:
-                recent_similarity /= similarity_count
-        
-        variety_score *= (1.0 - recent_similarity)
+        variety_score = 1.0 / (1.0 + usage_counts[rows])
+        
+        # Ähnlichkeit zu kürzlich verwendeten Rezepten (letzte 7 Tage)
+        if recent_window.slot_count > 0:
+            recent_similarity = recent_window.similarity_sums[rows] / recent_window.slot_count
+            variety_score *= (1.0 - recent_similarity)
         score += 0.25 * variety_score
         
         # Beliebtheit (15%)
-        popularity_score = recipe.popularity / 10.0
-        score += 0.15 * popularity_score
+        score += 0.15 * (pool.popularity[positions] / 10.0)
         
         # Saisonalität (15%)
         if self.config.consider_seasonality:
-            seasonality_score = 1.0 if date.month in recipe.seasonality else 0.0
-            score += 0.15 * seasonality_score
+            score += 0.15 * pool.in_season[date.month][positions]
         else:
             score += 0.15 * 0.5  # Neutral
         
         # Nährwerte (10%) - vereinfacht
         target_calories = 600
-        calorie_deviation = abs(recipe.nutritional_values.get('calories', 600) - target_calories)
-        nutrition_score = 1.0 - min(1.0, calorie_deviation / target_calories)
+        calorie_deviation = np.abs(pool.calories[positions] - target_calories)
+        nutrition_score = 1.0 - np.minimum(1.0, calorie_deviation / target_calories)
         score += 0.10 * nutrition_score
         
+        # Mehrziel-Modus (siehe pareto.py): gewichtete Ziele zusätzlich
+        if self.objective_weights:
+            terms = pool.objective_terms()
+            for objective, weight in self.objective_weights.items():
+                score += OBJECTIVE_SCORE_WEIGHT * weight * terms[objective][positions]
+        
         return score
     
     def _calculate_similarity(self, recipe1, recipe2) -> float:
-        """Berechnet Ähnlichkeit zwischen zwei Rezepten"""
-        if recipe1.id == recipe2.id:
-            return 1.0
+        """Berechnet Ähnlichkeit zwischen zwei Rezepten
         
-        similarity = 0.0
-        
-        # Gleiche Gruppe?
-        if recipe1.group == recipe2.group:
-            similarity += 0.5
-        
-        # Gleiche Kategorie?
-        if recipe1.category == recipe2.category:
-            similarity += 0.3
-        
-        # Ähnliche Allergene?
-        allergens1 = set(recipe1.allergens)
-        allergens2 = set(recipe2.allergens)
-        if allergens1 or allergens2:
-            jaccard = len(allergens1 & allergens2) / len(allergens1 | allergens2) if (allergens1 | allergens2) else 0
-            similarity += 0.2 * jaccard
-        
-        return min(1.0, similarity)
-    
-    def _is_repetition_allowed(self, recipe, date, used_recipes) -> bool:
-        """Prüft Wiederholungsintervall"""
-        if recipe.id not in used_recipes:
-            return True
-        
-        for last_date in used_recipes[recipe.id]:
-            days_since = (date - last_date).days
-            if days_since < self.config.repetition_interval:
-                return False
-        
-        return True
+        Gleiche ID = 1.0, sonst 0.5 (gleiche Gruppe) + 0.3 (gleiche Kategorie)
+        + 0.2 * Jaccard der Allergene; Werte kommen aus der Ähnlichkeitsmatrix.
+        """
+        index = self.similarity.index
+        return self.similarity.pair(index[recipe1.id], index[recipe2.id])
     
-    def _local_search_optimize(self, max_iterations=500) -> Dict:
-        """Optimiert Plan durch Local Search"""
+    def _local_search_optimize(self, max_iterations=LOCAL_SEARCH_ITERATIONS) -> Dict:
+        """Optimiert Plan durch Local Search (Hill Climbing mit inkrementeller Bewertung)"""
         current_plan = self.current_plan.copy()
-        current_cost = self._evaluate_plan(current_plan)
-        
-        best_plan = current_plan.copy()
-        best_cost = current_cost
+        evaluator = IncrementalPlanEvaluator(
+            current_plan, self.config.bkt_target, self.config.bkt_max
+        )
+        keys = self._movable(current_plan)
+        if not keys:
+            return current_plan
         
-        improvements = 0
+        improvements = evaluations = 0
         
         for iteration in range(max_iterations):
-            # Erzeuge Nachbarn
-            neighbor = self._generate_neighbor(current_plan)
-            neighbor_cost = self._evaluate_plan(neighbor)
+            # Zug erzeugen und inkrementell bewerten
+            key, new_slot = self._propose_move(current_plan, keys)
+            if new_slot is None:
+                continue
             
-            # Akzeptiere Verbesserungen
-            if neighbor_cost < current_cost:
-                current_plan = neighbor
-                current_cost = neighbor_cost
+            # Akzeptiere Verbesserungen (der aktuelle Plan ist damit stets der beste)
+            evaluations += 1
+            if evaluator.delta(key, new_slot) < 0:
+                evaluator.apply(key, new_slot)
                 improvements += 1
-                
-                if current_cost < best_cost:
-                    best_plan = current_plan.copy()
-                    best_cost = current_cost
             
             # Progress Update
             if iteration % 50 == 0:
                 self.progress = 70 + int((iteration / max_iterations) * 20)
         
+        self.metrics.count('local_search_iterations', max_iterations)
+        self.metrics.count('move_evaluations', evaluations)
+        self.metrics.count('moves_accepted', improvements)
+        self.metrics.count('moves_rejected', max_iterations - improvements)
         print(f"  ✓ Found {improvements} improvements")
-        return best_plan
+        return current_plan
     
-    def _evaluate_plan(self, plan) -> float:
-        """Bewertet Plan (niedriger = besser)"""
-        dates = set(key[0] for key in plan.keys())
-        total_bkt_dev = 0.0
+    def _movable(self, plan: Dict) -> List[Tuple]:
+        """Slot-Schlüssel, die Optimierung und Reparatur ändern dürfen (Plan-Reihenfolge)"""
+        if self.movable_keys is None:
+            return list(plan.keys())
+        return [key for key in plan if key in self.movable_keys]
+    
+    def _constraint_tracker(self, plan: Dict) -> PlanConstraintTracker:
+        """Erzeugt den Constraint-Tracker mit den Limits aus simulation_params"""
+        variety_params = self.config.simulation_params.get('variety', {})
+        limits = {
+            'meat': variety_params.get('maxMeat', 999),
+            'sweet': variety_params.get('maxSweet', 999),
+            'fried': variety_params.get('maxFried', 999),
+        }
+        # Zyklus bzw. Block: Häufigkeitsbudget statt Limit des Gesamtzeitraums
+        limits.update(self.frequency_budgets or {})
+        # Wie im Greedy sperren minRepetition und repetition_interval
+        min_repetition = max(variety_params.get('minRepetition', 7), self.config.repetition_interval)
+        return PlanConstraintTracker(plan, limits, min_repetition, period=self.cycle_days)
+    
+    def _anytime_optimize(self, deadline: float, strategy: str = 'annealing') -> Dict:
+        """Optimiert bis zur Deadline (time.perf_counter) und liefert den besten Plan.
         
-        for d in dates:
-            daily_cost = sum(
-                meal_slot.cost for (date, ml, cf), meal_slot in plan.items() 
-                if date == d
-            )
-            # Penalisiere Überschreitung des Maximums stärker
-            if daily_cost > self.config.bkt_max:
-                total_bkt_dev += (daily_cost - self.config.bkt_max) * 3.0  # 3x Penalty
+        Züge, die maxMeat/maxSweet/maxFried oder minRepetition verletzen
+        würden, werden verworfen. Strategien: Simulated Annealing oder Tabu
+        Search. Statt Kopien des besten Plans wird ein Journal der seit dem
+        besten Stand ausgeführten Züge geführt und am Ende zurückgespult.
+        """
+        plan = self.current_plan.copy()
+        keys = self._movable(plan)
+        if not keys or time.perf_counter() >= deadline:
+            print("  ⚠️  No time left for optimization")
+            return plan
+        
+        evaluator = IncrementalPlanEvaluator(plan, self.config.bkt_target, self.config.bkt_max)
+        constraints = self._constraint_tracker(plan)
+        
+        start = time.perf_counter()
+        budget = deadline - start
+        current_cost = best_cost = evaluator.objective
+        journal = []  # (Slot-Schlüssel, alter Slot) seit dem besten Plan
+        
+        temperature_start = None
+        calibration = []
+        tabu_until = {}
+        iterations = accepted = evaluations = 0
+        now = start
+        # Tabu-Iterationen prüfen eine ganze Stichprobe, daher jede Iteration Zeit prüfen
+        check_interval = 1 if strategy == 'tabu' else 32
+        
+        while True:
+            if iterations % check_interval == 0:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                self.progress = 70 + int(((now - start) / budget) * 20)
+            iterations += 1
+            
+            if strategy == 'tabu':
+                # Beste nicht-tabu Nachbarschaft aus einer Stichprobe (Aspiration bei neuem Bestwert)
+                move = None
+                for _ in range(TABU_SAMPLE_SIZE):
+                    key, new_slot = self._propose_move(plan, keys)
+                    if new_slot is None or not constraints.allows(key, plan[key], new_slot):
+                        continue
+                    evaluations += 1
+                    delta = evaluator.delta(key, new_slot)
+                    if tabu_until.get(key, 0) > iterations and current_cost + delta >= best_cost:
+                        continue
+                    if move is None or delta < move[0]:
+                        move = (delta, key, new_slot)
+                if move is None:
+                    continue
+                delta, key, new_slot = move
+                tabu_until[key] = iterations + min(TABU_TENURE, len(keys) - 1)
             else:
-                # Bevorzuge Kosten nahe am Ziel (aber unter Maximum)
-                total_bkt_dev += abs(daily_cost - self.config.bkt_target * 0.8)
-        
-        avg_bkt_dev = total_bkt_dev / len(dates) if dates else 0
-        
-        # Vielfalt-Penalty
-        recipe_counts = defaultdict(int)
-        for meal_slot in plan.values():
-            recipe_counts[meal_slot.id] += 1
-        
-        variety_penalty = sum(count ** 2 for count in recipe_counts.values()) / len(plan)
-        
-        return avg_bkt_dev + 0.1 * variety_penalty
+                key, new_slot = self._propose_move(plan, keys)
+                if new_slot is None or not constraints.allows(key, plan[key], new_slot):
+                    continue
+                evaluations += 1
+                delta = evaluator.delta(key, new_slot)
+                
+                if delta > 0:
+                    # Starttemperatur aus den ersten verschlechternden Zügen kalibrieren
+                    if temperature_start is None:
+                        calibration.append(delta)
+                        if len(calibration) < 50:
+                            continue
+                        temperature_start = sum(calibration) / len(calibration)
+                    progress = min(1.0, (now - start) / budget)
+                    temperature = temperature_start * (ANNEALING_FINAL_TEMPERATURE_RATIO ** progress)
+                    if self.rng.random() >= math.exp(-delta / temperature):
+                        continue
+            
+            old_slot = evaluator.apply(key, new_slot)
+            constraints.apply(key, old_slot, new_slot)
+            current_cost += delta
+            accepted += 1
+            
+            if current_cost < best_cost - 1e-12:
+                best_cost = current_cost
+                journal.clear()
+            else:
+                journal.append((key, old_slot))
+        
+        # Zurück zum besten gefundenen Plan
+        for key, old_slot in reversed(journal):
+            plan[key] = old_slot
+        
+        self.metrics.count('local_search_iterations', iterations)
+        self.metrics.count('move_evaluations', evaluations)
+        self.metrics.count('moves_accepted', accepted)
+        self.metrics.count('moves_rejected', iterations - accepted)
+        print(f"  ✓ Anytime {strategy}: {iterations} iterations, {accepted} moves accepted, "
+              f"best score {best_cost:.3f}")
+        return plan
     
-    def _generate_neighbor(self, plan) -> Dict:
-        """Erzeugt Nachbarplan durch zufällige Änderung"""
-        neighbor = plan.copy()
-        
+    def _evaluate_plan(self, plan) -> float:
+        """Bewertet Plan (niedriger = besser)"""
+        if not plan:
+            return 0.0
+        return IncrementalPlanEvaluator(
+            plan, self.config.bkt_target, self.config.bkt_max
+        ).objective
+    
+    def _propose_move(self, plan, keys) -> Tuple[Tuple, 'MealSlot']:
+        """Erzeugt einen Nachbar-Zug (Slot-Schlüssel, neuer MealSlot) ohne den Plan zu kopieren"""
         # Zufällige Position wählen
-        keys = list(plan.keys())
-        random_key = random.choice(keys)
+        random_key = self.rng.choice(keys)
         
         # Alternatives Rezept wählen
         date, ml, cf = random_key
@@ -694,29 +2193,40 @@ class MenuPlanSimulator:
         current_slot = plan[random_key]
         
         # Strategie 1 (50%): Wechsle selected_index innerhalb der vorhandenen Optionen
-        if len(current_slot.options) > 1 and random.random() < 0.5:
-            new_index = 1 - current_slot.selected_index  # Toggle zwischen 0 und 1
-            new_slot = MealSlot(
+        if len(current_slot.options) > 1 and self.rng.random() < 0.5:
+            new_index = self.rng.choice([
+                i for i in range(len(current_slot.options))
+                if i != current_slot.selected_index
+            ])
+            return random_key, MealSlot(
                 options=current_slot.options,
-                selected_index=new_index
+                selected_index=new_index,
+                portions=current_slot.portions
             )
-            neighbor[random_key] = new_slot
-        else:
-            # Strategie 2 (50%): Ersetze die gesamte MealSlot mit neuen Optionen
-            alternatives = [r for r in candidates if r.id != current_slot.id]
-            
-            if alternatives:
-                # Wähle 2 neue Rezepte
-                new_options = random.sample(alternatives, min(2, len(alternatives)))
-                new_slot = MealSlot(options=new_options, selected_index=0)
-                neighbor[random_key] = new_slot
         
-        return neighbor
+        # Strategie 2 (50%): Ersetze die gesamte MealSlot mit neuen Optionen
+        # (2 zufällige Rezepte außer dem aktuellen; Positionen statt Listenkopie)
+        picks = self.rng.sample(range(len(candidates)), min(3, len(candidates)))
+        new_options = [candidates[i] for i in picks if candidates[i].id != current_slot.id][:2]
+        if not new_options:
+            return random_key, None
+        
+        return random_key, MealSlot(
+            options=new_options,
+            selected_index=0,
+            portions=current_slot.portions
+        )
     
     def _validate_and_repair(self) -> Tuple[bool, Dict, List[str]]:
-        """Validiert Plan"""
+        """Repariert Tageskosten außerhalb des BKT-Fensters und validiert den Plan"""
         violations = []
         
+        changed_slots, repaired_days = self._repair_daily_bkt(self.current_plan)
+        self.metrics.count('repair_slots_changed', changed_slots)
+        self.metrics.count('repair_days', repaired_days)
+        if changed_slots:
+            print(f"  ✓ BKT repair: {changed_slots} slots changed, {repaired_days} days repaired")
+        
         # Vollständigkeitsprüfung
         expected_entries = (
             (self.config.end_date_obj - self.config.start_date_obj).days + 1
@@ -727,97 +2237,318 @@ class MenuPlanSimulator:
         if len(self.current_plan) != expected_entries:
             violations.append(f"Incomplete plan: {len(self.current_plan)}/{expected_entries}")
         
-        # BKT-Prüfung
-        dates = set(key[0] for key in self.current_plan.keys())
-        total_bkt = sum(
-            sum(recipe.cost for (d, ml, cf), recipe in self.current_plan.items() if d == date)
-            for date in dates
-        )
-        avg_bkt = total_bkt / len(dates) if dates else 0
+        # BKT-Prüfung (Tageskosten in einem Durchlauf)
+        daily_costs = self._daily_costs(self.current_plan)
+        avg_bkt = sum(daily_costs.values()) / len(daily_costs) if daily_costs else 0
         
         if avg_bkt < self.config.bkt_min or avg_bkt > self.config.bkt_max:
             violations.append(
                 f"BKT {avg_bkt:.2f}€ outside [{self.config.bkt_min:.2f}€, {self.config.bkt_max:.2f}€]"
             )
         
+        days_outside = sum(1 for cost in daily_costs.values() if not self._within_bkt(cost))
+        if days_outside:
+            violations.append(f"{days_outside} days with daily cost outside the BKT window")
+        
         is_valid = len(violations) == 0
         
         return is_valid, self.current_plan, violations
     
-    def _format_output(self) -> Dict:
-        """Formatiert Plan für Ausgabe"""
+    def _daily_costs(self, plan: Dict) -> Dict[date, float]:
+        """Tageskosten aller Tage in einem Durchlauf über den Plan"""
+        daily_costs = defaultdict(float)
+        for key, meal_slot in plan.items():
+            daily_costs[key[0]] += meal_slot.cost
+        return daily_costs
+    
+    def _within_bkt(self, daily_cost: float) -> bool:
+        return self.config.bkt_min - 1e-9 <= daily_cost <= self.config.bkt_max + 1e-9
+    
+    def _repair_daily_bkt(self, plan: Dict) -> Tuple[int, int]:
+        """Bringt jeden Tag außerhalb von [bkt_min, bkt_max] möglichst ins Fenster.
+        
+        Je Tag löst _solve_day_budget die Auswahl exakt über diskretisierte
+        Kosten: Slot behalten, andere vorhandene Option wählen oder die
+        gewählte Option gegen ein zulässiges Rezept tauschen. Alle Änderungen
+        werden gegen den Constraint-Tracker (minRepetition, repetition_interval,
+        maxMeat, maxSweet, maxFried) geprüft. Ist das Fenster unerreichbar,
+        werden die Änderungen des Tages nur übernommen, wenn sie den Abstand
+        zum Fenster um mindestens BKT_REPAIR_MIN_GAIN verringern; sonst bleibt
+        die Auswahl der Optimierung. Mit Zeitbudget endet die Reparatur an
+        _repair_deadline.
+        Ändert den Plan in place; liefert (geänderte Slots, reparierte Tage).
+        """
+        day_keys = defaultdict(list)
+        for key in plan:
+            day_keys[key[0]].append(key)
+        daily_costs = self._daily_costs(plan)
+        movable_days = {key[0] for key in self._movable(plan)}
+        outside = sorted(day for day, cost in daily_costs.items()
+                         if day in movable_days and not self._within_bkt(cost))
+        if not outside:
+            return 0, 0
+        
+        bkt_min, bkt_max = self.config.bkt_min, self.config.bkt_max
+        step = max(0.01, (bkt_max - bkt_min) / BKT_REPAIR_CELLS_PER_WINDOW)
+        lo = math.ceil(bkt_min / step - 1e-9)
+        hi = math.floor(bkt_max / step + 1e-9)
+        # Innerhalb des Fensters wie die Optimierung 80% des Ziels bevorzugen
+        preferred = round(min(max(self.config.bkt_target * 0.8, bkt_min), bkt_max) / step)
+        
+        constraints = self._constraint_tracker(plan)
+        swap_pools = {}
+        changed_slots = repaired_days = 0
+        deadline = self._repair_deadline()
+        
+        for position, day in enumerate(outside):
+            if deadline is not None and time.perf_counter() >= deadline:
+                # Zeitbudget aufgebraucht: übrige Tage bleiben außerhalb des Fensters
+                self.metrics.count('repair_days_skipped', len(outside) - position)
+                break
+            if self._bkt_distance_bound(plan, day_keys[day], swap_pools) > \
+                    (1.0 - BKT_REPAIR_MIN_GAIN) * self._bkt_distance(daily_costs[day]):
+                # Selbst billigste/teuerste Rezepte kämen dem Fenster kaum näher
+                self.metrics.count('repair_days_rejected')
+                continue
+            # Kostenänderung je Slot (in Zellen) in Richtung Fenster, höchstens bis zum anderen Rand
+            day_cell = round(daily_costs[day] / step)
+            reach = (0, hi - day_cell) if day_cell < lo else (lo - day_cell, 0)
+            banned = set()
+            changes = []  # (Slot-Schlüssel, alter Slot) dieses Tages
+            slot_cache = {}  # Slot-Schlüssel -> (Kandidaten, Züge), über die Versuche
+            for _ in range(BKT_REPAIR_ATTEMPTS):
+                candidates, moves = [], []
+                for key in day_keys[day]:
+                    if key not in slot_cache:
+                        if self.movable_keys is not None and key not in self.movable_keys:
+                            # Fixierter Slot: nur die aktuelle Auswahl
+                            slot_cache[key] = ([(round(plan[key].cost / step), 0)],
+                                               [(plan[key].selected_index, None)])
+                        else:
+                            slot_cache[key] = self._repair_candidates(
+                                plan, key, constraints, step, swap_pools, banned, reach,
+                                preferred - day_cell
+                            )
+                    candidates.append(slot_cache[key][0])
+                    moves.append(slot_cache[key][1])
+                
+                refused = False
+                selection = _solve_day_budget(candidates, lo, hi, preferred)
+                for key, c, slot_moves in zip(day_keys[day], selection, moves):
+                    if c == 0:
+                        continue
+                    new_slot = _repair_slot(plan[key], slot_moves[c])
+                    # Neu aufbauen: Slot geändert bzw. Rezept gesperrt
+                    del slot_cache[key]
+                    # Mehrere Änderungen desselben Tages können sich gegenseitig ausschließen
+                    if not constraints.allows(key, plan[key], new_slot):
+                        banned.add((key, new_slot.id))
+                        refused = True
+                        continue
+                    constraints.apply(key, plan[key], new_slot)
+                    changes.append((key, plan[key]))
+                    plan[key] = new_slot
+                if not refused:
+                    break
+            
+            daily_cost = sum(plan[key].cost for key in day_keys[day])
+            if self._within_bkt(daily_cost):
+                repaired_days += 1
+            elif self._bkt_distance(daily_cost) > \
+                    (1.0 - BKT_REPAIR_MIN_GAIN) * self._bkt_distance(daily_costs[day]):
+                # Kaum näher am Fenster: Auswahl der Optimierung wiederherstellen
+                for key, old_slot in reversed(changes):
+                    constraints.apply(key, plan[key], old_slot)
+                    plan[key] = old_slot
+                self.metrics.count('repair_days_rejected')
+                continue
+            changed_slots += len({key for key, _ in changes})
+        
+        return changed_slots, repaired_days
+    
+    def _swap_pool(self, pool_key: Tuple, swap_pools: Dict) -> Tuple[List, np.ndarray]:
+        """Zulässige Rezepte eines Slots für die BKT-Reparatur, nach Kosten je
+        Portion und (bei gleichen Kosten) absteigender Beliebtheit sortiert"""
+        if pool_key not in swap_pools:
+            recipes = self.eligible_recipes[pool_key]
+            unit_costs = np.array([r.portion_cost for r in recipes], dtype=np.float64)
+            popularity = np.array([r.popularity for r in recipes], dtype=np.float64)
+            order = np.lexsort((-popularity, unit_costs))
+            swap_pools[pool_key] = ([recipes[i] for i in order], unit_costs[order])
+        return swap_pools[pool_key]
+    
+    def _bkt_distance_bound(self, plan: Dict, keys: List[Tuple], swap_pools: Dict) -> float:
+        """Untere Schranke für den Abstand eines Tages zum BKT-Fenster nach der
+        Reparatur (günstigste bzw. teuerste zulässige Rezepte, ohne Constraints)"""
+        low = high = 0.0
+        for key in keys:
+            slot = plan[key]
+            if self.movable_keys is not None and key not in self.movable_keys:
+                low += slot.cost
+                high += slot.cost
+                continue
+            costs = [option.portion_cost for option in slot.options]
+            unit_costs = self._swap_pool(key[1:], swap_pools)[1]
+            if len(unit_costs):
+                costs += [unit_costs[0], unit_costs[-1]]
+            low += min(costs) * slot.portions
+            high += max(costs) * slot.portions
+        return max(0.0, self.config.bkt_min - high, low - self.config.bkt_max)
+    
+    def _bkt_distance(self, daily_cost: float) -> float:
+        """Abstand der Tageskosten zum BKT-Fenster (0 innerhalb)"""
+        return max(0.0, self.config.bkt_min - daily_cost, daily_cost - self.config.bkt_max)
+    
+    def _repair_candidates(self, plan: Dict, key: Tuple, constraints: PlanConstraintTracker,
+                           step: float, swap_pools: Dict, banned: Set,
+                           reach: Tuple[int, int], ideal: int) -> Tuple[List, List]:
+        """Kandidaten eines Slots für die BKT-Reparatur als (Zellen, Gewicht) und Züge
+        (ausgewählter Index, Ersatzrezept oder None; siehe _repair_slot).
+        
+        Rezepte werden nur getauscht, wenn sich die Slot-Kosten um reach[0]
+        bis reach[1] Zellen ändern; von diesen Kostenstufen werden höchstens
+        BKT_REPAIR_SWAPS_PER_SLOT geprüft, die um ideal Zellen verschobene
+        Slot-Kostenstufe zuerst.
+        """
+        slot = plan[key]
+        selected = slot.selected
+        current = round(slot.cost / step)
+        candidates = [(current, 0)]
+        moves = [(slot.selected_index, None)]
+        
+        # Andere vorhandene Option wählen
+        for i, option in enumerate(slot.options):
+            if i == slot.selected_index or (key, option.id) in banned:
+                continue
+            if constraints.allows_recipe(key, selected, option):
+                candidates.append((round(option.portion_cost * slot.portions / step),
+                                   BKT_REPAIR_SWITCH_WEIGHT))
+                moves.append((i, None))
+        
+        # Gewählte Option tauschen: je Kostenstufe das beliebteste zulässige Rezept
+        recipes, unit_costs = self._swap_pool(key[1:], swap_pools)
+        
+        cells = np.rint(unit_costs * slot.portions / step).astype(np.int64)
+        # Zellen sind aufsteigend sortiert: nur der Bereich innerhalb von reach
+        first = int(np.searchsorted(cells, current + reach[0], side='left'))
+        last = int(np.searchsorted(cells, current + reach[1], side='right'))
+        if first >= last:
+            return candidates, moves
+        starts = first + np.concatenate(([0], np.flatnonzero(np.diff(cells[first:last])) + 1))
+        stops = np.append(starts[1:], last)
+        # Kostenstufen nahe der Stufe, die den Tag allein auf den bevorzugten Wert brächte, zuerst
+        order = np.argsort(np.abs(cells[starts] - (current + ideal)), kind='stable')
+        seen = {cell for cell, _ in candidates}
+        option_ids = {option.id for option in slot.options}
+        swaps = 0
+        for start, stop in zip(starts[order].tolist(), stops[order].tolist()):
+            if swaps >= BKT_REPAIR_SWAPS_PER_SLOT:
+                break
+            cell = int(cells[start])
+            if cell in seen:
+                continue
+            for recipe in recipes[start:stop]:
+                if recipe.id in option_ids or (key, recipe.id) in banned:
+                    continue
+                if constraints.allows_recipe(key, selected, recipe):
+                    candidates.append((cell, BKT_REPAIR_SWAP_WEIGHT))
+                    moves.append((slot.selected_index, recipe))
+                    swaps += 1
+                    break
+        
+        return candidates, moves
+    
+    def _format_output(self, reuse_days: Dict[str, Dict] = None) -> Dict:
+        """Formatiert Plan für Ausgabe
+        
+        reuse_days (ISO-Datum -> formatierter Tag) wird unverändert übernommen,
+        z.B. die nicht neu geplanten Tage beim Re-Planning.
+        """
         days = []
+        reuse_days = reuse_days or {}
         
-        current_date = self.config.start_date_obj
-        while current_date <= self.config.end_date_obj:
-            day_data = {
-                'date': current_date.isoformat(),
-                'day_of_week': current_date.strftime('%A'),
-                'total_cost': 0.0,  # Gesamtkosten pro Tag
-                'menu_lines': []
+        calendar = self.calendar
+        for current_date, iso in zip(calendar.dates, calendar.iso_dates):
+            day_data = reuse_days.get(iso)
+            days.append(day_data if day_data is not None else self._format_day(current_date))
+        
+        return {
+            'days': days,
+            'statistics': self._format_statistics(days)
+        }
+    
+    def _format_day(self, current_date: date, plan: Dict = None) -> Dict:
+        """Formatiert einen Tag des Plans (Standard: current_plan) für die Ausgabe"""
+        plan = self.current_plan if plan is None else plan
+        calendar = self.calendar
+        day_data = {
+            'date': calendar.iso(current_date),
+            'day_of_week': calendar.weekday(current_date),
+            'total_cost': 0.0,  # Gesamtkosten pro Tag
+            'menu_lines': []
+        }
+        
+        for menu_line in self.config.menu_lines:
+            ml_data = {
+                'name': menu_line['name'],
+                'recipes': []
             }
             
-            for menu_line in self.config.menu_lines:
-                ml_data = {
-                    'name': menu_line['name'],
-                    'recipes': []
-                }
+            for cost_form in menu_line['cost_forms']:
+                key = (current_date, menu_line['id'], cost_form['id'])
+                meal_slot = plan.get(key)
                 
-                for cost_form in menu_line['cost_forms']:
-                    key = (current_date, menu_line['id'], cost_form['id'])
-                    meal_slot = self.current_plan.get(key)
+                if meal_slot:
+                    # Konvertiere MealSlot zu Dictionary mit allen Optionen
+                    meal_data = {
+                        'options': [
+                            {
+                                'recipe_id': opt.id,
+                                'recipe_name': opt.name,
+                                'cost_per_serving': opt.cost,
+                                'allergens': opt.allergens,
+                                'dietary_forms': opt.dietary_forms,
+                                'popularity': opt.popularity,
+                                'additives': opt.additives,
+                                'ingredients': opt.ingredients,
+                                'description': opt.description,
+                                'group': opt.group,
+                                'category': opt.category,
+                                # Kategorien
+                                'contains_meat': opt.contains_meat,
+                                'is_sweet': opt.is_sweet,
+                                'is_fried': opt.is_fried,
+                                'is_whole_grain': opt.is_whole_grain,
+                                # Qualität
+                                'contains_raw_milk': opt.contains_raw_milk,
+                                'contains_raw_eggs': opt.contains_raw_eggs,
+                                'contains_raw_sausage': opt.contains_raw_sausage,
+                                'contains_raw_meat': opt.contains_raw_meat,
+                                # Menülinie & Garmethode
+                                'menu_line': opt.menu_line,
+                                'cooking_method': opt.cooking_method,
+                                # Nachhaltigkeit
+                                'is_regional': opt.is_regional,
+                                'is_organic': opt.is_organic,
+                                'co2_per_portion': opt.co2_per_portion,
+                                # Ernährungswerte
+                                'nutritional_values': opt.nutritional_values
+                            }
+                            for opt in meal_slot.options
+                        ],
+                        'selected_index': meal_slot.selected_index,
+                        'is_user_modified': False
+                    }
                     
-                    if meal_slot:
-                        # Konvertiere MealSlot zu Dictionary mit allen Optionen
-                        meal_data = {
-                            'options': [
-                                {
-                                    'recipe_id': opt.id,
-                                    'recipe_name': opt.name,
-                                    'cost_per_serving': opt.cost,
-                                    'allergens': opt.allergens,
-                                    'dietary_forms': opt.dietary_forms,
-                                    'popularity': opt.popularity,
-                                    'additives': opt.additives,
-                                    'ingredients': opt.ingredients,
-                                    'description': opt.description,
-                                    'group': opt.group,
-                                    'category': opt.category,
-                                    # Kategorien
-                                    'contains_meat': opt.contains_meat,
-                                    'is_sweet': opt.is_sweet,
-                                    'is_fried': opt.is_fried,
-                                    'is_whole_grain': opt.is_whole_grain,
-                                    # Qualität
-                                    'contains_raw_milk': opt.contains_raw_milk,
-                                    'contains_raw_eggs': opt.contains_raw_eggs,
-                                    'contains_raw_sausage': opt.contains_raw_sausage,
-                                    'contains_raw_meat': opt.contains_raw_meat,
-                                    # Menülinie & Garmethode
-                                    'menu_line': opt.menu_line,
-                                    'cooking_method': opt.cooking_method,
-                                    # Nachhaltigkeit
-                                    'is_regional': opt.is_regional,
-                                    'is_organic': opt.is_organic,
-                                    'co2_per_portion': opt.co2_per_portion,
-                                    # Ernährungswerte
-                                    'nutritional_values': opt.nutritional_values
-                                }
-                                for opt in meal_slot.options
-                            ],
-                            'selected_index': meal_slot.selected_index,
-                            'is_user_modified': False
-                        }
-                        
-                        ml_data['recipes'].append(meal_data)
-                        day_data['total_cost'] += meal_slot.cost
-                
-                day_data['menu_lines'].append(ml_data)
+                    ml_data['recipes'].append(meal_data)
+                    day_data['total_cost'] += meal_slot.cost
             
-            days.append(day_data)
-            current_date += timedelta(days=1)
+            day_data['menu_lines'].append(ml_data)
         
-        # Statistiken
+        return day_data
+    
+    def _format_statistics(self, days: List[Dict]) -> Dict:
+        """Plan-Statistiken aus den formatierten Tagen"""
         # BKT = Maximale Kosten PRO TAG
         # Durchschnitt muss im Toleranzbereich liegen
         total_cost = sum(day['total_cost'] for day in days)
@@ -829,33 +2560,647 @@ class MenuPlanSimulator:
         max_daily_cost = max(daily_costs) if daily_costs else 0
         
         return {
-            'days': days,
-            'statistics': {
-                'total_days': len(days),
-                'avg_bkt': round(avg_daily_cost, 2),  # Durchschnitt pro Tag
-                'min_bkt': round(min_daily_cost, 2),  # Minimum pro Tag
-                'max_bkt': round(max_daily_cost, 2),  # Maximum pro Tag
-                'total_cost': round(total_cost, 2),  # Gesamtkosten über alle Tage
-                'bkt_target': self.config.bkt_target,  # Ziel-BKT
-                'bkt_tolerance': self.config.bkt_tolerance,  # Toleranz
-                'bkt_min_allowed': round(self.config.bkt_min, 2),  # Minimum erlaubt
-                'bkt_max_allowed': round(self.config.bkt_max, 2),  # Maximum erlaubt
-                'within_budget': avg_daily_cost <= self.config.bkt_max  # Durchschnitt im Budget
-            }
+            'total_days': len(days),
+            'avg_bkt': round(avg_daily_cost, 2),  # Durchschnitt pro Tag
+            'min_bkt': round(min_daily_cost, 2),  # Minimum pro Tag
+            'max_bkt': round(max_daily_cost, 2),  # Maximum pro Tag
+            'total_cost': round(total_cost, 2),  # Gesamtkosten über alle Tage
+            'bkt_target': self.config.bkt_target,  # Ziel-BKT
+            'bkt_tolerance': self.config.bkt_tolerance,  # Toleranz
+            'bkt_min_allowed': round(self.config.bkt_min, 2),  # Minimum erlaubt
+            'bkt_max_allowed': round(self.config.bkt_max, 2),  # Maximum erlaubt
+            'within_budget': avg_daily_cost <= self.config.bkt_max  # Durchschnitt im Budget
         }
 
 
-def load_recipes_from_file(filepath: str) -> List[Recipe]:
-    """Lädt Rezepte aus JSON-Datei"""
+def _overlap_clusters(groups: List[Dict]) -> List[List[Dict]]:
+    """Fasst Kandidaten-Gruppen mit gemeinsamen Rezepten zusammen (Zusammenhangskomponenten)"""
+    clusters = []
+    for group in groups:
+        merged = [group]
+        for cluster in list(clusters):
+            if any(len(np.intersect1d(group['rows'], other['rows'], assume_unique=True))
+                   for other in cluster):
+                merged.extend(cluster)
+                clusters.remove(cluster)
+        clusters.append(merged)
+    return clusters
+
+
+def _group_subsets(cluster: List[Dict]):
+    """Teilmengen einer Gruppe für die Hall-Bedingung (kleinste zuerst)"""
+    if len(cluster) > PRECHECK_MAX_SUBSET_GROUPS:
+        yield from ([group] for group in cluster)
+        yield cluster
+        return
+    for size in range(1, len(cluster) + 1):
+        yield from (list(subset) for subset in combinations(cluster, size))
+
+
+def load_recipes_from_file(filepath: str) -> RecipeCatalog:
+    """Lädt Rezepte aus JSON-Datei (als kompakter RecipeCatalog)"""
     with open(filepath, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
-    return [Recipe(**recipe) for recipe in data]
+    return RecipeCatalog(data)
+
+
+def _run_start(template: 'MenuPlanSimulator', start: Tuple) -> Tuple[float, List, Dict]:
+    """Ein Multi-Start-Lauf (Greedy + Optimierung) im Worker-Prozess;
+    start = (Seed, Greedy-Rauschen, Deadline)"""
+    seed, noise, deadline = start
+    simulator = MenuPlanSimulator(
+        template.config, template.all_recipes, similarity=template.similarity, seed=seed,
+        filter_index=template.filter_index, progress_callback=check_cancelled
+    )
+    simulator.eligible_recipes = template.eligible_recipes
+    simulator.eligible_candidates = template.eligible_candidates
+    simulator.seed_slots = template.seed_slots
+    simulator.greedy_noise = noise
+    plan = simulator._construct_and_optimize(deadline)
+    
+    # Kompakte Rückgabe: Rezept-IDs statt Rezeptobjekte
+    compact = [
+        (key, [r.id for r in slot.options], slot.selected_index, slot.portions)
+        for key, slot in plan.items()
+    ]
+    return simulator._evaluate_plan(plan), compact, simulator.metrics.to_dict()
+
+
+def run_multi_start(config: SimulatorConfig, recipes: List[Recipe], starts: int,
+                    similarity: RecipeSimilarityEngine = None, seed: int = None,
+                    workers: int = None, filter_index: RecipeFilterIndex = None,
+                    progress_callback=None, eligibility: Dict = None,
+                    seed_days: List[Dict] = None) -> Dict:
+    """Führt mehrere unabhängige Läufe mit eigenen Seeds aus und nimmt den besten.
+    
+    Filterung und Machbarkeitsprüfung laufen einmal; der gefilterte Index
+    wird per Fork mit den Worker-Prozessen geteilt (siehe run_forked). Bewertet wird nach
+    _evaluate_plan (niedriger = besser). Mit seed_days starten alle Läufe
+    vom selben Ausgangsplan (Warm-Start).
+    """
+    start_time = time.perf_counter()
+    
+    simulator = MenuPlanSimulator(config, recipes, similarity=similarity, seed=seed,
+                                  filter_index=filter_index, progress_callback=progress_callback,
+                                  eligibility=eligibility)
+    simulator.seed_days = seed_days
+    simulator._prepare()
+    # Kandidaten-Pools vor dem Fork erzeugen, damit alle Starts sie teilen
+    for key in simulator.eligible_recipes:
+        simulator._candidate_pool(key)
+    simulator.phase = 'optimization'
+    simulator.progress = 40
+    
+    seeds = [simulator.rng.getrandbits(32) for _ in range(starts)]
+    # Erster Start ist der unveränderte Greedy, weitere Starts diversifiziert
+    noises = [0.0] + [MULTI_START_GREEDY_NOISE] * (starts - 1)
+    workers = min(starts, workers or os.cpu_count() or 1)
+    if not fork_available():
+        workers = 1
+    
+    # Bei mehr Starts als Workern laufen die Starts in Runden; jede Runde
+    # erhält ihren Anteil am Zeitbudget
+    rounds = math.ceil(starts / workers)
+    deadlines = [
+        simulator._optimization_deadline(start_time, (i // workers + 1) / rounds)
+        for i in range(starts)
+    ]
+    
+    results = run_forked(_run_start, simulator, zip(seeds, noises, deadlines), workers,
+                         poll=simulator._report_progress)
+    
+    # Phasenzeiten und Zähler der Starts (über alle Worker summiert)
+    for _, _, performance in results:
+        simulator.metrics.merge(performance)
+    simulator.metrics.count('multi_start_runs', starts)
+    
+    best_index = min(range(starts), key=lambda i: results[i][0])
+    recipes_by_id = {r.id: r for r in recipes}
+    simulator.current_plan = {
+        key: MealSlot(
+            options=[recipes_by_id[recipe_id] for recipe_id in option_ids],
+            selected_index=selected_index,
+            portions=portions
+        )
+        for key, option_ids, selected_index, portions in results[best_index][1]
+    }
+    print(f"  ✓ Multi-start: best of {starts} runs is #{best_index + 1} "
+          f"(score {results[best_index][0]:.3f})")
+    
+    output = simulator._finalize()
+    output['statistics']['multi_start'] = {
+        'starts': starts,
+        'workers': workers,
+        'best_start': best_index,
+        'scores': [round(score, 4) for score, _, _ in results]
+    }
+    return output
+
+
+def _split_budget(total: int, weights: List[int]) -> List[int]:
+    """Verteilt ein ganzzahliges Budget anteilig auf die Gewichte (größte Reste zuerst)"""
+    weight_sum = sum(weights)
+    if weight_sum <= 0 or total <= 0:
+        return [0] * len(weights)
+    exact = [total * weight / weight_sum for weight in weights]
+    shares = [math.floor(value) for value in exact]
+    by_remainder = sorted(range(len(weights)), key=lambda i: shares[i] - exact[i])
+    for i in by_remainder[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+def _run_block(state: Dict, position: int) -> Tuple[List, Dict]:
+    """Greedy-Konstruktion eines Blocks der Zerlegung im Worker-Prozess"""
+    template = state['simulator']
+    dates, seed, budgets = state['blocks'][position]
+    simulator = MenuPlanSimulator(
+        template.config, template.all_recipes, similarity=template.similarity, seed=seed,
+        filter_index=template.filter_index, progress_callback=check_cancelled
+    )
+    simulator.eligible_recipes = template.eligible_recipes
+    simulator.eligible_candidates = template.eligible_candidates
+    simulator.seed_slots = template.seed_slots
+    simulator.frequency_budgets = budgets
+    plan = {}
+    greedy_state = simulator._block_state(dates, state['context'])
+    for _ in simulator._iter_greedy_days(plan, state=greedy_state, dates=dates):
+        pass
+    
+    # Kompakte Rückgabe: Rezept-IDs statt Rezeptobjekte
+    compact = [
+        (key, [r.id for r in slot.options], slot.selected_index, slot.portions)
+        for key, slot in plan.items()
+    ]
+    return compact, simulator.metrics.to_dict()
+
+
+def run_decomposed(config: SimulatorConfig, recipes: List[Recipe], block_weeks: int,
+                   similarity: RecipeSimilarityEngine = None, seed: int = None,
+                   workers: int = None, filter_index: RecipeFilterIndex = None,
+                   progress_callback=None, seed_days: List[Dict] = None) -> Dict:
+    """Plant lange Zeiträume in Wochenblöcken parallel in Worker-Prozessen.
+    
+    Blöcke sind block_weeks Wochen lang (mindestens ein Wiederholungsabstand)
+    und werden in zwei Runden geplant: zuerst jeder zweite Block (die Blöcke
+    einer Runde liegen so weit auseinander, dass sie sich nicht sperren),
+    danach die Blöcke dazwischen mit den Sperren und Zählern ihrer bereits
+    geplanten Nachbarn. Häufigkeitslimits werden nach Tagen auf die Blöcke
+    verteilt, in der zweiten Runde der Rest der ersten. Ein Abgleich plant
+    danach Slots mit Wiederholungskonflikten über Blockgrenzen neu;
+    Optimierung und Validierung laufen auf dem Gesamtplan. Die Blöcke einer
+    Runde erhalten Simulator und bisherigen Plan per Fork (siehe run_forked).
+    """
+    start_time = time.perf_counter()
+    
+    simulator = MenuPlanSimulator(config, recipes, similarity=similarity, seed=seed,
+                                  filter_index=filter_index, progress_callback=progress_callback)
+    simulator.seed_days = seed_days
+    simulator._prepare()
+    # Kandidaten-Pools vor dem Fork erzeugen, damit alle Blöcke sie teilen
+    for key in simulator.eligible_recipes:
+        simulator._candidate_pool(key)
+    simulator.phase = 'construction'
+    simulator.progress = 40
+    
+    variety_params = config.simulation_params.get('variety', {})
+    window = max(1, math.ceil(variety_params.get('minRepetition', 7)), config.repetition_interval)
+    block_days = 7 * max(int(block_weeks), math.ceil(window / 7))
+    dates = simulator._plan_dates()
+    blocks = [dates[i:i + block_days] for i in range(0, len(dates), block_days)]
+    block_of = {current_date: b for b, block in enumerate(blocks) for current_date in block}
+    seeds = [simulator.rng.getrandbits(32) for _ in blocks]
+    limits = {
+        category: int(variety_params.get(param, UNLIMITED_FREQUENCY))
+        for category, param in FREQUENCY_LIMIT_PARAMS.items()
+        if variety_params.get(param, UNLIMITED_FREQUENCY) < UNLIMITED_FREQUENCY
+    }
+    
+    workers = max(1, min(math.ceil(len(blocks) / 2), workers or os.cpu_count() or 1))
+    if not fork_available():
+        workers = 1
+    
+    plan = {}
+    with simulator.metrics.phase('decomposition'):
+        rounds = (list(range(0, len(blocks), 2)), list(range(1, len(blocks), 2)))
+        for round_index, positions in enumerate(rounds):
+            if not positions:
+                continue
+            # Budget je Kategorie: Rest des Limits anteilig nach Tagen auf die
+            # noch offenen Blöcke (erste Runde: alle Blöcke)
+            open_blocks = list(range(len(blocks))) if round_index == 0 else positions
+            used = defaultdict(int)
+            for meal_slot in plan.values():
+                for category, flag in CATEGORY_FLAGS.items():
+                    used[category] += bool(getattr(meal_slot.selected, flag))
+            shares = {
+                category: dict(zip(open_blocks, _split_budget(
+                    max(0, limit - used[category]), [len(blocks[b]) for b in open_blocks]
+                )))
+                for category, limit in limits.items()
+            }
+            state = {
+                'simulator': simulator,
+                'context': plan,
+                'blocks': [
+                    (blocks[b], seeds[b], {category: shares[category][b] for category in limits})
+                    for b in positions
+                ],
+            }
+            results = run_forked(_run_block, state, range(len(positions)), workers,
+                                 poll=simulator._report_progress)
+            
+            round_plan = {}
+            for compact, performance in results:
+                simulator.metrics.merge(performance)
+                for key, option_ids, selected_index, portions in compact:
+                    round_plan[key] = MealSlot(
+                        options=[simulator.all_recipes[simulator.similarity.index[recipe_id]]
+                                 for recipe_id in option_ids],
+                        selected_index=selected_index,
+                        portions=portions
+                    )
+            plan = {**plan, **round_plan}
+    simulator.metrics.count('decomposition_blocks', len(blocks))
+    
+    with simulator.metrics.phase('reconciliation'):
+        conflicts = simulator._reconcile_seams(plan, block_of)
+    simulator.metrics.count('seam_conflicts', conflicts)
+    print(f"  ✓ Decomposition: {len(blocks)} blocks of {block_days} days, {workers} workers, "
+          f"{conflicts} seam conflicts re-planned")
+    
+    # Plan-Reihenfolge wie beim sequentiellen Greedy (Tag, Menülinie, Kostform)
+    simulator.current_plan = {
+        key: plan[key] for key in (
+            (current_date, menu_line['id'], cost_form['id'])
+            for current_date in dates
+            for menu_line in config.menu_lines
+            for cost_form in menu_line['cost_forms']
+        ) if key in plan
+    }
+    simulator.current_plan = simulator._optimize(simulator._optimization_deadline(start_time))
+    output = simulator._finalize()
+    output['statistics']['decomposition'] = {
+        'blocks': len(blocks),
+        'block_days': block_days,
+        'workers': workers,
+        'seam_conflicts': conflicts,
+    }
+    return output
+
+
+def _cache_lookup(cache, config: SimulatorConfig, seed: int) -> Tuple[str, Dict]:
+    """Cache-Schlüssel und ggf. gecachtes Ergebnis (nur mit Seed und Cache, ohne
+    Zeitbudget: zeitbudgetierte Läufe hängen von der Rechenzeit ab und sind nicht
+    reproduzierbar). Ein Treffer erhält einen eigenen performance-Block (statt
+    dem des Original-Laufs)."""
+    if cache is None or seed is None:
+        return None, None
+    if config.simulation_params.get('optimization', {}).get('timeBudgetMs') is not None:
+        return None, None
+    metrics = SimulationMetrics()
+    with metrics.phase('cache_lookup'):
+        cache_key = cache.make_key(config, seed)
+        cached = cache.get(cache_key)
+    if cached is not None:
+        print("✅ Simulation result served from cache")
+        metrics.count('result_cache_hits')
+        cached.setdefault('statistics', {})['performance'] = metrics.to_dict()
+    return cache_key, cached
+
+
+def _record_performance(result: Dict):
+    """Übernimmt statistics.performance eines Ergebnisses in das Prozess-Aggregat"""
+    PROCESS_METRICS.record((result or {}).get('statistics', {}).get('performance'))
+
+
+def optimization_modes(simulation_params: Dict) -> Tuple[int, int, int]:
+    """(multiStart, blockWeeks, cycleWeeks) aus simulation_params.optimization;
+    ValueError bei ungültigen Werten oder nicht kombinierbaren Modi"""
+    optimization = simulation_params.get('optimization', {})
+    starts = int(optimization.get('multiStart', 1))
+    block_weeks = int(optimization.get('blockWeeks', 0) or 0)
+    cycle_weeks = int(optimization.get('cycleWeeks', 0) or 0)
+    if cycle_weeks > 0 and (starts > 1 or block_weeks > 0):
+        raise ValueError("optimization.cycleWeeks cannot be combined with multiStart or blockWeeks")
+    if block_weeks > 0 and starts > 1:
+        raise ValueError("optimization.blockWeeks cannot be combined with multiStart")
+    return starts, block_weeks, cycle_weeks
+
+
+def run_simulation(config_dict: Dict, recipes: List[Recipe],
+                   similarity: RecipeSimilarityEngine = None, seed: int = None,
+                   cache=None, filter_index: RecipeFilterIndex = None,
+                   progress_callback=None, seed_plan=None) -> Dict:
+    """Führt Simulation aus
+    
+    Mit simulation_params.optimization.multiStart > 1 werden mehrere Läufe
+    parallel ausgeführt und der beste Plan zurückgegeben; mit blockWeeks > 0
+    wird der Zeitraum in Wochenblöcke zerlegt (siehe run_decomposed), mit
+    cycleWeeks > 0 ein Rotationsplan dieser Länge wiederholt (siehe
+    MenuPlanSimulator.generate_cycle_plan). Mit
+    explizitem Seed und einem SimulationCache (für diesen Katalog) werden
+    Ergebnisse wiederverwendet. seed_plan (früheres Ergebnis, slim oder voll,
+    oder dessen Tagesliste, z.B. die Vorwoche) startet die Planung von dessen
+    noch zulässigen Slots (siehe MenuPlanSimulator._seed_slots);
+    Warm-Start-Läufe werden nicht gecacht.
+    """
+    config = SimulatorConfig(**config_dict)
+    seed_days = None
+    if seed_plan is not None:
+        seed_days = expand_output(seed_plan)['days'] if isinstance(seed_plan, dict) else seed_plan
+        cache = None
+    
+    cache_key, cached = _cache_lookup(cache, config, seed)
+    if cached is not None:
+        _record_performance(cached)
+        return cached
+    
+    starts, block_weeks, cycle_weeks = optimization_modes(config.simulation_params)
+    if cycle_weeks > 0:
+        simulator = MenuPlanSimulator(config, recipes, similarity=similarity, seed=seed,
+                                      filter_index=filter_index, progress_callback=progress_callback)
+        simulator.seed_days = seed_days
+        result = simulator.generate_cycle_plan(cycle_weeks)
+    elif block_weeks > 0:
+        result = run_decomposed(config, recipes, block_weeks, similarity=similarity, seed=seed,
+                                filter_index=filter_index, progress_callback=progress_callback,
+                                seed_days=seed_days)
+    elif starts > 1:
+        result = run_multi_start(config, recipes, starts, similarity=similarity, seed=seed,
+                                 filter_index=filter_index, progress_callback=progress_callback,
+                                 seed_days=seed_days)
+    else:
+        simulator = MenuPlanSimulator(config, recipes, similarity=similarity, seed=seed,
+                                      filter_index=filter_index, progress_callback=progress_callback)
+        simulator.seed_days = seed_days
+        result = simulator.generate_plan()
+    
+    _record_performance(result)
+    if cache_key is not None:
+        cache.put(cache_key, result)
+    return result
+
+
+def run_precheck(config_dict: Dict, recipes: List[Recipe],
+                 similarity: RecipeSimilarityEngine = None,
+                 filter_index: RecipeFilterIndex = None) -> Dict:
+    """Machbarkeitsprüfung ohne Simulation: BKT (wie _check_bkt_feasibility) und
+    Vielfalts-Constraints (_check_constraint_feasibility) mit allen Gründen"""
+    start_time = time.perf_counter()
+    config = SimulatorConfig(**config_dict)
+    simulator = MenuPlanSimulator(config, recipes, similarity=similarity, filter_index=filter_index)
+    simulator.eligible_recipes = simulator._filter_recipes()
+    report = simulator._check_constraint_feasibility()
+    
+    bkt = None
+    if not any(reason['code'] == 'no_candidates' for reason in report['reasons']):
+        is_feasible, min_daily, max_daily = simulator._check_bkt_feasibility()
+        bkt = {
+            'feasible': is_feasible,
+            'min_daily_cost': round(min_daily, 2),
+            'max_daily_cost': round(max_daily, 2),
+            'bkt_max': round(config.bkt_max, 2),
+        }
+        if not is_feasible:
+            report['reasons'].insert(0, {
+                'code': 'bkt_target',
+                'components': [],
+                'required': round(min_daily, 2),
+                'available': round(config.bkt_max, 2),
+                'message': f"BKT target {config.bkt_target:.2f}€ not achievable. "
+                           f"Range: [{min_daily:.2f}€, {max_daily:.2f}€]"
+            })
+    
+    report['feasible'] = not report['reasons']
+    report['bkt'] = bkt
+    report['duration_ms'] = round((time.perf_counter() - start_time) * 1000, 2)
+    return report
+
+
+def _result_events(config: SimulatorConfig, result: Dict):
+    """Event-Folge (wie generate_plan_stream) für ein bereits fertiges Ergebnis"""
+    yield {
+        'type': 'start',
+        'start_date': config.start_date,
+        'end_date': config.end_date,
+        'total_days': len(result['days'])
+    }
+    for day_data in result['days']:
+        yield {'type': 'day', 'day': day_data}
+    yield {'type': 'done', 'statistics': result['statistics']}
 
 
-def run_simulation(config_dict: Dict, recipes: List[Recipe]) -> Dict:
-    """Führt Simulation aus"""
+def run_simulation_stream(config_dict: Dict, recipes: List[Recipe],
+                          similarity: RecipeSimilarityEngine = None, seed: int = None,
+                          cache=None, filter_index: RecipeFilterIndex = None):
+    """Führt Simulation gestreamt aus (Events siehe MenuPlanSimulator.generate_plan_stream)
+    
+    Cache-Treffer und Multi-Start-Läufe werden als fertiges Ergebnis in
+    derselben Event-Folge ausgegeben. Mit Seed und Cache wird das aus den
+    Events zusammengesetzte Ergebnis gespeichert.
+    """
+    config = SimulatorConfig(**config_dict)
+    
+    cache_key, cached = _cache_lookup(cache, config, seed)
+    if cached is not None:
+        _record_performance(cached)
+        yield from _result_events(config, cached)
+        return
+    
+    starts = int(config.simulation_params.get('optimization', {}).get('multiStart', 1))
+    if starts > 1:
+        result = run_multi_start(config, recipes, starts, similarity=similarity, seed=seed,
+                                 filter_index=filter_index)
+        _record_performance(result)
+        if cache_key is not None:
+            cache.put(cache_key, result)
+        yield from _result_events(config, result)
+        return
+    
+    simulator = MenuPlanSimulator(config, recipes, similarity=similarity, seed=seed,
+                                  filter_index=filter_index)
+    days = {}
+    statistics = None
+    for event in simulator.generate_plan_stream():
+        if event['type'] in ('day', 'day_update'):
+            days[event['day']['date']] = event['day']
+        elif event['type'] == 'done':
+            statistics = event['statistics']
+        yield event
+    
+    _record_performance({'statistics': statistics})
+    if cache_key is not None:
+        cache.put(cache_key, {'days': list(days.values()), 'statistics': statistics})
+
+
+def replan_window(config_dict: Dict, window_start: str, window_end: str) -> Tuple[date, date]:
+    """Zeitfenster für das Re-Planning als Datumswerte; ValueError bei
+    ungültigem Format, Start nach Ende oder Fenster außerhalb des Planzeitraums"""
+    try:
+        start, end = date.fromisoformat(str(window_start)), date.fromisoformat(str(window_end))
+    except ValueError:
+        raise ValueError(f"Invalid re-planning window {window_start} - {window_end}, "
+                         f"expected YYYY-MM-DD")
+    if start > end:
+        raise ValueError(f"Re-planning window start {window_start} is after end {window_end}")
+    period_start = date.fromisoformat(config_dict['start_date'])
+    period_end = date.fromisoformat(config_dict['end_date'])
+    if not (period_start <= start and end <= period_end):
+        raise ValueError(f"Re-planning window {window_start} - {window_end} outside plan period "
+                         f"{config_dict['start_date']} - {config_dict['end_date']}")
+    return start, end
+
+
+def run_replan(config_dict: Dict, recipes: List[Recipe], existing_plan: Dict,
+               window_start: str, window_end: str, pinned: List[Dict] = None,
+               similarity: RecipeSimilarityEngine = None, seed: int = None,
+               filter_index: RecipeFilterIndex = None) -> Dict:
+    """Plant ein Zeitfenster eines bestehenden Plans neu (siehe MenuPlanSimulator.replan)
+    
+    existing_plan ist ein früheres Ergebnis ({'days': [...]}, slim oder voll)
+    oder dessen Tagesliste. Multi-Start wird beim Re-Planning nicht verwendet.
+    """
     config = SimulatorConfig(**config_dict)
-    simulator = MenuPlanSimulator(config, recipes)
-    return simulator.generate_plan()
+    window = replan_window(config_dict, window_start, window_end)
+    days = expand_output(existing_plan)['days'] if isinstance(existing_plan, dict) else existing_plan
+    simulator = MenuPlanSimulator(config, recipes, similarity=similarity, seed=seed,
+                                  filter_index=filter_index)
+    result = simulator.replan(days, *window, pinned=pinned)
+    _record_performance(result)
+    return result
+
+
+def hard_constraint_signature(config: SimulatorConfig) -> Tuple:
+    """Schlüssel der Hard Constraints; Konfigurationen mit gleichem Schlüssel
+    haben je Menükomponente dieselben zulässigen Rezepte"""
+    quality_params = config.simulation_params.get('quality', {})
+    return (
+        tuple(sorted(set(config.dietary_forms))),
+        tuple(sorted(set(config.excluded_allergens))),
+        tuple(sorted(set(config.excluded_aversions) | set(config.selected_aversions))),
+        tuple(bool(quality_params.get(param, True)) for _, param in QUALITY_FLAGS),
+        tuple(sorted(set(config.selected_recipe_groups))),
+    )
+
 
+def _run_batch_item(state: Dict, position: int) -> Tuple[bool, object]:
+    """Eine Konfiguration des Batches; liefert (Erfolg, Ergebnis oder Fehlertext)"""
+    config = state['configs'][position]
+    try:
+        starts = int(config.simulation_params.get('optimization', {}).get('multiStart', 1))
+        if starts > 1:
+            # Parallelität kommt aus dem Batch, Starts laufen hier nacheinander
+            result = run_multi_start(config, state['recipes'], starts,
+                                     similarity=state['similarity'], seed=state['seeds'][position],
+                                     workers=1, filter_index=state['filter_index'],
+                                     progress_callback=check_cancelled,
+                                     eligibility=state['eligibility'][position])
+        else:
+            simulator = MenuPlanSimulator(config, state['recipes'], similarity=state['similarity'],
+                                          seed=state['seeds'][position],
+                                          filter_index=state['filter_index'],
+                                          progress_callback=check_cancelled,
+                                          eligibility=state['eligibility'][position])
+            result = simulator.generate_plan()
+        return True, result
+    except WorkerCancelled:
+        raise
+    except Exception as e:
+        return False, str(e)
+
+
+def run_simulation_batch(config_dicts: List[Dict], recipes: List[Recipe],
+                         similarity: RecipeSimilarityEngine = None, seeds: List[int] = None,
+                         cache=None, filter_index: RecipeFilterIndex = None,
+                         workers: int = None, progress_callback=None) -> Dict:
+    """Führt viele Simulationen (z.B. mehrere Küchen und Kostformen) in einem Aufruf aus.
+    
+    Konfigurationen mit gleichen Hard Constraints bilden eine Gruppe: Filterung
+    und Kandidaten-Pools werden je Gruppe einmal im Elternprozess erzeugt und
+    per Fork mit den Worker-Prozessen geteilt, ebenso Ähnlichkeitsmatrix und
+    Filter-Index (siehe run_forked). Fehler einzelner Konfigurationen brechen
+    den Batch nicht ab; eine Ausnahme aus progress_callback(phase, progress)
+    bricht ihn samt Worker-Prozessen ab.
+    """
+    start_time = time.perf_counter()
+    seeds = list(seeds) if seeds is not None else [None] * len(config_dicts)
+    if len(seeds) != len(config_dicts):
+        raise ValueError("Number of seeds must match number of configs")
+    
+    similarity = similarity or RecipeSimilarityEngine(recipes)
+    if filter_index is None or not filter_index.covers(recipes):
+        filter_index = RecipeFilterIndex(recipes)
+    
+    results = [None] * len(config_dicts)
+    configs = [None] * len(config_dicts)
+    cache_keys = [None] * len(config_dicts)
+    cache_hits = 0
+    pending = []
+    for position, config_dict in enumerate(config_dicts):
+        try:
+            configs[position] = SimulatorConfig(**config_dict)
+        except TypeError as e:
+            results[position] = {'success': False, 'error': f"Invalid config: {e}"}
+            continue
+        cache_keys[position], cached = _cache_lookup(cache, configs[position], seeds[position])
+        if cached is not None:
+            results[position] = {'success': True, 'plan': cached}
+            _record_performance(cached)
+            cache_hits += 1
+        else:
+            pending.append(position)
+    
+    # Gruppen gleicher Hard Constraints teilen Filterung und Kandidaten-Pools
+    groups = defaultdict(list)
+    for position in pending:
+        groups[hard_constraint_signature(configs[position])].append(position)
+    eligibility = {}
+    for members in groups.values():
+        shared = {}
+        for position in members:
+            eligibility[position] = shared
+            simulator = MenuPlanSimulator(configs[position], recipes, similarity=similarity,
+                                          filter_index=filter_index, eligibility=shared)
+            simulator.eligible_recipes = simulator._filter_recipes()
+            for key in simulator.eligible_recipes:
+                simulator._candidate_pool(key)
+    
+    workers = max(1, min(len(pending), workers or os.cpu_count() or 1))
+    if not fork_available():
+        workers = 1
+    
+    state = {
+        'configs': configs, 'seeds': seeds, 'eligibility': eligibility,
+        'recipes': recipes, 'similarity': similarity, 'filter_index': filter_index,
+    }
+    poll = (lambda: progress_callback('batch', 0)) if progress_callback is not None else None
+    outcomes = run_forked(_run_batch_item, state, pending, workers, poll=poll)
+    
+    for position, (success, value) in zip(pending, outcomes):
+        if success:
+            results[position] = {'success': True, 'plan': value}
+            _record_performance(value)
+            if cache_keys[position] is not None:
+                cache.put(cache_keys[position], value)
+        else:
+            results[position] = {'success': False, 'error': value}
+    for position, config in enumerate(configs):
+        if config is not None:
+            results[position]['kitchen_id'] = config.kitchen_id
+    
+    duration = time.perf_counter() - start_time
+    print(f"  ✓ Batch: {len(config_dicts)} configs in {len(groups)} groups, "
+          f"{cache_hits} cached, {workers} workers, {duration:.2f}s")
+    return {
+        'results': results,
+        'statistics': {
+            'configs': len(config_dicts),
+            'groups': len(groups),
+            'cache_hits': cache_hits,
+            'workers': workers,
+            'failed': sum(1 for result in results if not result['success']),
+            'duration_ms': round(duration * 1000, 1),
+        }
+    }
@@ -0,0 +1,104 @@
+"""
+Regressionstest: BKT-Reparatur je Tag
+_solve_day_budget muss eine Auswahl im Fenster finden, wenn es eine gibt,
+und _repair_daily_bkt muss die Tage eines Greedy-Plans außerhalb von
+[bkt_min, bkt_max] ins Fenster bringen, ohne den Wiederholungsabstand zu
+verletzen. Ausführen: python backend/test_bkt_repair.py
+"""
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from simulator import SimulatorConfig, MenuPlanSimulator, load_recipes_from_file, _solve_day_budget
+
+RECIPES_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'recipes_300.json')
+SEED = 3
+MIN_REPETITION = 7
+
+# Greedy und Optimierung zielen auf 80% des BKT, also unter bkt_min
+CONFIG = {
+    'start_date': '2026-01-05',
+    'end_date': '2026-03-01',
+    'bkt_target': 1.8,
+    'bkt_tolerance': 0.1,
+    'dietary_forms': ['Vollkost'],
+    'excluded_allergens': [],
+    'menu_lines': [{
+        'id': 1,
+        'name': 'Vollkost',
+        'cost_forms': [
+            {'id': 1, 'name': 'Frühstück', 'component': 'Frühstück'},
+            {'id': 2, 'name': 'Mittagessen', 'component': 'Mittagessen'},
+            {'id': 3, 'name': 'Abendessen', 'component': 'Abendessen'},
+        ]
+    }],
+    'simulation_params': {'variety': {'minRepetition': MIN_REPETITION}},
+}
+
+
+def check_solver():
+    # Unverändert 30 Zellen; im Fenster [50, 60] nur mit einer Änderung (+25 oder +28)
+    slots = [[(10, 0), (35, 2)], [(12, 0), (12, 1)], [(8, 0), (36, 2), (2, 1)]]
+    selection = _solve_day_budget(slots, 50, 60, 55)
+    total = sum(candidates[c][0] for candidates, c in zip(slots, selection))
+    changes = sum(1 for c in selection if c)
+    if not 50 <= total <= 60 or changes != 1:
+        print(f"❌ solver: selection {selection}, total {total}, {changes} changes")
+        return False
+    # Unerreichbar: kleinster Abstand zum Fenster
+    selection = _solve_day_budget([[(10, 0), (20, 2)]], 50, 60, 55)
+    if selection != [1]:
+        print(f"❌ solver: unreachable window, selection {selection}")
+        return False
+    print("✅ solver: window reached with one change, closest total when unreachable")
+    return True
+
+
+def repetition_violations(plan):
+    days = {}
+    for (day, _, _), meal_slot in sorted(plan.items(), key=lambda item: item[0][0]):
+        days.setdefault(meal_slot.id, []).append(day.toordinal())
+    return sum(1 for ordinals in days.values()
+               for a, b in zip(ordinals, ordinals[1:]) if b - a < MIN_REPETITION)
+
+
+def check_repair(recipes):
+    simulator = MenuPlanSimulator(SimulatorConfig(**CONFIG), recipes, seed=SEED)
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulator._prepare()
+        plan = simulator._greedy_construct_plan()
+    outside = [day for day, cost in simulator._daily_costs(plan).items()
+               if not simulator._within_bkt(cost)]
+    if not outside:
+        print("❌ repair: greedy plan has no day outside the window, nothing to test")
+        return False
+    violations = repetition_violations(plan)
+
+    changed, repaired = simulator._repair_daily_bkt(plan)
+    still_outside = [day for day, cost in simulator._daily_costs(plan).items()
+                     if not simulator._within_bkt(cost)]
+    if still_outside:
+        print(f"❌ repair: {len(still_outside)} of {len(outside)} days still outside, "
+              f"first {still_outside[0]}")
+        return False
+    if repetition_violations(plan) > violations:
+        print(f"❌ repair: repetition violations {violations} -> {repetition_violations(plan)}")
+        return False
+    print(f"✅ repair: {len(outside)} days outside the window, {repaired} repaired "
+          f"({changed} slots changed), minRepetition kept")
+    return True
+
+
+def main():
+    print("Test: BKT-Reparatur bringt die Tage ins Fenster")
+    print("=" * 60)
+    recipes = load_recipes_from_file(RECIPES_FILE)
+    results = [check_solver(), check_repair(recipes)]
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Regressionstest: BKT-Machbarkeits-Sweep
+Kostentabellen und Stichproben müssen dieselbe Einheit haben (Kosten je
+Portion wie MealSlot.cost), und die Greedy-Stichproben an den Frontier-
+Punkten müssen tatsächlich im Budget liegen.
+Ausführen: python backend/test_bkt_sweep.py
+"""
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from simulator import load_recipes_from_file
+from bkt_sweep import run_feasibility_sweep
+
+RECIPES_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'recipes_300.json')
+SEED = 1
+TOLERANCES = [0.1, 0.2, 0.3]
+
+CONFIG = {
+    'start_date': '2026-01-05',
+    'end_date': '2026-02-01',
+    'dietary_forms': ['Vollkost'],
+    'excluded_allergens': [],
+    'menu_lines': [{
+        'id': 1,
+        'name': 'Vollkost',
+        'cost_forms': [
+            {'id': 1, 'name': 'Frühstück', 'component': 'Frühstück'},
+            {'id': 2, 'name': 'Mittagessen', 'component': 'Mittagessen'},
+            {'id': 3, 'name': 'Abendessen', 'component': 'Abendessen'},
+        ]
+    }],
+    'simulation_params': {'variety': {'minRepetition': 7}},
+}
+
+
+def main():
+    print("Test: Frontier-Stichproben des BKT-Sweeps liegen im Budget")
+    print("=" * 60)
+    recipes = load_recipes_from_file(RECIPES_FILE)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = run_feasibility_sweep(CONFIG, recipes, {'min': 0.2, 'max': 4.0, 'step': 0.05},
+                                       TOLERANCES, samples=len(TOLERANCES), seed=SEED, workers=1)
+    allergen_set = result['allergen_sets'][0]
+    samples = result['samples']
+    ok = True
+
+    if len(samples) != len(TOLERANCES):
+        print(f"❌ {len(samples)} samples, expected one per tolerance")
+        return 1
+    for sample in samples:
+        point = f"target {sample['bkt_target']:.2f} / tolerance {sample['bkt_tolerance']:.2f}"
+        if 'error' in sample:
+            print(f"❌ {point}: {sample['error']}")
+            ok = False
+            continue
+        # Kein Tag kann günstiger sein als die günstigsten Rezepte je Slot
+        if sample['min_bkt'] < allergen_set['min_daily_cost'] - 0.01:
+            print(f"❌ {point}: day cost {sample['min_bkt']} below table minimum "
+                  f"{allergen_set['min_daily_cost']} (cost units differ)")
+            ok = False
+        if not sample['within_budget']:
+            print(f"❌ {point}: avg {sample['avg_bkt']} above budget "
+                  f"{sample['bkt_target'] * (1 + sample['bkt_tolerance']):.3f}")
+            ok = False
+        else:
+            print(f"✅ {point}: avg {sample['avg_bkt']}, {sample['days_within_window']}/"
+                  f"{sample['total_days']} days in window")
+    if not all(point['confirmed'] for point in allergen_set['frontier']):
+        print(f"❌ frontier not confirmed: {allergen_set['frontier']}")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Regressionstest: vektorisierter Greedy-Konstruktor gegen Referenzpläne
+Die Referenzen wurden mit dem ursprünglichen, rezeptweise bewertenden
+Greedy (_calculate_score, Kosten je Portion wie MealSlot.cost) erzeugt.
+Der vektorisierte Greedy (_score_candidates) muss für dieselbe
+Konfiguration dieselben Optionen und dieselbe Auswahl je Slot liefern.
+Ausführen: python backend/test_greedy_equivalence.py
+"""
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from simulator import SimulatorConfig, MenuPlanSimulator, load_recipes_from_file
+
+RECIPES_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'recipes_300.json')
+SEED = 42
+
+# Eine Menülinie, drei Komponenten, zwei Optionen je Slot
+CONFIG_DAILY = {
+    'start_date': '2026-03-02',
+    'end_date': '2026-03-15',
+    'bkt_target': 1.2,
+    'bkt_tolerance': 0.15,
+    'dietary_forms': ['Vollkost'],
+    'excluded_allergens': ['Nüsse'],
+    'menu_lines': [{
+        'id': 1,
+        'name': 'Vollkost',
+        'cost_forms': [
+            {'id': 1, 'name': 'Frühstück', 'component': 'Frühstück'},
+            {'id': 2, 'name': 'Mittagessen', 'component': 'Mittagessen'},
+            {'id': 3, 'name': 'Abendessen', 'component': 'Abendessen'},
+        ]
+    }],
+    'simulation_params': {'variety': {}},
+}
+
+# Zwei Menülinien, drei Optionen, Wiederholungsabstand und Fleisch-Limit
+CONFIG_VARIETY = {
+    'start_date': '2026-06-01',
+    'end_date': '2026-06-14',
+    'bkt_target': 0.8,
+    'bkt_tolerance': 0.2,
+    'dietary_forms': ['Vollkost', 'Vegetarisch'],
+    'excluded_allergens': ['Gluten'],
+    'recipe_options_count': 3,
+    'repetition_interval': 5,
+    'menu_lines': [
+        {'id': 1, 'name': 'Vollkost', 'cost_forms': [
+            {'id': 1, 'name': 'Mittagessen', 'component': 'Mittagessen'},
+            {'id': 2, 'name': 'Abendessen', 'component': 'Abendessen'},
+        ]},
+        {'id': 2, 'name': 'Vegetarisch', 'cost_forms': [
+            {'id': 3, 'name': 'Mittagessen', 'component': 'Mittagessen'},
+        ]},
+    ],
+    'simulation_params': {'variety': {'minRepetition': 5, 'maxMeat': 6}},
+}
+
+# Je Slot (Tag, Menülinie, Kostform): (Rezept-IDs der Optionen, selected_index)
+REFERENCE_DAILY = [
+    ((57, 55), 0), ((235, 246), 1), ((274, 269), 0),
+    ((208, 210), 0), ((94, 91), 1), ((192, 196), 0),
+    ((210, 55), 1), ((235, 247), 1), ((42, 178), 0),
+    ((210, 225), 0), ((93, 39), 0), ((269, 264), 1),
+    ((225, 201), 1), ((39, 32), 0), ((196, 43), 1),
+    ((225, 217), 1), ((250, 230), 0), ((272, 178), 1),
+    ((225, 4), 1), ((235, 94), 1), ((272, 273), 0),
+    ((225, 56), 1), ((230, 240), 1), ((182, 18), 0),
+    ((225, 65), 1), ((235, 230), 1), ((268, 200), 0),
+    ((225, 222), 1), ((12, 32), 0), ((269, 261), 1),
+    ((225, 52), 1), ((235, 32), 1), ((197, 200), 1),
+    ((225, 26), 1), ((235, 71), 1), ((269, 196), 1),
+    ((225, 23), 1), ((235, 238), 1), ((273, 197), 0),
+    ((225, 221), 0), ((38, 130), 0), ((269, 197), 1),
+]
+
+REFERENCE_VARIETY = [
+    ((246, 94, 247), 0), ((42, 182, 184), 1), ((235, 93, 94), 1),
+    ((247, 32, 240), 1), ((184, 42, 193), 0), ((235, 247, 38), 2),
+    ((247, 240, 250), 2), ((268, 50, 200), 0), ((235, 247, 240), 1),
+    ((240, 94, 232), 2), ((200, 50, 42), 2), ((14, 152, 235), 0),
+    ((94, 80, 87), 2), ((200, 50, 193), 2), ((94, 235, 75), 2),
+    ((240, 229, 108), 0), ((181, 182, 200), 1), ((235, 236, 229), 2),
+    ((108, 94, 80), 2), ((200, 50, 20), 2), ((235, 130, 108), 1),
+    ((108, 94, 234), 1), ((181, 200, 50), 0), ((235, 236, 108), 2),
+    ((228, 234, 227), 0), ((50, 200, 179), 0), ((235, 236, 234), 2),
+    ((8, 111, 227), 0), ((200, 178, 179), 0), ((235, 236, 138), 2),
+    ((227, 233, 239), 0), ((184, 182, 42), 1), ((235, 236, 233), 2),
+    ((241, 243, 239), 0), ((184, 179, 42), 0), ((235, 236, 243), 2),
+    ((111, 239, 248), 0), ((42, 179, 178), 0), ((235, 236, 133), 2),
+    ((239, 248, 249), 2), ((179, 178, 181), 2), ((235, 236, 239), 2),
+]
+
+
+def greedy_plan(recipes, config_dict):
+    """Greedy-Plan (ohne Optimierung) als Liste (Optionen, selected_index) je Slot"""
+    simulator = MenuPlanSimulator(SimulatorConfig(**config_dict), recipes, seed=SEED)
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulator.eligible_recipes = simulator._filter_recipes()
+        plan = simulator._greedy_construct_plan()
+    return [(tuple(r.id for r in slot.options), slot.selected_index) for slot in plan.values()]
+
+
+def check(name, recipes, config_dict, reference):
+    plan = greedy_plan(recipes, config_dict)
+    mismatches = [i for i, (slot, expected) in enumerate(zip(plan, reference)) if slot != expected]
+    if len(plan) != len(reference):
+        print(f"❌ {name}: {len(plan)} slots, expected {len(reference)}")
+        return False
+    if mismatches:
+        first = mismatches[0]
+        print(f"❌ {name}: {len(mismatches)} slots differ, first #{first}: "
+              f"{plan[first]} != {reference[first]}")
+        return False
+    print(f"✅ {name}: {len(plan)} slots identical to reference")
+    return True
+
+
+def main():
+    print("Test: Vektorisierter Greedy entspricht den Referenzplänen")
+    print("=" * 60)
+    recipes = load_recipes_from_file(RECIPES_FILE)
+    results = [
+        check('daily', recipes, CONFIG_DAILY, REFERENCE_DAILY),
+        check('variety', recipes, CONFIG_VARIETY, REFERENCE_VARIETY),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
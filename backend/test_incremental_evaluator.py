@@ -0,0 +1,103 @@
+"""
+Regressionstest: inkrementelle Bewertung der Local Search
+Nach zufälligen Zügen (apply/undo über IncrementalPlanEvaluator) muss der
+inkrementell geführte Zielfunktionswert der vollständigen Neubewertung des
+Plans entsprechen, und delta() muss die tatsächliche Änderung vorhersagen.
+Ausführen: python backend/test_incremental_evaluator.py
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from simulator import SimulatorConfig, MenuPlanSimulator, IncrementalPlanEvaluator, load_recipes_from_file
+
+RECIPES_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'recipes_300.json')
+SEED = 7
+MOVES = 3000
+TOLERANCE = 1e-9
+
+CONFIG = {
+    'start_date': '2026-01-05',
+    'end_date': '2026-02-15',
+    'bkt_target': 12.0,
+    'bkt_tolerance': 0.15,
+    'dietary_forms': ['Vollkost'],
+    'excluded_allergens': [],
+    'recipe_options_count': 3,
+    'menu_lines': [{
+        'id': 1,
+        'name': 'Vollkost',
+        'cost_forms': [
+            {'id': 1, 'name': 'Frühstück', 'component': 'Frühstück'},
+            {'id': 2, 'name': 'Mittagessen', 'component': 'Mittagessen'},
+            {'id': 3, 'name': 'Abendessen', 'component': 'Abendessen'},
+        ]
+    }],
+    'simulation_params': {'variety': {}},
+}
+
+
+def full_score(plan, bkt_target, bkt_max):
+    """Zielfunktion durch vollständige Neubewertung (wie das ursprüngliche _evaluate_plan)"""
+    daily_costs = defaultdict(float)
+    recipe_counts = defaultdict(int)
+    for (day, _, _), meal_slot in plan.items():
+        daily_costs[day] += meal_slot.cost
+        recipe_counts[meal_slot.id] += 1
+    total_bkt_dev = 0.0
+    for daily_cost in daily_costs.values():
+        if daily_cost > bkt_max:
+            total_bkt_dev += (daily_cost - bkt_max) * 3.0
+        else:
+            total_bkt_dev += abs(daily_cost - bkt_target * 0.8)
+    variety_penalty = sum(count ** 2 for count in recipe_counts.values()) / len(plan)
+    return total_bkt_dev / len(daily_costs) + 0.1 * variety_penalty
+
+
+def main():
+    print("Test: Inkrementelle Bewertung entspricht vollständiger Neubewertung")
+    print("=" * 60)
+    recipes = load_recipes_from_file(RECIPES_FILE)
+    config = SimulatorConfig(**CONFIG)
+    simulator = MenuPlanSimulator(config, recipes, seed=SEED)
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulator.eligible_recipes = simulator._filter_recipes()
+        plan = simulator._greedy_construct_plan()
+
+    evaluator = IncrementalPlanEvaluator(plan, config.bkt_target, config.bkt_max)
+    keys = list(plan.keys())
+    rng = random.Random(SEED)
+    errors = []
+    applied = undone = 0
+    for move in range(MOVES):
+        key, new_slot = simulator._propose_move(plan, keys)
+        if new_slot is None:
+            continue
+        before = evaluator.objective
+        delta = evaluator.delta(key, new_slot)
+        old_slot = evaluator.apply(key, new_slot)
+        applied += 1
+        if abs(evaluator.objective - before - delta) > TOLERANCE:
+            errors.append(f"move {move}: delta {delta:.12f} != {evaluator.objective - before:.12f}")
+        # Etwa jeden dritten Zug wieder rückgängig machen
+        if rng.random() < 0.33:
+            evaluator.undo(key, old_slot)
+            undone += 1
+        expected = full_score(plan, config.bkt_target, config.bkt_max)
+        if abs(evaluator.objective - expected) > TOLERANCE:
+            errors.append(f"move {move}: objective {evaluator.objective:.12f} != {expected:.12f}")
+
+    if errors:
+        print(f"❌ {len(errors)} mismatches, first: {errors[0]}")
+        return 1
+    print(f"✅ {applied} moves applied, {undone} undone: incremental score equals full re-score")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
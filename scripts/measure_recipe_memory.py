@@ -0,0 +1,89 @@
+#!/usr/bin/env python3.11
+"""
+Misst den Speicherbedarf des geladenen Rezeptkatalogs pro Worker-Prozess
+Erzeugt synthetische Kataloge (Vielfache von recipes_300.json) und lädt sie
+jeweils in einem frischen Prozess über load_recipes_from_file
+"""
+import copy
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+DEFAULT_SIZES = (300, 10000, 100000)
+
+
+def _rss_kb() -> int:
+    """Aktuelles Resident Set Size des Prozesses in KB (Linux)"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def write_catalog(size: int, path: str):
+    """Schreibt einen synthetischen Katalog mit eindeutigen IDs und Namen"""
+    base_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'recipes_300.json')
+    with open(base_file, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+
+    rnd = random.Random(1)
+    data = []
+    for i in range(size):
+        recipe = copy.deepcopy(base[i % len(base)])
+        recipe['id'] = i + 1
+        recipe['name'] = f"{recipe['name']} #{i + 1}"
+        recipe['cost'] = round(recipe['cost'] * rnd.uniform(0.7, 1.3), 2)
+        data.append(recipe)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def measure(path: str):
+    """Lädt den Katalog und gibt Netto-RSS und gehaltenen Heap (KB) aus"""
+    from backend.simulator import load_recipes_from_file
+
+    gc.collect()
+    rss_before = _rss_kb()
+    tracemalloc.start()
+    recipes = load_recipes_from_file(path)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({
+        'recipes': len(recipes),
+        'rss_kb': _rss_kb() - rss_before,
+        'retained_kb': retained // 1024,
+    }))
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--measure':
+        measure(sys.argv[2])
+        return
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'Rezepte':>10} {'RSS (MB)':>10} {'Heap (MB)':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, f'recipes_{size}.json')
+            write_catalog(size, path)
+            output = subprocess.run(
+                [sys.executable, __file__, '--measure', path],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{result['recipes']:>10} {result['rss_kb'] / 1024:>10.1f} "
+                  f"{result['retained_kb'] / 1024:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()